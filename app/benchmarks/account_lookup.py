@@ -0,0 +1,54 @@
+"""
+Repeated single-account lookups, as an account lookup service issues them:
+SQL with the id pasted in, parameters bound through the Python API, and the
+PreparedStatementCache executing one prepared statement:
+
+    python -m app.benchmarks.account_lookup [rows] [accounts] [lookups]
+"""
+import sys
+import time
+
+from prettytable import PrettyTable
+from app.benchmarks.transactions_layout import build
+from app.database.statements import PreparedStatementCache
+from app.transform.transform import DataTransformer
+
+LOOKUP = """
+    SELECT transaction_id, amount, transaction_type, requested_at
+    FROM transactions
+    WHERE account_id = {}
+"""
+
+
+def per_lookup_us(lookup, account_ids) -> float:
+    lookup(account_ids[0])
+    started = time.perf_counter()
+    for account_id in account_ids:
+        lookup(account_id).fetchall()
+    return (time.perf_counter() - started) / len(account_ids) * 1e6
+
+
+def run(rows: int = 2_000_000, accounts: int = 100_000, lookups: int = 2_000):
+    connection = build("compact", rows, accounts)
+    DataTransformer.finalize_transactions(connection)
+    account_ids = [row[0] for row in connection.execute(
+        f"SELECT account_id FROM accounts ORDER BY hash(account_id) LIMIT {lookups}"
+    ).fetchall()]
+    cache = PreparedStatementCache(connection)
+
+    table = PrettyTable()
+    table.field_names = ["Lookup", "Per lookup (us)"]
+    for name, lookup in [
+        ("id pasted into SQL", lambda account_id: connection.execute(LOOKUP.format(account_id))),
+        ("Python API parameter", lambda account_id: connection.execute(LOOKUP.format("$1"), [account_id])),
+        ("prepared statement cache", lambda account_id: cache.execute(LOOKUP.format("$1"), [account_id])),
+    ]:
+        table.add_row([name, f"{per_lookup_us(lookup, account_ids):,.0f}"])
+    connection.close()
+
+    print(f"account lookup benchmark: {rows:,} rows, {accounts:,} accounts, {lookups:,} lookups")
+    print(table)
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,61 @@
+"""
+Analysis over a bulk set of account ids: ids pasted into an IN list, bound as
+one list through the PreparedStatementCache, and registered as a relation
+(IdSet) the query joins against:
+
+    python -m app.benchmarks.bulk_ids [rows] [accounts] [set sizes...]
+"""
+import sys
+import time
+
+from prettytable import PrettyTable
+from app.benchmarks.transactions_layout import build
+from app.database.id_sets import IdSet
+from app.database.statements import PreparedStatementCache
+from app.transform.transform import DataTransformer
+
+TOTALS = """
+    SELECT t.account_id, SUM(t.amount) AS total_amount
+    FROM transactions t
+    {}
+    GROUP BY t.account_id
+"""
+
+
+def registered(connection, ids):
+    with IdSet.registered(connection, ids) as id_set:
+        return connection.execute(TOTALS.format(f"JOIN {id_set} s ON t.account_id = s.id"))
+
+
+def elapsed_ms(lookup, ids) -> float:
+    started = time.perf_counter()
+    lookup(ids).fetchall()
+    return (time.perf_counter() - started) * 1000
+
+
+def run(rows: int = 2_000_000, accounts: int = 1_000_000, sizes=(1_000, 50_000, 500_000)):
+    connection = build("compact", rows, accounts)
+    DataTransformer.finalize_transactions(connection)
+    cache = PreparedStatementCache(connection)
+    lookups = [
+        lambda ids: connection.execute(TOTALS.format(f"WHERE t.account_id IN ({', '.join(map(str, ids.tolist()))})")),
+        lambda ids: cache.execute(TOTALS.format("WHERE t.account_id IN (SELECT UNNEST($1))"), [ids.tolist()]),
+        lambda ids: registered(connection, ids),
+    ]
+
+    table = PrettyTable()
+    table.field_names = ["Ids", "IN list (ms)", "bound list (ms)", "registered relation (ms)"]
+    for size in sizes:
+        ids = connection.execute(
+            f"SELECT account_id FROM accounts ORDER BY hash(account_id) LIMIT {size}"
+        ).fetchnumpy()["account_id"]
+        table.add_row([f"{len(ids):,}"] + [f"{elapsed_ms(lookup, ids):,.1f}" for lookup in lookups])
+    connection.close()
+
+    print(f"bulk id benchmark: {rows:,} rows, {accounts:,} accounts")
+    print(table)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    run(*args[:2], *([args[2:]] if args[2:] else []))
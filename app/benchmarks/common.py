@@ -0,0 +1,51 @@
+import time
+from typing import Callable
+
+import duckdb
+
+
+def best_of(run: Callable[[], object], repeat: int = 5) -> float:
+    """Fastest wall time in seconds over repeat runs (first run warms caches)"""
+    run()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def table_memory_bytes(connection) -> int:
+    """Bytes held by in-memory tables of an in-memory database"""
+    return connection.execute("""
+        SELECT COALESCE(SUM(memory_usage_bytes), 0)
+        FROM duckdb_memory()
+        WHERE tag = 'IN_MEMORY_TABLE'
+    """).fetchone()[0]
+
+
+def synthetic_warehouse(rows: int, accounts: int):
+    """
+    In-memory database with `accounts` accounts and a staging table of `rows`
+    random movements spread over 2020, shaped like the migrated transactions.
+    """
+    connection = duckdb.connect()
+    connection.execute(f"""
+        CREATE TABLE accounts AS
+        SELECT
+            (range * 7919 + 1000000000000000000)::BIGINT AS account_id,
+            (range % 50000)::BIGINT AS customer_id
+        FROM range({accounts})
+    """)
+    connection.execute(f"""
+        CREATE TABLE movements AS
+        SELECT
+            range::BIGINT AS transaction_id,
+            ((hash(range) % {accounts}) * 7919 + 1000000000000000000)::BIGINT AS account_id,
+            (hash(range * 7) % 200000) / 100.0 AS amount,
+            ['transfer_in', 'transfer_out', 'pix_in', 'pix_out'][1 + (hash(range * 31) % 4)::BIGINT] AS transaction_type,
+            TIMESTAMP '2020-01-01' + to_seconds((hash(range * 17) % 31536000)::BIGINT) AS requested_at,
+            ['completed', 'completed', 'completed', 'failed'][1 + (hash(range * 13) % 4)::BIGINT] AS status
+        FROM range({rows})
+    """)
+    return connection
@@ -0,0 +1,66 @@
+"""
+Consuming all of transactions through DuckDBConnection.stream in the rows,
+arrow and numpy formats, and exporting it to CSV with Exporter.to_csv (COPY),
+against fetchall() of the whole table, reporting time and process peak memory
+growth (fetchall runs last, as peak memory only grows):
+
+    python -m app.benchmarks.extract_stream [rows] [accounts]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from prettytable import PrettyTable
+from app.benchmarks.transactions_layout import build
+from app.database.connection import DuckDBConnection
+from app.database.results import RESULT_FORMATS, Results
+from app.export.exporter import Exporter
+
+EXTRACT = "SELECT * FROM transactions"
+
+
+def peak_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measured(extract):
+    baseline = peak_mb()
+    started = time.perf_counter()
+    extract()
+    return time.perf_counter() - started, peak_mb() - baseline
+
+
+def consume(db, result_format: str) -> int:
+    """Reads every batch of the stream, keeping none of them"""
+    rows = 0
+    for batch in db.stream(EXTRACT, result_format=result_format):
+        rows += Results.num_rows(batch)
+    return rows
+
+
+def run(rows: int = 5_000_000, accounts: int = 100_000):
+    db = DuckDBConnection()
+    db.connection = build("compact", rows, accounts)
+
+    table = PrettyTable()
+    table.field_names = ["Extract", "Time (s)", "Peak memory growth (MB)"]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "transactions.csv")
+        for name, extract in [
+            *[(f"stream() {result_format} batches", lambda result_format=result_format: consume(db, result_format))
+              for result_format in RESULT_FORMATS],
+            ("CSV export (COPY)", lambda: Exporter.to_csv(db, EXTRACT, path)),
+            ("fetchall()", lambda: db.connection.execute(EXTRACT).fetchall()),
+        ]:
+            seconds, growth = measured(extract)
+            table.add_row([name, f"{seconds:.2f}", f"{growth:,.0f}"])
+    db.close()
+
+    print(f"extract benchmark: {rows:,} rows")
+    print(table)
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
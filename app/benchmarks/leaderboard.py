@@ -0,0 +1,68 @@
+"""
+Ranking every account with RANK() vs reading the incremental account
+leaderboard, for the 10-account ranks analyze_accounts needs and a top 100,
+plus rebuilding vs patching the rankings after appending transactions:
+
+    python -m app.benchmarks.leaderboard [rows] [accounts] [touched_accounts]
+"""
+import sys
+
+from prettytable import PrettyTable
+from app.benchmarks.common import best_of
+from app.benchmarks.monthly_balances_refresh import DELTA_TABLE, append_delta, timed
+from app.benchmarks.transactions_layout import build
+from app.views.account_summary import AccountSummary
+from app.views.leaderboard import ACCOUNT_LEADERBOARD, Leaderboard
+from app.views.transactions_views import TransactionsViews
+
+RANK_ALL = f"""
+    SELECT account_id, total_incoming, RANK() OVER (ORDER BY total_incoming DESC) AS performance_rank
+    FROM {ACCOUNT_LEADERBOARD}
+"""
+
+
+def run(rows: int = 2_000_000, accounts: int = 100_000, touched_accounts: int = 2_000):
+    connection = build("compact", rows, accounts)
+    AccountSummary.create_account_monthly_summary(connection)
+    Leaderboard.create_account_leaderboard(connection)
+    Leaderboard.create_leaderboard_histogram(connection)
+    sample = [row[0] for row in connection.execute(
+        "SELECT account_id FROM accounts ORDER BY hash(account_id) LIMIT 10"
+    ).fetchall()]
+    in_list = ", ".join(str(account_id) for account_id in sample)
+
+    reads = [
+        (
+            "rank of 10 accounts",
+            lambda: connection.execute(f"SELECT * FROM ({RANK_ALL}) WHERE account_id IN ({in_list})").arrow(),
+            lambda: Leaderboard.ranks(connection, sample),
+        ),
+        (
+            "rank of 10 accounts (approximate)",
+            lambda: connection.execute(f"SELECT * FROM ({RANK_ALL}) WHERE account_id IN ({in_list})").arrow(),
+            lambda: Leaderboard.ranks(connection, sample, approximate=True),
+        ),
+        (
+            "top 100",
+            lambda: connection.execute(f"SELECT * FROM ({RANK_ALL}) WHERE performance_rank <= 100").arrow(),
+            lambda: Leaderboard.top(connection, 100),
+        ),
+    ]
+    table = PrettyTable()
+    table.field_names = ["Operation", "RANK() over all (ms)", "Leaderboard (ms)"]
+    for name, rank_all, leaderboard in reads:
+        table.add_row([name, f"{best_of(rank_all) * 1000:,.2f}", f"{best_of(leaderboard) * 1000:,.2f}"])
+
+    append_delta(connection, touched_accounts, offset=rows)
+    AccountSummary.refresh_from_delta(connection, DELTA_TABLE)
+    rebuild = timed(lambda: TransactionsViews.create_top_performing_accounts(connection))
+    patch = timed(lambda: Leaderboard.apply_delta(connection, DELTA_TABLE))
+    table.add_row([f"refresh after {touched_accounts:,} accounts change", f"{rebuild:,.2f}", f"{patch:,.2f}"])
+    connection.close()
+
+    print(f"leaderboard benchmark: {rows:,} rows, {accounts:,} accounts")
+    print(table)
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:4]))
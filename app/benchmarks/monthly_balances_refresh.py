@@ -0,0 +1,59 @@
+"""
+Full rebuild vs incremental refresh of monthly_account_balances after appending
+transactions for a few thousand accounts in the last month:
+
+    python -m app.benchmarks.monthly_balances_refresh [rows] [accounts] [touched_accounts]
+"""
+import sys
+import time
+
+from prettytable import PrettyTable
+from app.benchmarks.transactions_layout import build
+from app.views.materialized_views import MaterializedViews
+
+DELTA_TABLE = "benchmark_delta"
+
+
+def append_delta(connection, touched_accounts: int, offset: int):
+    """One new December transfer for each of touched_accounts accounts"""
+    connection.execute(f"""
+        CREATE OR REPLACE TABLE {DELTA_TABLE} AS
+        SELECT
+            {offset} + row_number() OVER () AS transaction_id,
+            account_id,
+            12.34::DECIMAL(18,2) AS amount,
+            'pix_in' AS transaction_type,
+            TIMESTAMP '2020-12-15 10:00:00' AS requested_at,
+            TIMESTAMP '2020-12-15 10:00:05' AS completed_at,
+            'completed' AS status
+        FROM accounts
+        ORDER BY hash(account_id)
+        LIMIT {touched_accounts}
+    """)
+    connection.execute(f"INSERT INTO transactions SELECT * FROM {DELTA_TABLE}")
+
+
+def timed(run) -> float:
+    started = time.perf_counter()
+    run()
+    return (time.perf_counter() - started) * 1000
+
+
+def run(rows: int = 2_000_000, accounts: int = 100_000, touched_accounts: int = 2_000):
+    connection = build("compact", rows, accounts)
+    full = timed(lambda: MaterializedViews.create_monthly_account_balances(connection))
+    append_delta(connection, touched_accounts, offset=rows)
+    incremental = timed(lambda: MaterializedViews.refresh_monthly_account_balances(connection, DELTA_TABLE))
+    connection.close()
+
+    table = PrettyTable()
+    table.field_names = ["Refresh", "Time (ms)"]
+    table.add_row(["full rebuild", f"{full:,.1f}"])
+    table.add_row([f"incremental ({touched_accounts:,} accounts)", f"{incremental:,.1f}"])
+    print(f"monthly balances refresh benchmark: {rows:,} rows, {accounts:,} accounts")
+    print(table)
+    return full, incremental
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,39 @@
+"""
+Fetching a multi-million-row analysis result as row tuples, NumPy columns and an
+Arrow table (when pyarrow is installed):
+
+    python -m app.benchmarks.result_formats [rows] [accounts]
+"""
+import importlib.util
+import sys
+import time
+
+from prettytable import PrettyTable
+from app.benchmarks.transactions_layout import build
+from app.database.results import ARROW, NUMPY, ROWS, Results
+
+RESULT = "SELECT account_id, requested_at, transaction_type, amount FROM transactions"
+
+
+def run(rows: int = 2_000_000, accounts: int = 100_000):
+    connection = build("compact", rows, accounts)
+    formats = [ROWS, NUMPY]
+    if importlib.util.find_spec("pyarrow"):
+        formats.append(ARROW)
+    else:
+        print("ⓘ pyarrow is not installed, skipping the arrow format")
+
+    table = PrettyTable()
+    table.field_names = ["Format", "Fetch (s)"]
+    for result_format in formats:
+        started = time.perf_counter()
+        Results.query(connection, RESULT, result_format=result_format)
+        table.add_row([result_format, f"{time.perf_counter() - started:.3f}"])
+    connection.close()
+
+    print(f"result format benchmark: {rows:,} rows")
+    print(table)
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,103 @@
+"""
+Compares the original transactions layout (VARCHAR keys and labels, FLOAT amounts)
+with the compact layout declared by TransactionDTO on synthetic data:
+
+    python -m app.benchmarks.transactions_layout [rows] [accounts]
+"""
+import sys
+
+from prettytable import PrettyTable
+from app.benchmarks.common import best_of, synthetic_warehouse, table_memory_bytes
+from app.database.update_dtos import TransactionDTO
+
+LEGACY_DDL = """
+    CREATE TABLE transactions (
+        transaction_id VARCHAR PRIMARY KEY,
+        account_id VARCHAR,
+        amount FLOAT,
+        transaction_type VARCHAR,
+        requested_at TIMESTAMP,
+        completed_at TIMESTAMP,
+        status VARCHAR
+    )
+"""
+
+LAYOUTS = {
+    "legacy": {
+        "ddl": LEGACY_DDL,
+        "transaction_id": "uuid()::VARCHAR",
+        "account_join": "CAST(t.account_id AS BIGINT) = a.account_id",
+    },
+    "compact": {
+        "ddl": TransactionDTO().ddl(),
+        "transaction_id": "transaction_id",
+        "account_join": "t.account_id = a.account_id",
+    },
+}
+
+AGGREGATION_QUERY = """
+    SELECT
+        account_id,
+        DATE_TRUNC('month', requested_at) AS month,
+        SUM(CASE
+            WHEN transaction_type IN ('transfer_in', 'pix_in') THEN amount
+            ELSE -amount
+        END) AS net_change
+    FROM transactions
+    GROUP BY account_id, DATE_TRUNC('month', requested_at)
+"""
+
+
+def build(layout: str, rows: int, accounts: int):
+    """Synthetic warehouse whose transactions table uses the given layout"""
+    spec = LAYOUTS[layout]
+    connection = synthetic_warehouse(rows, accounts)
+    connection.execute(spec["ddl"])
+    connection.execute(f"""
+        INSERT INTO transactions
+        SELECT
+            {spec['transaction_id']},
+            account_id,
+            amount,
+            transaction_type,
+            requested_at,
+            requested_at + INTERVAL 5 SECOND,
+            status
+        FROM movements
+    """)
+    connection.execute("DROP TABLE movements")
+    connection.execute("CHECKPOINT")
+    return connection
+
+
+def run(rows: int = 2_000_000, accounts: int = 100_000):
+    results = {}
+    for layout, spec in LAYOUTS.items():
+        connection = build(layout, rows, accounts)
+        join_query = f"""
+            SELECT a.customer_id, SUM(t.amount)
+            FROM transactions t
+            JOIN accounts a ON {spec['account_join']}
+            GROUP BY a.customer_id
+        """
+        # Results are fetched as Arrow so the timings measure the engine rather
+        # than the construction of Python Decimal/str objects
+        results[layout] = {
+            "memory (MiB)": table_memory_bytes(connection) / (1 << 20),
+            "join (ms)": best_of(lambda: connection.execute(join_query).arrow()) * 1000,
+            "aggregation (ms)": best_of(lambda: connection.execute(AGGREGATION_QUERY).arrow()) * 1000,
+        }
+        connection.close()
+
+    table = PrettyTable()
+    table.field_names = ["Metric", "Legacy", "Compact", "Legacy / Compact"]
+    for metric in results["legacy"]:
+        legacy, compact = results["legacy"][metric], results["compact"][metric]
+        table.add_row([metric, f"{legacy:,.1f}", f"{compact:,.1f}", f"{legacy / compact:.2f}x"])
+    print(f"transactions layout benchmark: {rows:,} rows, {accounts:,} accounts")
+    print(table)
+    return results
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
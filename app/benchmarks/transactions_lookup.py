@@ -0,0 +1,58 @@
+"""
+Per-account lookup latency on transactions before and after
+DataTransformer.finalize_transactions (clustering plus account_id index):
+
+    python -m app.benchmarks.transactions_lookup [rows] [accounts]
+"""
+import sys
+
+from prettytable import PrettyTable
+from app.benchmarks.common import best_of
+from app.benchmarks.transactions_layout import build
+from app.transform.transform import DataTransformer
+
+
+def lookup_queries(connection):
+    """Single-account, single-account date range and 1,000-account lookups"""
+    sample = [row[0] for row in connection.execute(
+        "SELECT account_id FROM accounts ORDER BY hash(account_id) LIMIT 1000"
+    ).fetchall()]
+    in_list = ", ".join(str(account_id) for account_id in sample)
+    return {
+        "1 account": f"SELECT * FROM transactions WHERE account_id = {sample[0]}",
+        "1 account, 1 month": f"""
+            SELECT * FROM transactions
+            WHERE account_id = {sample[0]}
+                AND requested_at >= TIMESTAMP '2020-06-01'
+                AND requested_at < TIMESTAMP '2020-07-01'
+        """,
+        "1,000 accounts": f"SELECT * FROM transactions WHERE account_id IN ({in_list})",
+    }
+
+
+def measure(connection, queries):
+    return {
+        name: best_of(lambda: connection.execute(query).arrow()) * 1000
+        for name, query in queries.items()
+    }
+
+
+def run(rows: int = 2_000_000, accounts: int = 100_000):
+    connection = build("compact", rows, accounts)
+    queries = lookup_queries(connection)
+    before = measure(connection, queries)
+    DataTransformer.finalize_transactions(connection)
+    after = measure(connection, queries)
+    connection.close()
+
+    table = PrettyTable()
+    table.field_names = ["Lookup", "Before (ms)", "After (ms)", "Speedup"]
+    for name in queries:
+        table.add_row([name, f"{before[name]:,.2f}", f"{after[name]:,.2f}", f"{before[name] / after[name]:.1f}x"])
+    print(f"transactions lookup benchmark: {rows:,} rows, {accounts:,} accounts")
+    print(table)
+    return before, after
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
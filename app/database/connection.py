@@ -1,11 +1,25 @@
+from typing import Any, Iterator, List, Optional
 import duckdb
+from app.database.results import ARROW, RESULT_FORMATS, ROWS, Results
+
+# Bump whenever the tables or views produced by a build change shape, so that
+# persistent databases written by an older pipeline are rebuilt on next start.
+BUILD_VERSION = 6
+# Rows per batch of a streamed result
+STREAM_BATCH_ROWS = 100_000
 
 
 class DuckDBConnection:
+    BUILD_TABLE = "warehouse_build"
+
     def __init__(self, database_path: str = ":memory:"):
         self.database_path = database_path
         self.connection = None
 
+    @property
+    def persistent(self) -> bool:
+        return self.database_path != ":memory:"
+
     def connect(self):
         if not self.connection:
             self.connection = duckdb.connect(self.database_path)
@@ -15,3 +29,80 @@ class DuckDBConnection:
         if self.connection:
             self.connection.close()
             self.connection = None
+
+    def stream(
+        self,
+        sql: str,
+        params: Optional[List[Any]] = None,
+        batch_rows: int = STREAM_BATCH_ROWS,
+        result_format: str = ROWS
+    ) -> Iterator:
+        """
+        Yields the result of sql in batches of at most batch_rows rows: lists of
+        tuples (rows), pyarrow RecordBatches (arrow) or dicts of NumPy arrays
+        (numpy, typed and masked like Results' numpy format); arrow and numpy
+        require pyarrow. DuckDB produces the next batch only when the consumer
+        asks for it, so memory stays bounded by a batch whatever the size of the
+        result.
+
+        The query runs on a cursor of its own, so the connection stays usable
+        while the stream is consumed; temporary tables and relations registered
+        on the connection are not visible to it.
+        """
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"Unknown result format {result_format}; expected one of {', '.join(RESULT_FORMATS)}")
+        return self._batches(sql, params, batch_rows, result_format)
+
+    def _batches(self, sql, params, batch_rows, result_format):
+        cursor = self.connect().cursor()
+        try:
+            cursor.execute(sql, params)
+            if result_format == ROWS:
+                while True:
+                    batch = cursor.fetchmany(batch_rows)
+                    if not batch:
+                        return
+                    yield batch
+            # to_arrow_reader replaces fetch_record_batch in newer DuckDB releases
+            to_arrow_reader = getattr(cursor, "to_arrow_reader", None) or cursor.fetch_record_batch
+            for batch in to_arrow_reader(batch_rows):
+                if result_format == ARROW:
+                    yield batch
+                else:
+                    yield {
+                        name: Results.numpy_column(column)
+                        for name, column in zip(batch.schema.names, batch.columns)
+                    }
+        finally:
+            # Also runs when the consumer stops early and the generator is closed
+            cursor.close()
+
+    def is_warm(self, inputs_fingerprint: str) -> bool:
+        """True if the database already holds a complete build of these inputs"""
+        if not self.persistent:
+            return False
+        connection = self.connect()
+        exists = connection.execute(
+            "SELECT 1 FROM duckdb_tables() WHERE table_name = ?", [self.BUILD_TABLE]
+        ).fetchone()
+        if not exists:
+            return False
+        build = connection.execute(
+            f"SELECT build_version, inputs_fingerprint FROM {self.BUILD_TABLE}"
+        ).fetchone()
+        return build == (BUILD_VERSION, inputs_fingerprint)
+
+    def invalidate_build(self):
+        """Forgets the current build so an interrupted rebuild is never taken as warm"""
+        self.connect().execute(f"DROP TABLE IF EXISTS {self.BUILD_TABLE}")
+
+    def mark_build_complete(self, inputs_fingerprint: str):
+        connection = self.connect()
+        connection.execute(f"""
+            CREATE OR REPLACE TABLE {self.BUILD_TABLE} AS
+            SELECT
+                {BUILD_VERSION} AS build_version,
+                ? AS inputs_fingerprint,
+                CAST(current_timestamp AS TIMESTAMP) AS built_at
+        """, [inputs_fingerprint])
+        connection.execute("CHECKPOINT")
@@ -0,0 +1,46 @@
+import itertools
+from contextlib import contextmanager
+import numpy
+
+ID_SET_COLUMN = "id"
+
+
+class IdSet:
+    """
+    Sets of BIGINT ids (account_id, customer_id, ...) registered on a connection
+    as a one-column relation, for queries to join against. The SQL stays the
+    same size whatever the number of ids, and DuckDB scans the NumPy array
+    in place instead of parsing a literal list of 500k values.
+    """
+
+    _names = itertools.count(1)
+
+    @staticmethod
+    def to_array(ids) -> numpy.ndarray:
+        """
+        Distinct ids, sorted, as an int64 array, from a list, NumPy array or
+        pyarrow Array / ChunkedArray (nulls dropped). Ids given as strings are
+        converted.
+        """
+        if hasattr(ids, "drop_null"):
+            # pyarrow, recognized without importing the optional package
+            ids = ids.drop_null().to_numpy(zero_copy_only=False)
+        array = numpy.asarray(list(ids) if isinstance(ids, (set, frozenset)) else ids)
+        if array.dtype != numpy.int64:
+            array = array.astype(numpy.int64)
+        return numpy.unique(array.reshape(-1))
+
+    @staticmethod
+    @contextmanager
+    def registered(connection, ids, column: str = ID_SET_COLUMN):
+        """
+        Registers the distinct ids as a relation with a single column and yields
+        its name; the relation is unregistered on exit. Prepared statements must
+        not read it, as they keep the first relation registered under a name.
+        """
+        name = f"id_set_{next(IdSet._names)}"
+        connection.register(name, {column: IdSet.to_array(ids)})
+        try:
+            yield name
+        finally:
+            connection.unregister(name)
@@ -1,53 +1,152 @@
-from typing import Optional, Dict, List
+from dataclasses import dataclass, field
+from typing import Any, Optional, Dict, List, Union
+import numpy
 from app.database.update_dtos import BaseDTO
 
+COMPARISONS = {"=", "<>", "<", "<=", ">", ">="}
+PREDICATE_OPS = COMPARISONS | {"between", "in", "is null", "is not null"}
+
+
+@dataclass
+class BoundQuery:
+    """SQL with $1, $2, ... placeholders and the values bound to them, in order"""
+    sql: str
+    params: List[Any] = field(default_factory=list)
+
+    def bind(self, value: Any) -> str:
+        """Appends a value to bind and returns its placeholder"""
+        self.params.append(value)
+        return f"${len(self.params)}"
+
+
+@dataclass
+class Predicate:
+    """
+    column <op> value, with the value bound. column may also be an aggregate
+    expression or alias in HAVING. 'between' takes a (low, high) pair, both
+    inclusive; 'in' takes any sequence or NumPy array, including one or no items,
+    bound as one list so every length shares a statement.
+    """
+    column: str
+    op: str = "="
+    value: Any = None
+
+    def __post_init__(self):
+        if self.op not in PREDICATE_OPS:
+            raise ValueError(f"Unknown predicate operator {self.op}; expected one of {', '.join(sorted(PREDICATE_OPS))}")
+
+    def render(self, query: BoundQuery) -> str:
+        # A bare column compared with constants, so DuckDB can push the
+        # predicate into the scan and skip row groups by their min/max
+        if self.op in COMPARISONS:
+            return f"{self.column} {self.op} {query.bind(self.value)}"
+        if self.op == "between":
+            low, high = self.value
+            return f"{self.column} BETWEEN {query.bind(low)} AND {query.bind(high)}"
+        if self.op == "in":
+            values = self.value.tolist() if isinstance(self.value, numpy.ndarray) else list(self.value)
+            placeholder = query.bind(values)
+            # The IN runs as a semi-join, which older DuckDB releases cannot push
+            # into the scan; the range of the values is a plain comparison that
+            # DuckDB folds to constants and uses to skip row groups by min/max
+            return (
+                f"({self.column} BETWEEN list_min({placeholder}) AND list_max({placeholder}) "
+                f"AND {self.column} IN (SELECT UNNEST({placeholder})))"
+            )
+        return f"{self.column} {self.op.upper()}"
+
+
+@dataclass
+class SelectQuery:
+    """
+    A SELECT as data: the projection (columns plus alias -> aggregate
+    expression), predicates, grouping, HAVING, ordering and limit. Only the
+    projected columns are read. Conditions given as strings are trusted SQL.
+    """
+    table: str
+    columns: List[str] = field(default_factory=list)
+    aggregates: Dict[str, str] = field(default_factory=dict)
+    joins: List[str] = field(default_factory=list)
+    where: List[Union[Predicate, str]] = field(default_factory=list)
+    group_by: List[str] = field(default_factory=list)
+    having: List[Union[Predicate, str]] = field(default_factory=list)
+    order_by: List[str] = field(default_factory=list)  # "column" or "column DESC"
+    limit: Optional[int] = None
+
+    def render(self) -> BoundQuery:
+        query = BoundQuery("")
+        projection = self.columns + [f"{expr} AS {alias}" for alias, expr in self.aggregates.items()]
+        parts = [f"SELECT {', '.join(projection) or '*'}", f"FROM {self.table}"] + self.joins
+        if self.where:
+            parts.append("WHERE " + " AND ".join(SelectQuery._condition(c, query) for c in self.where))
+        if self.group_by:
+            parts.append("GROUP BY " + ", ".join(self.group_by))
+        if self.having:
+            parts.append("HAVING " + " AND ".join(SelectQuery._condition(c, query) for c in self.having))
+        if self.order_by:
+            parts.append("ORDER BY " + ", ".join(self.order_by))
+        if self.limit is not None:
+            parts.append(f"LIMIT {query.bind(int(self.limit))}")
+        query.sql = " ".join(parts)
+        return query
+
+    @staticmethod
+    def _condition(condition: Union[Predicate, str], query: BoundQuery) -> str:
+        return condition.render(query) if isinstance(condition, Predicate) else f"({condition})"
+
+
 class QueryBuilder:
     @staticmethod
     def select(
         dto: BaseDTO,
-        filters: Optional[Dict[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
         joins: Optional[List[str]] = None,
         aggregates: Optional[Dict[str, str]] = None,
-        limit: Optional[int] = None
-    ) -> str:
+        limit: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        where: Optional[List[Union[Predicate, str]]] = None,
+        order_by: Optional[List[str]] = None
+    ) -> BoundQuery:
         """
-        Final stabilized SELECT query builder
+        Parameterized SELECT over a DTO's table, built as a SelectQuery: values are
+        bound, never pasted into the SQL, so queries differing only in values share
+        one prepared statement in PreparedStatementCache.
+        - filters: column -> value equality; a list, tuple, set or NumPy array value
+          means IN (any length, including one) and None means IS NULL
+        - where: further Predicates, e.g. Predicate("requested_at", "between", (a, b))
+        - columns: the columns to read, by default all the DTO's; with aggregates
+          only the GROUP BY columns are projected next to them
+        - aggregates: alias -> expression, plus the "GROUP BY", "HAVING" and
+          "ORDER BY" keys holding SQL
         """
-        # Initialize core components
-        base = f"SELECT {', '.join(dto.columns)} FROM {dto.table_name}"
-        where_clauses = []
-        group_by = None
-
-        # 1. Process JOINs
-        if joins:
-            base += " " + " ".join(joins)
-
-        # 2. Handle WHERE clauses
-        if filters:
-            where_clauses = [f"{k} = {v}" for k, v in filters.items()]
-        if where_clauses:  # Explicit check for content
-            base += " WHERE " + " AND ".join(where_clauses)
-
-        # 3. Manage aggregates
-        if aggregates:
-            agg_columns = []
-            for alias, expr in aggregates.items():
-                if alias == "GROUP BY":
-                    group_by = expr
-                elif alias not in ["HAVING", "ORDER BY"]:
-                    agg_columns.append(f"{expr} AS {alias}")
-            
-            if agg_columns:
-                base = base.replace(', '.join(dto.columns), ', '.join(agg_columns))
-            
-            if group_by:
-                base += f" GROUP BY {group_by}"
+        aggregates = dict(aggregates or {})
+        group_by = aggregates.pop("GROUP BY", None)
+        having = aggregates.pop("HAVING", None)
+        legacy_order = aggregates.pop("ORDER BY", None)
 
-        # 4. Apply LIMIT
-        if limit:
-            base += f" LIMIT {limit}"
+        predicates = []
+        for column, value in (filters or {}).items():
+            if value is None:
+                predicates.append(Predicate(column, "is null"))
+            elif isinstance(value, (list, tuple, set, numpy.ndarray)):
+                predicates.append(Predicate(column, "in", value))
+            else:
+                predicates.append(Predicate(column, "=", value))
 
-        return base + ";"
+        group_columns = [column.strip() for column in group_by.split(",")] if group_by else []
+        if columns is None:
+            columns = group_columns if aggregates else list(dto.columns)
+        return SelectQuery(
+            table=dto.table_name,
+            columns=list(columns),
+            aggregates=aggregates,
+            joins=list(joins or []),
+            where=predicates + list(where or []),
+            group_by=group_columns,
+            having=[having] if having else [],
+            order_by=list(order_by or []) + ([legacy_order] if legacy_order else []),
+            limit=limit,
+        ).render()
 
     # Keep other methods unchanged
     @staticmethod
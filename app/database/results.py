@@ -0,0 +1,86 @@
+from typing import Any, List, Optional, Tuple
+import numpy
+
+ROWS = "rows"
+NUMPY = "numpy"
+ARROW = "arrow"
+RESULT_FORMATS = [ROWS, NUMPY, ARROW]
+POSITION = "_result_position"
+
+
+class Results:
+    """
+    Query results in one of RESULT_FORMATS:
+    - rows: a list of tuples (fetchall), one Python object per value
+    - numpy: a dict of column name -> NumPy array (masked where NULL), built by
+      DuckDB without creating Python objects per row; DECIMAL columns become
+      float64 and ENUM columns VARCHAR (object arrays)
+    - arrow: a pyarrow Table (requires the optional pyarrow package)
+    """
+
+    @staticmethod
+    def query(connection, sql: str, params: Optional[List[Any]] = None, result_format: str = ROWS):
+        """Runs sql with its params and fetches the whole result in result_format"""
+        if result_format not in RESULT_FORMATS:
+            raise ValueError(f"Unknown result format {result_format}; expected one of {', '.join(RESULT_FORMATS)}")
+        if result_format == NUMPY:
+            # DuckDB hands ENUM columns to NumPy as pandas Categoricals, and
+            # pandas is not a dependency. The rows are numbered as they leave sql
+            # and sorted on that number again, so the cast keeps sql's ORDER BY
+            columns = connection.execute(f"DESCRIBE {sql}", params).fetchall()
+            if any(column_type.startswith("ENUM") for _, column_type, *_ in columns):
+                sql = "SELECT " + ", ".join(
+                    f'CAST("{name}" AS VARCHAR) AS "{name}"' if column_type.startswith("ENUM") else f'"{name}"'
+                    for name, column_type, *_ in columns
+                ) + f" FROM (SELECT *, row_number() OVER () AS {POSITION} FROM ({sql})) ORDER BY {POSITION}"
+            return connection.execute(sql, params).fetchnumpy()
+        cursor = connection.execute(sql, params)
+        if result_format == ARROW:
+            # to_arrow_table replaces fetch_arrow_table in newer DuckDB releases
+            to_arrow_table = getattr(cursor, "to_arrow_table", None) or cursor.fetch_arrow_table
+            return to_arrow_table()
+        return cursor.fetchall()
+
+    @staticmethod
+    def numpy_column(array) -> numpy.ndarray:
+        """
+        A pyarrow Array as the NumPy array the numpy format gives its column:
+        DECIMAL as float64, ENUM as VARCHAR, DATE as datetime64[us], and masked
+        where NULL with the dtype it has without NULLs (a BIGINT column with NULLs
+        stays int64 rather than becoming float64).
+        """
+        import pyarrow
+
+        if pyarrow.types.is_decimal(array.type):
+            array = array.cast(pyarrow.float64())
+        elif pyarrow.types.is_dictionary(array.type):
+            array = array.dictionary_decode()
+        elif pyarrow.types.is_date(array.type):
+            array = array.cast(pyarrow.timestamp("us"))
+        if array.null_count == 0:
+            return array.to_numpy(zero_copy_only=False)
+        mask = array.is_null().to_numpy(zero_copy_only=False)
+        if pyarrow.types.is_integer(array.type) or pyarrow.types.is_floating(array.type):
+            array = array.fill_null(pyarrow.scalar(0, array.type))
+        elif pyarrow.types.is_boolean(array.type):
+            array = array.fill_null(False)
+        return numpy.ma.MaskedArray(array.to_numpy(zero_copy_only=False), mask=mask)
+
+    @staticmethod
+    def num_rows(result) -> int:
+        if isinstance(result, dict):
+            return len(next(iter(result.values()), []))
+        if hasattr(result, "num_rows"):
+            return result.num_rows
+        return len(result)
+
+    @staticmethod
+    def rows(result, limit: Optional[int] = None) -> List[Tuple[Any, ...]]:
+        """The first limit rows of a result in any format as tuples of Python values, for display"""
+        if isinstance(result, dict):
+            columns = [column[:limit].tolist() for column in result.values()]
+        elif hasattr(result, "num_rows"):
+            columns = list(result.slice(0, limit).to_pydict().values())
+        else:
+            return list(result[:limit])
+        return list(zip(*columns))
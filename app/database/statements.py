@@ -0,0 +1,89 @@
+import itertools
+import math
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Union
+import numpy
+from app.database.queries import BoundQuery
+
+
+def sql_literal(value: Any) -> str:
+    """Renders a bound value as a typed SQL constant for EXECUTE"""
+    if isinstance(value, (numpy.integer, numpy.floating, numpy.bool_, numpy.ndarray)):
+        # e.g. ids taken from a NumPy result column; arrays become lists
+        value = value.tolist()
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else f"'{value}'::DOUBLE"
+    if isinstance(value, Decimal):
+        return f"{value}" if value.is_finite() else f"'{value}'::DOUBLE"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, datetime):
+        return f"TIMESTAMP '{value.isoformat(sep=' ')}'"
+    if isinstance(value, date):
+        return f"DATE '{value.isoformat()}'"
+    if isinstance(value, (list, tuple, set)):
+        return "[" + ", ".join(sql_literal(item) for item in value) + "]"
+    raise TypeError(f"Cannot bind a value of type {type(value).__name__}")
+
+
+class PreparedStatementCache:
+    """
+    Prepared statements of one connection, keyed by the SQL shape ($n
+    placeholders, no values). The first execution of a shape PREPAREs it; later
+    ones only EXECUTE it with their values, skipping parsing and planning. The
+    least recently used statement is deallocated beyond max_statements.
+
+    Values are not bound on EXECUTE: DuckDB rejects parameters there, and binding
+    them through the Python API would prepare the statement again on every call.
+    They are rendered into the EXECUTE text instead, as typed constants
+    (sql_literal): strings are quoted with embedded quotes doubled, and values of
+    any other type raise TypeError rather than being pasted as text.
+    """
+
+    def __init__(self, connection, max_statements: int = 128):
+        self.connection = connection
+        self.max_statements = max_statements
+        self.hits = 0
+        self.misses = 0
+        self._names: "OrderedDict[str, str]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def execute(self, query: Union[BoundQuery, str], params: Optional[List[Any]] = None):
+        """Executes a BoundQuery, or SQL with $n placeholders and its params; returns the cursor"""
+        if isinstance(query, BoundQuery):
+            query, params = query.sql, query.params
+        name = self._prepare(query.strip().rstrip(";"))
+        args = ", ".join(sql_literal(value) for value in params or [])
+        return self.connection.execute(f"EXECUTE {name}({args})" if args else f"EXECUTE {name}")
+
+    def clear(self):
+        for name in self._names.values():
+            self.connection.execute(f"DEALLOCATE {name}")
+        self._names.clear()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _prepare(self, sql: str) -> str:
+        name = self._names.get(sql)
+        if name is not None:
+            self.hits += 1
+            self._names.move_to_end(sql)
+            return name
+
+        self.misses += 1
+        name = f"cached_statement_{next(self._ids)}"
+        self.connection.execute(f"PREPARE {name} AS {sql}")
+        self._names[sql] = name
+        if len(self._names) > self.max_statements:
+            _, evicted = self._names.popitem(last=False)
+            self.connection.execute(f"DEALLOCATE {evicted}")
+        return name
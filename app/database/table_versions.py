@@ -0,0 +1,41 @@
+from typing import Optional
+
+TABLE_VERSIONS = "table_versions"
+
+
+class TableVersions:
+    """
+    A change counter per base table, bumped in the same transaction by every
+    pipeline step that writes the table (DataLoader, DataTransformer). Row counts
+    miss in-place changes such as the transform's upserts; a version does not.
+    Code changing a table outside those steps calls bump itself.
+    """
+
+    @staticmethod
+    def ensure_table(connection):
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TABLE_VERSIONS} (
+                table_name VARCHAR PRIMARY KEY,
+                version BIGINT,
+                changed_at TIMESTAMP
+            )
+        """)
+
+    @staticmethod
+    def bump(connection, table_name: str):
+        TableVersions.ensure_table(connection)
+        connection.execute(f"""
+            INSERT INTO {TABLE_VERSIONS}
+            VALUES (?, 1, CAST(current_timestamp AS TIMESTAMP))
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = version + 1, changed_at = excluded.changed_at
+        """, [table_name])
+
+    @staticmethod
+    def current(connection, table_name: str) -> Optional[int]:
+        """The table's version, or None if no pipeline step has written it"""
+        TableVersions.ensure_table(connection)
+        row = connection.execute(
+            f"SELECT version FROM {TABLE_VERSIONS} WHERE table_name = ?", [table_name]
+        ).fetchone()
+        return row[0] if row else None
@@ -1,11 +1,71 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, List
+
+# DuckDB type name -> pyarrow type factory name
+ARROW_TYPES = {
+    "BIGINT": "int64",
+    "INTEGER": "int32",
+    "DOUBLE": "float64",
+    "FLOAT": "float32",
+    "VARCHAR": "string",
+    "BOOLEAN": "bool_",
+    "DATE": "date32",
+}
+
+TRANSACTION_TYPE_ENUM = "ENUM('transfer_in', 'transfer_out', 'pix_in', 'pix_out')"
+TRANSACTION_STATUS_ENUM = "ENUM('pending', 'completed', 'failed')"
 
 @dataclass
 class BaseDTO:
     """Base class for all Data Transfer Objects"""
     table_name: str
     columns: List[str] = field(default_factory=list)
+    types: Dict[str, str] = field(default_factory=dict)  # DuckDB type per column, VARCHAR if absent
+    required: List[str] = field(default_factory=list)  # Columns declared NOT NULL
+    primary_key: List[str] = field(default_factory=list)
+    null_value: str = ""  # Token the source CSVs use for NULL
+
+    def column_type(self, column: str) -> str:
+        return self.types.get(column, "VARCHAR")
+
+    def is_nullable(self, column: str) -> bool:
+        return column not in self.required
+
+    def csv_columns(self, header: List[str]) -> str:
+        """read_csv COLUMNS struct in file header order; unknown columns stay VARCHAR"""
+        specs = ", ".join(f"'{name}': '{self.column_type(name)}'" for name in header)
+        return "{" + specs + "}"
+
+    def ddl(self, table_name: str = None, replace: bool = False) -> str:
+        """CREATE TABLE statement with the declared types, nullability and key"""
+        definitions = [
+            f"{name} {self.column_type(name)}" + ("" if self.is_nullable(name) else " NOT NULL")
+            for name in self.columns
+        ]
+        if self.primary_key:
+            definitions.append(f"PRIMARY KEY ({', '.join(self.primary_key)})")
+        body = ",\n    ".join(definitions)
+        create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+        return f"{create} {table_name or self.table_name} (\n    {body}\n)"
+
+    def arrow_schema(self):
+        """Equivalent pyarrow schema (requires the optional pyarrow package)"""
+        import pyarrow as pa
+
+        def arrow_type(sql_type: str):
+            if sql_type == "TIMESTAMP":
+                return pa.timestamp("us")
+            if sql_type.startswith("ENUM"):
+                return pa.dictionary(pa.uint8(), pa.string())
+            if sql_type.startswith("DECIMAL"):
+                precision, scale = sql_type[sql_type.index("(") + 1:-1].split(",")
+                return pa.decimal128(int(precision), int(scale))
+            return getattr(pa, ARROW_TYPES.get(sql_type, "string"))()
+
+        return pa.schema([
+            pa.field(name, arrow_type(self.column_type(name)), nullable=self.is_nullable(name))
+            for name in self.columns
+        ])
 
 # Core Domain Entities
 @dataclass
@@ -13,12 +73,18 @@ class CustomerDTO(BaseDTO):
     table_name: str = "customers"
     columns: List[str] = field(default_factory=lambda: [
         "customer_id",
-        "first_name", 
+        "first_name",
         "last_name",
         "customer_city",  # References city.city_id
-        "cpf", 
+        "cpf",
         "country_name" # Must match CSV header exactly
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "customer_id": "BIGINT",
+        "customer_city": "BIGINT",
+        "cpf": "BIGINT",
+    })
+    required: List[str] = field(default_factory=lambda: ["customer_id"])
 
 @dataclass
 class AccountDTO(BaseDTO):
@@ -32,32 +98,43 @@ class AccountDTO(BaseDTO):
         "account_check_digit",
         "account_number"
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "account_id": "BIGINT",
+        "customer_id": "BIGINT",
+        "created_at": "TIMESTAMP",
+        "account_branch": "INTEGER",
+        "account_check_digit": "INTEGER",
+        "account_number": "INTEGER",
+    })
+    required: List[str] = field(default_factory=lambda: ["account_id", "customer_id"])
 
 # Financial Transactions
 @dataclass
 class TransactionDTO(BaseDTO):
     table_name: str = "transactions"
     columns: List[str] = field(default_factory=lambda: [
-        "transaction_id", 
-        "account_id",      
+        "transaction_id",
+        "account_id",
         "amount",
         "transaction_type",
         "requested_at",
         "completed_at",
         "status"
     ])
+    # Compact layout: 64-bit keys, dictionary-encoded enums and exact cents
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "transaction_id": "BIGINT",  # id of the row in its legacy source table
+        "account_id": "BIGINT",
+        "amount": "DECIMAL(18,2)",
+        "transaction_type": TRANSACTION_TYPE_ENUM,
+        "requested_at": "TIMESTAMP",
+        "completed_at": "TIMESTAMP",
+        "status": TRANSACTION_STATUS_ENUM,
+    })
+    required: List[str] = field(default_factory=lambda: ["transaction_id", "account_id", "transaction_type"])
+    # Legacy ids are only unique within their source, and the type identifies the source
+    primary_key: List[str] = field(default_factory=lambda: ["transaction_id", "transaction_type"])
 
-@dataclass 
-class TransferInDTO(BaseDTO):
-    table_name: str = "transfer_ins"
-    columns: List[str] = field(default_factory=lambda: [
-        "id",            # BIGINT (original type)
-        "account_id",  
-        "amount",
-        "transaction_requested_at",
-        "transaction_completed_at",
-        "status"
-    ])
 # Geographic Hierarchy
 @dataclass
 class CountryDTO(BaseDTO):
@@ -66,6 +143,8 @@ class CountryDTO(BaseDTO):
         "country_id",
         "country"
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {"country_id": "BIGINT"})
+    required: List[str] = field(default_factory=lambda: ["country_id"])
 
 @dataclass
 class StateDTO(BaseDTO):
@@ -75,6 +154,11 @@ class StateDTO(BaseDTO):
         "state",
         "country_id"
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "state_id": "BIGINT",
+        "country_id": "BIGINT",
+    })
+    required: List[str] = field(default_factory=lambda: ["state_id"])
 
 @dataclass
 class CityDTO(BaseDTO):
@@ -84,6 +168,11 @@ class CityDTO(BaseDTO):
         "city",
         "state_id"
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "city_id": "BIGINT",
+        "state_id": "BIGINT",
+    })
+    required: List[str] = field(default_factory=lambda: ["city_id"])
 
 # Time Dimensions
 @dataclass
@@ -97,6 +186,51 @@ class TimeDimensionDTO(BaseDTO):
         "year_id",
         "weekday_id"
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "time_id": "BIGINT",
+        "action_timestamp": "TIMESTAMP",
+        "week_id": "BIGINT",
+        "month_id": "BIGINT",
+        "year_id": "BIGINT",
+        "weekday_id": "BIGINT",
+    })
+    required: List[str] = field(default_factory=lambda: ["time_id"])
+
+@dataclass
+class WeekDTO(BaseDTO):
+    table_name: str = "d_week"
+    columns: List[str] = field(default_factory=lambda: ["week_id", "action_week"])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "week_id": "BIGINT",
+        "action_week": "INTEGER",
+    })
+
+@dataclass
+class MonthDTO(BaseDTO):
+    table_name: str = "d_month"
+    columns: List[str] = field(default_factory=lambda: ["month_id", "action_month"])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "month_id": "BIGINT",
+        "action_month": "INTEGER",
+    })
+
+@dataclass
+class YearDTO(BaseDTO):
+    table_name: str = "d_year"
+    columns: List[str] = field(default_factory=lambda: ["year_id", "action_year"])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "year_id": "BIGINT",
+        "action_year": "INTEGER",
+    })
+
+@dataclass
+class WeekdayDTO(BaseDTO):
+    table_name: str = "d_weekday"
+    columns: List[str] = field(default_factory=lambda: ["weekday_id", "action_weekday"])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "weekday_id": "BIGINT",
+        "action_weekday": "INTEGER",
+    })
 
 # Legacy Transaction Types
 @dataclass
@@ -106,10 +240,19 @@ class TransferInDTO(BaseDTO):
         "id",
         "account_id",
         "amount",
-        "transaction_requested_at",
-        "transaction_completed_at",
+        "transaction_requested_at",  # References d_time.time_id
+        "transaction_completed_at",  # References d_time.time_id
         "status"
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "id": "BIGINT",
+        "account_id": "BIGINT",
+        "amount": "DOUBLE",
+        "transaction_requested_at": "BIGINT",
+        "transaction_completed_at": "BIGINT",
+    })
+    required: List[str] = field(default_factory=lambda: ["id", "account_id"])
+    null_value: str = "None"
 
 @dataclass
 class TransferOutDTO(BaseDTO):
@@ -122,6 +265,15 @@ class TransferOutDTO(BaseDTO):
         "transaction_completed_at",
         "status"
     ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "id": "BIGINT",
+        "account_id": "BIGINT",
+        "amount": "DOUBLE",
+        "transaction_requested_at": "BIGINT",
+        "transaction_completed_at": "BIGINT",
+    })
+    required: List[str] = field(default_factory=lambda: ["id", "account_id"])
+    null_value: str = "None"
 
 @dataclass
 class PixMovementDTO(BaseDTO):
@@ -134,4 +286,22 @@ class PixMovementDTO(BaseDTO):
         "pix_requested_at",
         "pix_completed_at",
         "status"
-    ])
\ No newline at end of file
+    ])
+    types: Dict[str, str] = field(default_factory=lambda: {
+        "id": "BIGINT",
+        "account_id": "BIGINT",
+        "pix_amount": "DOUBLE",
+        "pix_requested_at": "BIGINT",
+        "pix_completed_at": "BIGINT",
+    })
+    required: List[str] = field(default_factory=lambda: ["id", "account_id"])
+    null_value: str = "None"
+
+# Raw CSV folders with a known schema, keyed by table (folder) name
+SOURCE_DTOS: Dict[str, BaseDTO] = {
+    dto.table_name: dto for dto in (
+        CustomerDTO(), AccountDTO(), CountryDTO(), StateDTO(), CityDTO(),
+        TimeDimensionDTO(), WeekDTO(), MonthDTO(), YearDTO(), WeekdayDTO(),
+        TransferInDTO(), TransferOutDTO(), PixMovementDTO(),
+    )
+}
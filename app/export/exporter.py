@@ -0,0 +1,27 @@
+from typing import Any, List, Optional
+
+
+class Exporter:
+    """
+    Writes query results (a whole table or view, or any SELECT) to files with
+    DuckDB's COPY, which formats and writes the rows itself, chunk by chunk,
+    without holding the result in memory or creating a Python object per value.
+    Consumers processing the rows in Python use DuckDBConnection.stream instead.
+    """
+
+    @staticmethod
+    def to_csv(db, sql: str, path: str, params: Optional[List[Any]] = None) -> int:
+        """Writes the result of sql to a CSV file with a header row; returns the rows written"""
+        return Exporter._copy(db, sql, path, "FORMAT csv, HEADER", params)
+
+    @staticmethod
+    def to_parquet(db, sql: str, path: str, params: Optional[List[Any]] = None) -> int:
+        """Writes the result of sql to a zstd-compressed Parquet file; returns the rows written"""
+        return Exporter._copy(db, sql, path, "FORMAT parquet, COMPRESSION zstd", params)
+
+    @staticmethod
+    def _copy(db, sql: str, path: str, options: str, params: Optional[List[Any]]) -> int:
+        target = path.replace("'", "''")
+        rows = db.connect().execute(f"COPY ({sql}) TO '{target}' ({options})", params).fetchone()[0]
+        print(f"✓ Exported {rows:,} rows to {path}")
+        return rows
@@ -0,0 +1,222 @@
+import csv
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from app.database.table_versions import TableVersions
+from app.database.update_dtos import SOURCE_DTOS
+from app.ingestion.manifest import IngestionManifest
+from app.ingestion.parquet_cache import ParquetCache
+
+
+@dataclass
+class TableLoadStats:
+    """Outcome of loading one table"""
+    table_name: str
+    files: List[str] = field(default_factory=list)
+    rows: int = 0
+    seconds: float = 0.0
+    mode: str = "reload"
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+class DataLoader:
+    @staticmethod
+    def discover_tables(csv_folder: str) -> Dict[str, List[str]]:
+        """Groups every CSV part file under csv_folder by its folder (table) name"""
+        tables: Dict[str, List[str]] = {}
+        for root, _, files in os.walk(csv_folder):
+            parts = sorted(f for f in files if f.endswith(".csv"))
+            if parts:
+                table_name = os.path.basename(root)  # Use folder name as the table name
+                tables.setdefault(table_name, []).extend(
+                    os.path.join(root, f) for f in parts
+                )
+        return tables
+
+    @staticmethod
+    def inputs_fingerprint(csv_folder: str) -> str:
+        """Cheap digest of every part file's path, size and mtime under csv_folder"""
+        digest = hashlib.blake2b(digest_size=20)
+        for table_name, files in sorted(DataLoader.discover_tables(csv_folder).items()):
+            for path in files:
+                stat = os.stat(path)
+                relative = os.path.relpath(path, csv_folder)
+                digest.update(f"{table_name}|{relative}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def load_tables(
+        connection,
+        csv_folder: str,
+        parallel: bool = True,
+        max_workers: Optional[int] = None,
+        incremental: bool = False,
+        parquet_cache_dir: Optional[str] = None
+    ) -> List[TableLoadStats]:
+        """
+        Loads every table found under csv_folder with a single scan over all of its
+        part files. Independent tables are loaded concurrently, each on its own cursor.
+        In incremental mode only part files missing from the ingestion manifest are
+        appended; unchanged tables are skipped. With parquet_cache_dir, parts are
+        read from their cached Parquet copies instead of being parsed again.
+        """
+        tables = DataLoader.discover_tables(csv_folder)
+        if not tables:
+            print(f"ⓘ No CSV files found under {csv_folder}")
+            return []
+
+        IngestionManifest.ensure_table(connection)
+        TableVersions.ensure_table(connection)
+
+        started = time.perf_counter()
+        results = []
+        if parallel and len(tables) > 1:
+            workers = max_workers or min(len(tables), os.cpu_count() or 1)
+            cursors = [connection.cursor() for _ in tables]
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(
+                            DataLoader._load_table,
+                            cursor, table, files, incremental, parquet_cache_dir
+                        )
+                        for cursor, (table, files) in zip(cursors, tables.items())
+                    ]
+                    for future in as_completed(futures):
+                        results.append(future.result())
+            finally:
+                for cursor in cursors:
+                    cursor.close()
+        else:
+            for table, files in tables.items():
+                results.append(DataLoader._load_table(
+                    connection, table, files, incremental, parquet_cache_dir
+                ))
+
+        DataLoader._report(results, time.perf_counter() - started)
+        return results
+
+    @staticmethod
+    def _load_table(
+        cursor,
+        table_name: str,
+        files: List[str],
+        incremental: bool,
+        parquet_cache_dir: Optional[str]
+    ) -> TableLoadStats:
+        """Brings table_name up to date with its part files in one transaction"""
+        started = time.perf_counter()
+        table_exists = DataLoader._table_exists(cursor, table_name)
+        if parquet_cache_dir:
+            ParquetCache.prune(parquet_cache_dir, table_name, files)
+
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            if incremental:
+                plan = IngestionManifest.plan(cursor, table_name, files, table_exists)
+                mode, to_load = plan.mode, plan.files
+            else:
+                mode, to_load = "reload", files
+
+            rows = 0
+            if to_load:
+                scan = DataLoader._scan(cursor, table_name, to_load, parquet_cache_dir)
+            if mode == "reload":
+                cursor.execute(f"""
+                    CREATE OR REPLACE TABLE {table_name} AS
+                    SELECT * FROM {scan}
+                """)
+                rows = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            elif mode == "append":
+                columns = ", ".join(
+                    row[0] for row in cursor.execute(f"DESCRIBE {table_name}").fetchall()
+                )
+                rows = cursor.execute(f"""
+                    INSERT INTO {table_name}
+                    SELECT {columns} FROM {scan}
+                """).fetchone()[0]
+
+            if mode != "skip":
+                TableVersions.bump(cursor, table_name)
+            if incremental:
+                IngestionManifest.record(cursor, table_name, plan.states)
+            else:
+                IngestionManifest.forget(cursor, table_name)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+        stats = TableLoadStats(table_name, to_load, rows, time.perf_counter() - started, mode)
+        if mode == "skip":
+            print(f"ⓘ {table_name} is up to date ({len(files)} file(s) unchanged)")
+        elif mode == "append":
+            print(f"✓ Appended {rows} rows to {table_name} from {len(to_load)} new file(s)")
+        else:
+            print(f"✓ Loaded {table_name}: {rows} rows from {len(to_load)} file(s)")
+        return stats
+
+    @staticmethod
+    def _scan(cursor, table_name: str, files: List[str], parquet_cache_dir: Optional[str]) -> str:
+        """Table function reading all given part files at once"""
+        def csv_scan(parts: List[str]) -> str:
+            return DataLoader.csv_scan(table_name, parts)
+
+        if parquet_cache_dir:
+            cached = ParquetCache.resolve(cursor, parquet_cache_dir, table_name, files, csv_scan)
+            return f"read_parquet({DataLoader._sql_list(cached)}, UNION_BY_NAME=TRUE)"
+        return csv_scan(files)
+
+    @staticmethod
+    def csv_scan(table_name: str, files: List[str]) -> str:
+        """
+        read_csv call for the part files of table_name. Tables with a DTO are read
+        with explicit column types and no sniffing; others fall back to AUTO_DETECT.
+        """
+        dto = SOURCE_DTOS.get(table_name)
+        if dto is None:
+            return f"read_csv({DataLoader._sql_list(files)}, AUTO_DETECT=TRUE, UNION_BY_NAME=TRUE)"
+
+        null_value = dto.null_value.replace("'", "''")
+        return (
+            f"read_csv({DataLoader._sql_list(files)}, AUTO_DETECT=FALSE, HEADER=TRUE, "
+            f"DELIM=',', QUOTE='\"', NULLSTR='{null_value}', "
+            f"COLUMNS={dto.csv_columns(DataLoader._read_header(files[0]))})"
+        )
+
+    @staticmethod
+    def _read_header(csv_path: str) -> List[str]:
+        """Column names of a part file; Spark writes the same header to every part"""
+        with open(csv_path, newline="", encoding="utf-8") as handle:
+            return next(csv.reader(handle), [])
+
+    @staticmethod
+    def _table_exists(cursor, table_name: str) -> bool:
+        return cursor.execute(
+            "SELECT 1 FROM duckdb_tables() WHERE table_name = ?", [table_name]
+        ).fetchone() is not None
+
+    @staticmethod
+    def _sql_list(files: List[str]) -> str:
+        """Renders file paths as a DuckDB list literal"""
+        quoted = ", ".join("'" + path.replace("'", "''") + "'" for path in files)
+        return f"[{quoted}]"
+
+    @staticmethod
+    def _report(results: List[TableLoadStats], wall_seconds: float):
+        """Prints per-table throughput, slowest first"""
+        print("\nIngestion report:")
+        for stats in sorted(results, key=lambda s: s.seconds, reverse=True):
+            print(
+                f"  {stats.table_name:<16} {stats.mode:<7} {stats.rows:>10} rows "
+                f"{stats.seconds:>8.3f}s {stats.rows_per_second:>14,.0f} rows/s"
+            )
+        total_rows = sum(s.rows for s in results)
+        rate = total_rows / wall_seconds if wall_seconds > 0 else 0.0
+        print(f"  {'TOTAL':<16} {'':<7} {total_rows:>10} rows {wall_seconds:>8.3f}s {rate:>14,.0f} rows/s")
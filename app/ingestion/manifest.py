@@ -0,0 +1,115 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class FileState:
+    """Size, modification time and content hash of one loaded part file"""
+    file_path: str
+    table_name: str
+    size_bytes: int
+    mtime: float
+    content_hash: Optional[str] = None
+
+
+@dataclass
+class LoadPlan:
+    """What the loader has to do to bring one table up to date"""
+    mode: str  # "skip", "append" or "reload"
+    files: List[str]
+    states: List[FileState]
+
+
+class IngestionManifest:
+    """
+    Persists the state of every loaded part file in the database itself, so the
+    manifest and the tables it describes are always committed together.
+    """
+    TABLE_NAME = "ingestion_manifest"
+
+    @staticmethod
+    def ensure_table(connection):
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {IngestionManifest.TABLE_NAME} (
+                file_path VARCHAR PRIMARY KEY,
+                table_name VARCHAR,
+                size_bytes BIGINT,
+                mtime DOUBLE,
+                content_hash VARCHAR,
+                loaded_at TIMESTAMP
+            )
+        """)
+
+    @staticmethod
+    def entries(connection, table_name: str) -> Dict[str, FileState]:
+        """Manifest rows recorded for table_name, keyed by file path"""
+        rows = connection.execute(f"""
+            SELECT file_path, table_name, size_bytes, mtime, content_hash
+            FROM {IngestionManifest.TABLE_NAME}
+            WHERE table_name = ?
+        """, [table_name]).fetchall()
+        return {row[0]: FileState(*row) for row in rows}
+
+    @staticmethod
+    def content_hash(file_path: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def plan(connection, table_name: str, files: List[str], table_exists: bool) -> LoadPlan:
+        """
+        Compares the part files on disk with the manifest. Files whose size and
+        mtime are unchanged are trusted without hashing; anything else is hashed.
+        New files are appended, while a rewritten or deleted part forces a reload
+        because its old rows cannot be told apart from the rest of the table.
+        """
+        recorded = IngestionManifest.entries(connection, table_name) if table_exists else {}
+        states, new_files = [], []
+        reload = not recorded or bool(set(recorded) - set(files))
+
+        for path in files:
+            stat = os.stat(path)
+            previous = recorded.get(path)
+            if previous and previous.size_bytes == stat.st_size and previous.mtime == stat.st_mtime:
+                states.append(previous)
+                continue
+
+            state = FileState(path, table_name, stat.st_size, stat.st_mtime,
+                              IngestionManifest.content_hash(path))
+            states.append(state)
+            if previous is None:
+                new_files.append(path)
+            elif previous.content_hash != state.content_hash:
+                reload = True
+
+        if reload:
+            return LoadPlan("reload", list(files), states)
+        if new_files:
+            return LoadPlan("append", new_files, states)
+        return LoadPlan("skip", [], states)
+
+    @staticmethod
+    def record(connection, table_name: str, states: List[FileState]):
+        """Replaces the manifest rows of table_name with states"""
+        IngestionManifest.forget(connection, table_name)
+        connection.executemany(f"""
+            INSERT INTO {IngestionManifest.TABLE_NAME}
+            VALUES (?, ?, ?, ?, ?, current_timestamp)
+        """, [
+            (s.file_path, s.table_name, s.size_bytes, s.mtime, s.content_hash)
+            for s in states
+        ])
+
+    @staticmethod
+    def forget(connection, table_name: str):
+        connection.execute(
+            f"DELETE FROM {IngestionManifest.TABLE_NAME} WHERE table_name = ?",
+            [table_name]
+        )
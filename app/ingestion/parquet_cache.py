@@ -0,0 +1,76 @@
+import os
+from typing import Callable, List
+
+
+class ParquetCache:
+    """
+    Keeps a compressed Parquet copy of every CSV part file, mirrored as
+    <cache_dir>/<table>/<part>.parquet. A copy is reused as long as it is newer
+    than its CSV, so each part is parsed and type-sniffed only once.
+    """
+    COMPRESSION = "zstd"
+
+    @staticmethod
+    def cache_path(cache_dir: str, table_name: str, csv_path: str) -> str:
+        part_name = os.path.splitext(os.path.basename(csv_path))[0]
+        return os.path.join(cache_dir, table_name, f"{part_name}.parquet")
+
+    @staticmethod
+    def is_fresh(parquet_path: str, csv_path: str) -> bool:
+        return (
+            os.path.exists(parquet_path)
+            and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+        )
+
+    @staticmethod
+    def resolve(
+        cursor,
+        cache_dir: str,
+        table_name: str,
+        csv_files: List[str],
+        csv_scan: Callable[[List[str]], str]
+    ) -> List[str]:
+        """
+        Returns the Parquet copies of csv_files, converting the stale ones first.
+        csv_scan renders the read_csv call used to parse a list of part files.
+        """
+        parquet_files = []
+        converted = 0
+        for csv_path in csv_files:
+            parquet_path = ParquetCache.cache_path(cache_dir, table_name, csv_path)
+            if not ParquetCache.is_fresh(parquet_path, csv_path):
+                ParquetCache._convert(cursor, csv_scan([csv_path]), parquet_path)
+                converted += 1
+            parquet_files.append(parquet_path)
+
+        if converted:
+            print(f"✓ Cached {converted} part(s) of {table_name} as Parquet")
+        return parquet_files
+
+    @staticmethod
+    def prune(cache_dir: str, table_name: str, csv_files: List[str]):
+        """Deletes cached parts whose CSV no longer exists"""
+        table_dir = os.path.join(cache_dir, table_name)
+        if not os.path.isdir(table_dir):
+            return
+        expected = {ParquetCache.cache_path(cache_dir, table_name, f) for f in csv_files}
+        for name in os.listdir(table_dir):
+            path = os.path.join(table_dir, name)
+            if path not in expected:
+                os.remove(path)
+
+    @staticmethod
+    def _convert(cursor, scan: str, parquet_path: str):
+        """Writes the scanned part to Parquet through a temporary file, then swaps it in"""
+        os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+        tmp_path = parquet_path + ".tmp"
+        cursor.execute(f"""
+            COPY (SELECT * FROM {scan})
+            TO '{ParquetCache._escape(tmp_path)}'
+            (FORMAT PARQUET, COMPRESSION {ParquetCache.COMPRESSION})
+        """)
+        os.replace(tmp_path, parquet_path)
+
+    @staticmethod
+    def _escape(path: str) -> str:
+        return path.replace("'", "''")
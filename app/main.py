@@ -1,12 +1,22 @@
-import os
-import numpy
+import sys
 from prettytable import PrettyTable
 from app.database.connection import DuckDBConnection
+from app.database.id_sets import IdSet
 from app.transform.transform import DataTransformer
-from app.database.queries import QueryBuilder
+from app.database.queries import Predicate, QueryBuilder
+from app.database.results import NUMPY, Results
+from app.database.statements import PreparedStatementCache
+from app.ingestion.loader import DataLoader
 from app.database.update_dtos import PixMovementDTO, CountryDTO, CustomerDTO, AccountDTO, TransferInDTO, TransferOutDTO, TransactionDTO
+from app.views.daily_summary import DailySummary
+from app.views.leaderboard import ACCOUNT_LEADERBOARD, LEADERBOARD_HISTOGRAM, Leaderboard
+from app.views.materialization import Materializer
 from app.views.materialized_views import MaterializedViews
-from app.views.transactions_views import TransactionsViews
+from app.views.scheduler import ViewScheduler
+from app.views.validation import CATALOG
+
+# Rows of each analysis result printed; the returned results are complete
+DISPLAY_ROWS = 1000
 
 #!TO DO: REFACTOR DATAMANAGER AND DATA TESTS
 #- DATA MANAGER AS A MODULE OR API
@@ -23,159 +33,189 @@ class DataManager:
     transformation, and materialized view creation.
     """
 
-    def __init__(self, connection, csv_folder="data"):
+    def __init__(self, connection, csv_folder="data", parquet_cache_dir=None):
         self.connection = connection
         self.csv_folder = csv_folder
+        self.parquet_cache_dir = parquet_cache_dir
+        self.statements = PreparedStatementCache(connection)
 
-    def load_csv_data(self):
+    def load_csv_data(self, parallel=True, max_workers=None, incremental=False):
         """
-        Recursively loads CSV data from subfolders into the database.
+        Loads every subfolder of CSV part files into its own table, reading all
+        parts of a table in one scan and loading tables concurrently when parallel.
+        With incremental, only part files not yet in the ingestion manifest are loaded.
+        Parts are read through the Parquet cache when parquet_cache_dir is set.
         """
         print(f"Loading data from folder: {self.csv_folder}...")
-        
-        for root, _, files in os.walk(self.csv_folder):
-            for file in files:
-                if file.endswith(".csv"):
-                    table_name = os.path.basename(root)  # Use folder name as the table name
-                    csv_file_path = os.path.join(root, file)
-                    print(f"Loading data from {csv_file_path} into {table_name}...")
-
-                    # Create table and load data
-                    self.connection.sql(
-                        f"CREATE TABLE {table_name} AS "
-                        f"SELECT * FROM read_csv('{csv_file_path}', AUTO_DETECT=TRUE)"
-                    )
-                    print(f"Data from {csv_file_path} loaded successfully into {table_name}.")
-
-    def perform_transformation(self):
-        """Executes the full transformation workflow"""
+        return DataLoader.load_tables(
+            self.connection,
+            self.csv_folder,
+            parallel=parallel,
+            max_workers=max_workers,
+            incremental=incremental,
+            parquet_cache_dir=self.parquet_cache_dir
+        )
+
+    def perform_transformation(self, single_pass=True, incremental=False):
+        """Executes the full transformation workflow, or only the new rows when incremental"""
         print("Starting schema transformation...")
-        DataTransformer.transform_transactions(self.connection)
+        DataTransformer.transform_transactions(
+            self.connection,
+            single_pass=single_pass,
+            incremental=incremental
+        )
         print("Schema transformation completed successfully!")
 
-    def create_materialized_views(self):
-        """Creates all reporting views"""
+    def create_materialized_views(self, parallel=True, max_workers=None, validation_level=CATALOG):
+        """
+        Creates all registered reporting views, independent ones concurrently, and
+        validates them at validation_level: catalog (default), sampled or full.
+        """
         print("Building materialized views...")
-        MaterializedViews.create_monthly_account_balances(self.connection)
-        MaterializedViews.create_daily_transactions_report(self.connection)
-        TransactionsViews.create_customer_financial_overview(self.connection)
-        TransactionsViews.create_top_performing_accounts(self.connection)
+        ViewScheduler.build_all(
+            self.connection,
+            parallel=parallel,
+            max_workers=max_workers,
+            validation_level=validation_level
+        )
         print("Materialized views created successfully.")
+
+    def refresh_materialized_views(self, only_stale=True, delta_table=None):
+        """
+        Rebuilds the stored views whose sources changed, or all of them. With the
+        delta_table of an incremental transform, the summaries, monthly balances and
+        the account leaderboard are patched incrementally first instead of being
+        rebuilt.
+        """
+        print("Refreshing materialized views...")
+        if delta_table:
+            DailySummary.refresh_from_delta(self.connection, delta_table)
+            MaterializedViews.refresh_monthly_account_balances(self.connection, delta_table)
+            Leaderboard.apply_delta(self.connection, delta_table)
+        return Materializer.refresh_all(self.connection, only_stale=only_stale)
     
-    def analyze_accounts(self, account_ids):
-        """Analyze specific accounts using materialized views"""
+    def analyze_accounts(self, account_ids, result_format=NUMPY):
+        """
+        Analyze specific accounts using materialized views. account_ids may be a
+        list, NumPy array or Arrow array; it is joined as a registered relation,
+        so bulk sets of hundreds of thousands of ids cost no more SQL to parse.
+        Returns the monthly_balances and performance results in result_format
+        (see Results), and prints their first DISPLAY_ROWS rows.
+        """
         print("\n=== ACCOUNT ANALYSIS ===")
         
-        if not account_ids:
+        if account_ids is None or len(account_ids) == 0:
             print("No account IDs provided")
             return
 
-        # 1. Get monthly balances
-        monthly_balances = self.connection.execute(f"""
-            SELECT 
-                account_id,
-                strftime(month, '%Y-%m') AS month,
-                account_balance
-            FROM monthly_account_balances
-            WHERE account_id IN {tuple(account_ids)}
-            ORDER BY account_id, month
-        """).fetchall()
-
-        # 2. Get performance rankings
-        performance_data = self.connection.execute(f"""
-            SELECT 
-                tpa.account_id,
-                tpa.performance_rank,
-                c.first_name || ' ' || c.last_name AS customer_name,
-                tpa.total_incoming
-            FROM top_performing_accounts tpa
-            JOIN accounts a ON tpa.account_id = a.account_id
-            JOIN customers c ON a.customer_id = c.customer_id
-            WHERE tpa.account_id IN {tuple(account_ids)}
-        """).fetchall()
+        Materializer.ensure_fresh(self.connection, ["monthly_account_balances", ACCOUNT_LEADERBOARD, LEADERBOARD_HISTOGRAM])
+
+        with IdSet.registered(self.connection, account_ids) as id_set:
+            # 1. Get monthly balances
+            monthly_balances = Results.query(self.connection, f"""
+                SELECT 
+                    m.account_id,
+                    strftime(m.month, '%Y-%m') AS month,
+                    m.account_balance
+                FROM monthly_account_balances m
+                JOIN {id_set} s ON m.account_id = s.id
+                ORDER BY m.account_id, month
+            """, result_format=result_format)
+
+            # 2. Get performance rankings, without ranking every account
+            performance = Results.query(self.connection, f"""
+                SELECT
+                    r.account_id,
+                    r.performance_rank,
+                    c.first_name || ' ' || c.last_name AS customer_name,
+                    r.total_incoming
+                FROM ({Leaderboard.rank_query(id_set)}) r
+                JOIN accounts a ON r.account_id = a.account_id
+                JOIN customers c ON a.customer_id = c.customer_id
+                ORDER BY r.performance_rank, r.account_id
+            """, result_format=result_format)
 
         # Display results
-        print("\nMonthly Account Balances:")
-        balance_table = PrettyTable()
-        balance_table.field_names = ["Account ID", "Month", "Balance"]
-        for row in monthly_balances:
-            balance_table.add_row([row[0], row[1], f"R${row[2]:,.2f}"])
-        print(balance_table)
-
-        print("\nAccount Performance:")
-        perf_table = PrettyTable()
-        perf_table.field_names = ["Account ID", "Rank", "Customer", "Total Incoming"]
-        for row in performance_data:
-            perf_table.add_row([
-                row[0],
-                row[1],
-                row[2],
-                f"R${row[3]:,.2f}"
-            ])
-        print(perf_table)
-
-    def analyze_transactions(self, customer_ids):
-        """Analyze customer transactions using materialized views"""
+        self._print_table(
+            "Monthly Account Balances", ["Account ID", "Month", "Balance"], monthly_balances,
+            lambda row: [row[0], row[1], f"R${row[2]:,.2f}"]
+        )
+        self._print_table(
+            "Account Performance", ["Account ID", "Rank", "Customer", "Total Incoming"], performance,
+            lambda row: [row[0], row[1], row[2], f"R${row[3]:,.2f}"]
+        )
+        return {"monthly_balances": monthly_balances, "performance": performance}
+
+    def analyze_transactions(self, customer_ids, result_format=NUMPY):
+        """
+        Analyze customer transactions using materialized views; customer_ids and
+        result_format as in analyze_accounts. Returns the financial_overview and
+        temporal_patterns results.
+        """
         print("\n=== TRANSACTION ANALYSIS ===")
         
-        if not customer_ids:
+        if customer_ids is None or len(customer_ids) == 0:
             print("No customer IDs provided")
             return
 
-        # 1. Get financial overview
-        financial_overview = self.connection.execute(f"""
-            SELECT 
-                customer_id,
-                total_transfer_in,
-                total_transfer_out,
-                total_pix_in,
-                total_pix_out
-            FROM customer_financial_overview
-            WHERE customer_id IN {tuple(customer_ids)}
-        """).fetchall()
-        # 2. Fixed temporal patterns query
-        temporal_patterns = self.connection.execute(f"""
-            SELECT
-                strftime(transaction_date, '%Y-%m') AS month,
-                SUM(total_transfer_in + total_transfer_out + total_pix_in + total_pix_out) AS total_volume,
-                COUNT(*) AS transaction_days
-            FROM daily_transactions_report
-            WHERE EXISTS (
-                SELECT 1 FROM transactions t
-                JOIN accounts a ON t.account_id = a.account_id
-                WHERE a.customer_id IN {tuple(customer_ids)}
-                AND CAST(t.requested_at AS DATE) = transaction_date
-            )
-            GROUP BY month
-            ORDER BY month
-        """).fetchall()
+        Materializer.ensure_fresh(self.connection, ["customer_financial_overview", "daily_transactions_report"])
+
+        with IdSet.registered(self.connection, customer_ids) as id_set:
+            # 1. Get financial overview
+            financial_overview = Results.query(self.connection, f"""
+                SELECT 
+                    o.customer_id,
+                    concat_ws(', ', o.city, o.state, o.country) AS location,
+                    o.total_transfer_in,
+                    o.total_transfer_out,
+                    o.total_pix_in,
+                    o.total_pix_out
+                FROM customer_financial_overview o
+                JOIN {id_set} s ON o.customer_id = s.id
+                ORDER BY o.customer_id
+            """, result_format=result_format)
+            # 2. Fixed temporal patterns query
+            temporal_patterns = Results.query(self.connection, f"""
+                SELECT
+                    strftime(transaction_date, '%Y-%m') AS month,
+                    SUM(total_transfer_in + total_transfer_out + total_pix_in + total_pix_out) AS total_volume,
+                    COUNT(*) AS transaction_days
+                FROM daily_transactions_report
+                WHERE EXISTS (
+                    SELECT 1 FROM transactions t
+                    JOIN accounts a ON t.account_id = a.account_id
+                    JOIN {id_set} s ON a.customer_id = s.id
+                    WHERE CAST(t.requested_at AS DATE) = transaction_date
+                )
+                GROUP BY month
+                ORDER BY month
+            """, result_format=result_format)
 
         # Display results
-        print("\nFinancial Overview:")
-        finance_table = PrettyTable()
-        finance_table.field_names = [
-            "Customer ID", "Transfers In", "Transfers Out", "PIX In", "PIX Out"
-        ]
-        for row in financial_overview:
-            finance_table.add_row([
-                row[0],
-                f"R${row[1]:,.2f}",
-                f"R${row[2]:,.2f}",
-                f"R${row[3]:,.2f}",
-                f"R${row[4]:,.2f}"
-            ])
-        print(finance_table)
-
-        print("\nMonthly Activity Patterns:")
-        temporal_table = PrettyTable()
-        temporal_table.field_names = ["Month", "Total Volume", "Active Days"]
-        for row in temporal_patterns:
-            temporal_table.add_row([
-                row[0],
-                f"R${row[1]:,.2f}",
-                row[2]
-            ])
-        print(temporal_table)
+        self._print_table(
+            "Financial Overview",
+            ["Customer ID", "Location", "Transfers In", "Transfers Out", "PIX In", "PIX Out"],
+            financial_overview,
+            lambda row: [row[0], row[1]] + [f"R${amount:,.2f}" for amount in row[2:6]]
+        )
+        self._print_table(
+            "Monthly Activity Patterns", ["Month", "Total Volume", "Active Days"], temporal_patterns,
+            lambda row: [row[0], f"R${row[1]:,.2f}", row[2]]
+        )
+        return {"financial_overview": financial_overview, "temporal_patterns": temporal_patterns}
+
+    @staticmethod
+    def _print_table(title, field_names, result, format_row):
+        """Prints the first DISPLAY_ROWS rows of a result in any format"""
+        print(f"\n{title}:")
+        table = PrettyTable()
+        table.field_names = field_names
+        for row in Results.rows(result, DISPLAY_ROWS):
+            table.add_row(format_row(row))
+        print(table)
+        total = Results.num_rows(result)
+        if total > DISPLAY_ROWS:
+            print(f"ⓘ Showing the first {DISPLAY_ROWS:,} of {total:,} rows")
 
     def validate_data_ingestion(self):
         """Robust validation with error containment"""
@@ -190,7 +230,7 @@ class DataManager:
             try:
                 # Simple select with limit
                 query = QueryBuilder.select(dto, limit=5)
-                result = self.connection.execute(query).fetchall()
+                result = self.statements.execute(query).fetchall()
                 print(f"  {table}: Found {len(result)} records")
                 if result:
                     print(f"    Sample: {result[0]}")
@@ -205,7 +245,7 @@ class DataManager:
             {
                 "name": "Country Filter",
                 "dto": CountryDTO(),
-                "filters": {"country": "'Brasil'"},
+                "filters": {"country": "Brasil"},
                 "expected": 1
             },
             {
@@ -225,7 +265,15 @@ class DataManager:
                 },
                 "expected": ">=1"
             },
-        
+            {
+                "name": "Largest Transactions In A Period",
+                "dto": TransactionDTO(),
+                "columns": ["transaction_id", "amount"],
+                "where": [Predicate("requested_at", "between", ("2020-01-01", "2020-12-31 23:59:59"))],
+                "order_by": ["amount DESC"],
+                "limit": 5,
+                "expected": ">=1"
+            },
         ]
         
         for case in test_cases:
@@ -234,11 +282,15 @@ class DataManager:
                 query = QueryBuilder.select(
                     case["dto"],
                     filters=case.get("filters"),
-                    aggregates=case.get("aggregates")
+                    aggregates=case.get("aggregates"),
+                    limit=case.get("limit"),
+                    columns=case.get("columns"),
+                    where=case.get("where"),
+                    order_by=case.get("order_by")
                 )
-                print(f"Generated query:\n{query}")
+                print(f"Generated query:\n{query.sql}\nParameters: {query.params}")
                 
-                result = self.connection.execute(query).fetchall()
+                result = self.statements.execute(query).fetchall()
                 print(f"Results: {result}")
                 print(f"Results: {len(result)} rows")
                 
@@ -267,30 +319,38 @@ class DataManager:
     print("\nAll DTO schemas validated successfully!")
 
 
-def main():
-    db = DuckDBConnection()
+def main(database_path=":memory:"):
+    db = DuckDBConnection(database_path)
 
     try:
-        manager = DataManager(db.connect())
-        
-        print("\n=== DATA INGESTION ===")
-        manager.load_csv_data()
-        print("\n=== VALIDATING DATA INGESTION ===")
-        #WORKING AND VALIDATED
-        manager.validate_data_ingestion()
-        #WORKING AND VALIDATED
-        print("\n=== SCHEMA VALIDATION ===")
-        manager.validate_dto_schema()
-
-        print("\n=== SCHEMA TRANSFORMATION ===")
-        manager.perform_transformation()
-
-        print("\n=== QUERY BUILDER TESTS ===")
-        manager.test_query_builder()
-        
+        manager = DataManager(db.connect(), parquet_cache_dir="cache/parquet")
+        inputs_fingerprint = DataLoader.inputs_fingerprint(manager.csv_folder)
+
+        if db.is_warm(inputs_fingerprint):
+            print("\n=== WARM START ===")
+            print(f"✓ {database_path} already holds a build of the current inputs")
+        else:
+            db.invalidate_build()
+
+            print("\n=== DATA INGESTION ===")
+            manager.load_csv_data()
+            print("\n=== VALIDATING DATA INGESTION ===")
+            #WORKING AND VALIDATED
+            manager.validate_data_ingestion()
+            #WORKING AND VALIDATED
+            print("\n=== SCHEMA VALIDATION ===")
+            manager.validate_dto_schema()
+
+            print("\n=== SCHEMA TRANSFORMATION ===")
+            manager.perform_transformation()
+
+            print("\n=== QUERY BUILDER TESTS ===")
+            manager.test_query_builder()
+
+            print("\n=== VIEW GENERATION ===")
+            manager.create_materialized_views()
 
-        print("\n=== VIEW GENERATION ===")
-        manager.create_materialized_views()
+            db.mark_build_complete(inputs_fingerprint)
 
         # Test Account IDs
         account_ids = [
@@ -342,7 +402,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else ":memory:")
 
 #OUTPUT VALIDATION
 # Validating data ingestion:
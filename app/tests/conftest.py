@@ -0,0 +1,58 @@
+import pytest
+from app.tests.csv_parts import write_parts
+
+
+@pytest.fixture
+def warehouse_csv_folder(tmp_path):
+    """
+    A miniature copy of the raw export: two customers with one account each,
+    legacy transfers and PIX movements keyed to d_time, 'None' for missing values.
+    """
+    folder = tmp_path / "data"
+    write_parts(folder, "country", "country,country_id", [["Brasil,1"]])
+    write_parts(folder, "state", "state,country_id,state_id", [["SP,1,10", "MG,1,11"]])
+    write_parts(folder, "city", "city,state_id,city_id", [["Campinas,10,100", "Uberaba,11,101"]])
+    write_parts(folder, "customers", "customer_id,first_name,last_name,customer_city,cpf,country_name", [[
+        "1000,Ana,Silva,100,12345678901,Brasil",
+        "2000,Bruno,Souza,101,12345678902,Brasil",
+    ]])
+    write_parts(folder, "accounts",
+                "account_id,customer_id,created_at,status,account_branch,account_check_digit,account_number", [[
+        "5000000000000000001,1000,2019-04-19T01:34:25.000Z,active,8366,3,41002",
+        "5000000000000000002,2000,2019-03-05T23:01:26.000Z,active,662,1,24073",
+    ]])
+    write_parts(folder, "d_time", "time_id,action_timestamp,week_id,month_id,year_id,weekday_id", [[
+        "1,2020-01-10T10:00:00.000Z,2,1,2020,5",
+        "2,2020-01-10T10:05:00.000Z,2,1,2020,5",
+        "3,2020-02-03T09:00:00.000Z,6,2,2020,1",
+        "4,2020-02-03T09:01:00.000Z,6,2,2020,1",
+        "5,2020-03-15T12:00:00.000Z,11,3,2020,7",
+    ]])
+    write_parts(folder, "transfer_ins",
+                "id,account_id,amount,transaction_requested_at,transaction_completed_at,status", [
+        ["11,5000000000000000001,100.5,1,2,completed"],
+        ["12,5000000000000000002,50.0,3,4,completed"],
+    ])
+    write_parts(folder, "transfer_outs",
+                "id,account_id,amount,transaction_requested_at,transaction_completed_at,status", [[
+        "21,5000000000000000001,30.25,3,4,completed",
+        "22,5000000000000000001,10.0,5,None,failed",
+    ]])
+    write_parts(folder, "pix_movements",
+                "id,account_id,in_or_out,pix_amount,pix_requested_at,pix_completed_at,status", [[
+        "31,5000000000000000002,pix_in,20.0,1,2,completed",
+        "32,5000000000000000002,pix_out,5.0,5,5,completed",
+    ]])
+    return folder
+
+
+@pytest.fixture
+def loaded_connection(warehouse_csv_folder):
+    """In-memory database holding the raw warehouse tables"""
+    import duckdb
+    from app.ingestion.loader import DataLoader
+
+    connection = duckdb.connect()
+    DataLoader.load_tables(connection, str(warehouse_csv_folder), parallel=False)
+    yield connection
+    connection.close()
@@ -0,0 +1,7 @@
+def write_parts(folder, table, header, parts):
+    """Writes one Spark-style part-NNNNN.csv file per list of rows"""
+    table_dir = folder / table
+    table_dir.mkdir(parents=True, exist_ok=True)
+    for i, rows in enumerate(parts):
+        lines = [header] + rows
+        (table_dir / f"part-{i:05d}.csv").write_text("\n".join(lines) + "\n")
@@ -0,0 +1,74 @@
+import pytest
+from app.database import connection as connection_module
+from app.database.connection import DuckDBConnection
+from app.database.results import NUMPY
+from app.ingestion.loader import DataLoader
+
+
+def test_memory_database_is_never_warm():
+    db = DuckDBConnection()
+    db.mark_build_complete("abc")
+    assert not db.is_warm("abc")
+    db.close()
+
+
+def test_persistent_build_is_warm_until_inputs_or_version_change(tmp_path, warehouse_csv_folder, monkeypatch):
+    path = str(tmp_path / "warehouse.duckdb")
+    fingerprint = DataLoader.inputs_fingerprint(str(warehouse_csv_folder))
+
+    db = DuckDBConnection(path)
+    assert not db.is_warm(fingerprint)
+    db.mark_build_complete(fingerprint)
+    db.close()
+
+    db = DuckDBConnection(path)
+    assert db.is_warm(fingerprint)
+
+    (warehouse_csv_folder / "country" / "part-00001.csv").write_text("country,country_id\nChile,2\n")
+    assert not db.is_warm(DataLoader.inputs_fingerprint(str(warehouse_csv_folder)))
+
+    monkeypatch.setattr(connection_module, "BUILD_VERSION", connection_module.BUILD_VERSION + 1)
+    assert not db.is_warm(fingerprint)
+    db.close()
+
+
+def test_stream_yields_bounded_batches_and_leaves_the_connection_usable():
+    db = DuckDBConnection()
+    db.connect().execute("CREATE TABLE numbers AS SELECT range AS n FROM range(10)")
+
+    batches = db.stream("SELECT n FROM numbers WHERE n >= ? ORDER BY n", [3], batch_rows=4)
+    first = next(batches)
+    assert first == [(3,), (4,), (5,), (6,)]
+    # Other queries can run between batches
+    assert db.connect().execute("SELECT COUNT(*) FROM numbers").fetchone() == (10,)
+    assert [len(batch) for batch in batches] == [3]
+
+    with pytest.raises(ValueError, match="Unknown result format"):
+        db.stream("SELECT 1", result_format="pandas")
+
+    pytest.importorskip("pyarrow")
+    columns = [batch["n"].tolist() for batch in db.stream("SELECT n FROM numbers ORDER BY n", batch_rows=5, result_format=NUMPY)]
+    assert sum(columns, []) == list(range(10))
+    db.close()
+
+
+def test_numpy_batches_are_typed_like_numpy_results():
+    pytest.importorskip("pyarrow")
+    from app.database.results import Results
+
+    db = DuckDBConnection()
+    sql = """
+        SELECT * FROM (VALUES
+            (5000000000000000001, 1.50::DECIMAL(18, 2), 'a', DATE '2020-01-01', true),
+            (NULL, NULL, NULL, NULL, NULL),
+            (5000000000000000003, 2.25::DECIMAL(18, 2), 'c', DATE '2020-01-03', false)
+        ) t(account_id, amount, name, day, flag)
+    """
+    expected = Results.query(db.connect(), sql, result_format=NUMPY)
+    first, second = db.stream(sql, batch_rows=2, result_format=NUMPY)
+    for name, column in expected.items():
+        assert first[name].dtype == second[name].dtype == column.dtype
+        assert first[name].tolist() + second[name].tolist() == column.tolist()
+    # 19-digit ids survive a batch with NULLs
+    assert first["account_id"].tolist() == [5000000000000000001, None]
+    db.close()
@@ -0,0 +1,40 @@
+import csv
+import pytest
+from app.database.connection import DuckDBConnection
+from app.export.exporter import Exporter
+
+
+@pytest.fixture
+def db():
+    db = DuckDBConnection()
+    db.connect().execute("""
+        CREATE TABLE balances AS
+        SELECT range AS account_id, DATE '2020-01-01' AS month, range * 10.5 AS account_balance
+        FROM range(25)
+    """)
+    yield db
+    db.close()
+
+
+def test_csv_export_writes_every_row(db, tmp_path):
+    path = str(tmp_path / "balances.csv")
+    assert Exporter.to_csv(db, "SELECT * FROM balances ORDER BY account_id", path) == 25
+    assert Exporter.to_csv(db, "SELECT * FROM balances WHERE account_id < ?", str(tmp_path / "some.csv"), [3]) == 3
+
+    with open(path, newline="") as handle:
+        rows = list(csv.reader(handle))
+    assert rows[0] == ["account_id", "month", "account_balance"]
+    assert rows[1:3] == [["0", "2020-01-01", "0.0"], ["1", "2020-01-01", "10.5"]]
+    assert len(rows) == 26
+
+
+def test_parquet_export_matches_the_query(db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "balances.parquet")
+    assert Exporter.to_parquet(db, "SELECT * FROM balances WHERE account_id < ?", path, [20]) == 20
+    assert pq.ParquetFile(path).metadata.num_rows == 20
+    assert db.connect().execute(f"SELECT SUM(account_balance) FROM '{path}'").fetchone() == (1995.0,)
+
+    empty = str(tmp_path / "empty.parquet")
+    assert Exporter.to_parquet(db, "SELECT * FROM balances WHERE account_id < 0", empty) == 0
+    assert pq.ParquetFile(empty).schema_arrow.names == ["account_id", "month", "account_balance"]
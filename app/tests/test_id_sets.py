@@ -0,0 +1,29 @@
+import duckdb
+import numpy
+import pytest
+from app.database.id_sets import IdSet
+
+
+def test_to_array_normalizes_lists_numpy_and_arrow_to_distinct_int64():
+    expected = [3, 5000000000000000001]
+    for ids in (["5000000000000000001", 3, 3], numpy.array([5000000000000000001, 3]), {3, 5000000000000000001}):
+        array = IdSet.to_array(ids)
+        assert array.dtype == numpy.int64 and array.tolist() == expected
+
+    pa = pytest.importorskip("pyarrow")
+    chunked = pa.chunked_array([[5000000000000000001, None], [3]])
+    assert IdSet.to_array(chunked).tolist() == expected
+    assert IdSet.to_array([]).tolist() == []
+
+
+def test_registered_relation_is_joinable_and_dropped_on_exit():
+    connection = duckdb.connect()
+    connection.execute("CREATE TABLE accounts AS SELECT range AS account_id FROM range(100000)")
+    ids = numpy.arange(0, 100000, 2)
+
+    with IdSet.registered(connection, ids) as id_set:
+        assert connection.execute(
+            f"SELECT COUNT(*) FROM accounts JOIN {id_set} s ON account_id = s.id"
+        ).fetchone()[0] == 50000
+    with pytest.raises(duckdb.CatalogException):
+        connection.execute(f"SELECT * FROM {id_set}")
@@ -0,0 +1,114 @@
+import duckdb
+import pytest
+from app.database.update_dtos import TransferOutDTO
+from app.ingestion.loader import DataLoader
+from app.tests.csv_parts import write_parts
+
+
+@pytest.fixture
+def csv_folder(tmp_path):
+    folder = tmp_path / "data"
+    write_parts(folder, "country", "country,country_id", [["Brasil,1811589392032273152"]])
+    write_parts(folder, "accounts", "account_id,customer_id,status", [
+        ["1,10,active", "2,20,active"],
+        ["3,30,closed"],
+        ["4,40,active"],
+    ])
+    return folder
+
+
+def test_discover_groups_parts_by_folder(csv_folder):
+    tables = DataLoader.discover_tables(str(csv_folder))
+    assert sorted(tables) == ["accounts", "country"]
+    assert len(tables["accounts"]) == 3
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_load_tables_unions_all_parts(csv_folder, parallel):
+    connection = duckdb.connect()
+    stats = DataLoader.load_tables(connection, str(csv_folder), parallel=parallel)
+
+    by_table = {s.table_name: s for s in stats}
+    assert by_table["accounts"].rows == 4
+    assert by_table["country"].rows == 1
+    assert connection.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] == 4
+    connection.close()
+
+
+def test_incremental_load_appends_only_new_parts(csv_folder):
+    connection = duckdb.connect()
+    DataLoader.load_tables(connection, str(csv_folder), incremental=True)
+
+    write_parts(csv_folder, "accounts", "account_id,customer_id,status", [
+        ["1,10,active", "2,20,active"],
+        ["3,30,closed"],
+        ["4,40,active"],
+        ["5,50,active", "6,60,active"],
+    ])
+    # Rewrite the unchanged parts with identical content: only the new part is read
+    stats = {s.table_name: s for s in DataLoader.load_tables(connection, str(csv_folder), incremental=True)}
+
+    assert stats["country"].mode == "skip"
+    assert stats["accounts"].mode == "append"
+    assert stats["accounts"].rows == 2
+    assert connection.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] == 6
+    connection.close()
+
+
+def test_incremental_load_reloads_rewritten_parts(csv_folder):
+    connection = duckdb.connect()
+    DataLoader.load_tables(connection, str(csv_folder), incremental=True)
+
+    write_parts(csv_folder, "accounts", "account_id,customer_id,status", [["9,90,active"]])
+    stats = {s.table_name: s for s in DataLoader.load_tables(connection, str(csv_folder), incremental=True)}
+
+    assert stats["accounts"].mode == "reload"
+    assert connection.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] == 3
+    connection.close()
+
+
+def test_parquet_cache_is_reused_until_csv_changes(csv_folder, tmp_path):
+    cache_dir = tmp_path / "cache"
+    connection = duckdb.connect()
+    DataLoader.load_tables(connection, str(csv_folder), parquet_cache_dir=str(cache_dir))
+
+    cached = sorted((cache_dir / "accounts").iterdir())
+    assert len(cached) == 3
+    first_mtimes = [p.stat().st_mtime_ns for p in cached]
+
+    DataLoader.load_tables(connection, str(csv_folder), parquet_cache_dir=str(cache_dir))
+    assert [p.stat().st_mtime_ns for p in cached] == first_mtimes
+    assert connection.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] == 4
+
+    write_parts(csv_folder, "accounts", "account_id,customer_id,status", [["9,90,active"]])
+    for stale in sorted((csv_folder / "accounts").iterdir())[1:]:
+        stale.unlink()
+    DataLoader.load_tables(connection, str(csv_folder), parquet_cache_dir=str(cache_dir))
+    assert len(list((cache_dir / "accounts").iterdir())) == 1
+    assert connection.execute("SELECT account_id FROM accounts").fetchall() == [(9,)]
+    connection.close()
+
+
+def test_dto_tables_load_with_declared_types(warehouse_csv_folder):
+    connection = duckdb.connect()
+    DataLoader.load_tables(connection, str(warehouse_csv_folder))
+
+    types = dict(connection.execute("DESCRIBE transfer_outs").fetchall()[i][:2] for i in range(6))
+    assert types == {name: TransferOutDTO().column_type(name) for name in TransferOutDTO().columns}
+    completed = connection.execute(
+        "SELECT transaction_completed_at FROM transfer_outs ORDER BY id"
+    ).fetchall()
+    assert completed == [(4,), (None,)]
+    assert connection.execute("SELECT MAX(account_id) FROM accounts").fetchone()[0] == 5000000000000000002
+    connection.close()
+
+
+def test_dto_ddl_and_arrow_schema_agree():
+    dto = TransferOutDTO()
+    connection = duckdb.connect()
+    connection.execute(dto.ddl())
+    schema = connection.execute(f"SELECT * FROM {dto.table_name}").arrow().schema
+    expected = dto.arrow_schema()
+    assert schema.names == expected.names
+    assert [f.type for f in schema] == [f.type for f in expected]
+    connection.close()
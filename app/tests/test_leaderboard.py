@@ -0,0 +1,77 @@
+import numpy
+from app.transform.transform import TRANSACTIONS_DELTA, DataTransformer
+from app.views.leaderboard import ACCOUNT_LEADERBOARD, LEADERBOARD_HISTOGRAM, Leaderboard
+from app.views.materialization import Materializer
+from app.views.materialized_views import MaterializedViews
+from app.views.transactions_views import TransactionsViews
+
+ACCOUNT_1 = 5000000000000000001
+ACCOUNT_2 = 5000000000000000002
+
+
+def build(connection):
+    Leaderboard.create_account_leaderboard(connection)
+    Leaderboard.create_leaderboard_histogram(connection)
+
+
+def test_ranks_and_top_match_rank_over_all_accounts(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    build(loaded_connection)
+    TransactionsViews.create_top_performing_accounts(loaded_connection)
+    expected = sorted(
+        (row[0], float(row[1]), row[2]) for row in loaded_connection.execute(
+            "SELECT account_id, total_incoming, performance_rank FROM top_performing_accounts"
+        ).fetchall()
+    )
+
+    def normalized(rows):
+        return sorted((row[0], float(row[1]), row[2]) for row in rows)
+
+    assert normalized(Leaderboard.ranks(loaded_connection, [str(ACCOUNT_1), ACCOUNT_2])) == expected
+    assert normalized(Leaderboard.ranks(loaded_connection, [ACCOUNT_1, ACCOUNT_2], approximate=True)) == expected
+    assert normalized(Leaderboard.top(loaded_connection, 1)) == [(ACCOUNT_1, 100.5, 1)]
+    assert Leaderboard.ranks(loaded_connection, [42]) == []
+
+
+def test_bulk_ranks_match_rank_over_all_accounts_with_ties(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    build(loaded_connection)
+    # 1000 more accounts with many tied totals, some above the real ones
+    loaded_connection.execute(f"""
+        INSERT INTO {ACCOUNT_LEADERBOARD}
+        SELECT 6000000000000000000 + i, CAST((i % 37) * 7.5 AS DECIMAL(38, 2)) FROM range(1000) t(i)
+    """)
+    Leaderboard.create_leaderboard_histogram(loaded_connection)
+    expected = loaded_connection.execute(f"""
+        SELECT account_id, total_incoming, RANK() OVER (ORDER BY total_incoming DESC) AS performance_rank
+        FROM {ACCOUNT_LEADERBOARD}
+        ORDER BY performance_rank, account_id
+    """).fetchall()
+    all_ids = numpy.array([row[0] for row in expected] + [42])
+    assert Leaderboard.ranks(loaded_connection, all_ids) == expected
+    assert Leaderboard.ranks(loaded_connection, [ACCOUNT_2, ACCOUNT_1]) == [
+        row for row in expected if row[0] in (ACCOUNT_1, ACCOUNT_2)
+    ]
+
+
+def test_appended_transactions_update_totals_and_histogram(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    build(loaded_connection)
+
+    loaded_connection.execute("INSERT INTO d_time VALUES (6, TIMESTAMP '2020-03-20 08:00:00', 12, 3, 2020, 5)")
+    loaded_connection.execute("INSERT INTO transfer_ins VALUES (13, 5000000000000000002, 500.0, 6, 6, 'completed')")
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    MaterializedViews.refresh_monthly_account_balances(loaded_connection, TRANSACTIONS_DELTA)
+    Leaderboard.apply_delta(loaded_connection, TRANSACTIONS_DELTA)
+
+    assert not Materializer.is_stale(loaded_connection, ACCOUNT_LEADERBOARD)
+    assert not Materializer.is_stale(loaded_connection, LEADERBOARD_HISTOGRAM)
+    assert [(row[0], float(row[1]), row[2]) for row in Leaderboard.top(loaded_connection, 2)] == [
+        (ACCOUNT_2, 570.0, 1), (ACCOUNT_1, 100.5, 2)
+    ]
+    query = "SELECT * FROM {} ORDER BY ALL"
+    incremental = [loaded_connection.execute(query.format(t)).fetchall()
+                   for t in (ACCOUNT_LEADERBOARD, LEADERBOARD_HISTOGRAM)]
+    build(loaded_connection)
+    assert incremental == [loaded_connection.execute(query.format(t)).fetchall()
+                           for t in (ACCOUNT_LEADERBOARD, LEADERBOARD_HISTOGRAM)]
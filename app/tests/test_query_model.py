@@ -0,0 +1,62 @@
+from datetime import datetime
+import pytest
+from app.database.queries import Predicate, QueryBuilder, SelectQuery
+from app.database.statements import PreparedStatementCache
+from app.database.update_dtos import CustomerDTO, TransactionDTO
+from app.transform.transform import DataTransformer
+
+
+def test_render_projects_only_requested_columns_and_binds_every_value():
+    query = SelectQuery(
+        table="transactions",
+        columns=["account_id"],
+        aggregates={"total": "SUM(amount)"},
+        where=[
+            Predicate("requested_at", "between", (datetime(2020, 1, 1), datetime(2020, 1, 31))),
+            Predicate("transaction_type", "in", ["pix_in"]),
+            Predicate("completed_at", "is not null"),
+        ],
+        group_by=["account_id"],
+        having=[Predicate("SUM(amount)", ">", 10)],
+        order_by=["total DESC"],
+        limit=3,
+    ).render()
+    assert query.sql == (
+        "SELECT account_id, SUM(amount) AS total FROM transactions "
+        "WHERE requested_at BETWEEN $1 AND $2 AND (transaction_type BETWEEN list_min($3) AND list_max($3) "
+        "AND transaction_type IN (SELECT UNNEST($3))) "
+        "AND completed_at IS NOT NULL GROUP BY account_id HAVING SUM(amount) > $4 "
+        "ORDER BY total DESC LIMIT $5"
+    )
+    assert query.params == [datetime(2020, 1, 1), datetime(2020, 1, 31), ["pix_in"], 10, 3]
+    with pytest.raises(ValueError, match="Unknown predicate operator"):
+        Predicate("amount", "like", "%")
+    # LIMIT 0 is a real limit (e.g. to fetch only the result's columns)
+    assert SelectQuery(table="transactions", columns=["account_id"], limit=0).render().sql == (
+        "SELECT account_id FROM transactions LIMIT $1"
+    )
+
+
+def test_select_honors_having_and_order_by(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    cache = PreparedStatementCache(loaded_connection)
+
+    per_account = QueryBuilder.select(TransactionDTO(), aggregates={
+        "transactions": "COUNT(*)",
+        "GROUP BY": "account_id",
+        "HAVING": "SUM(amount) > 100",
+        "ORDER BY": "account_id",
+    })
+    assert cache.execute(per_account).fetchall() == [(5000000000000000001, 2)]
+
+    in_january = QueryBuilder.select(
+        TransactionDTO(),
+        columns=["transaction_id", "amount"],
+        where=[Predicate("requested_at", "<", datetime(2020, 2, 1))],
+        order_by=["amount DESC"],
+    )
+    assert [(row[0], float(row[1])) for row in cache.execute(in_january).fetchall()] == [(11, 100.5), (31, 20.0)]
+
+    names = QueryBuilder.select(CustomerDTO(), columns=["first_name"], filters={"customer_id": 1000})
+    assert names.sql == "SELECT first_name FROM customers WHERE customer_id = $1"
+    assert cache.execute(names).fetchall() == [("Ana",)]
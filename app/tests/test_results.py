@@ -0,0 +1,54 @@
+import numpy
+import pytest
+from app.database.results import ARROW, NUMPY, ROWS, Results
+from app.main import DataManager
+from app.transform.transform import DataTransformer
+
+ACCOUNT_1 = 5000000000000000001
+
+
+def test_fetch_formats_and_display_rows(loaded_connection):
+    query = "SELECT range AS id, range * 1.5 AS amount, NULLIF(range, 1) AS maybe FROM range(3)"
+
+    columns = Results.query(loaded_connection, query, result_format=NUMPY)
+    assert columns["id"].dtype == numpy.int64 and columns["amount"].tolist() == [0.0, 1.5, 3.0]
+    assert Results.num_rows(columns) == 3
+    assert Results.rows(columns, 2) == [(0, 0.0, 0), (1, 1.5, None)]
+    # ENUM columns come back as strings, without pandas
+    typed = Results.query(loaded_connection, "SELECT CAST('pix_in' AS ENUM('pix_in', 'pix_out')) AS kind", result_format=NUMPY)
+    assert typed["kind"].tolist() == ["pix_in"]
+    assert Results.rows(Results.query(loaded_connection, query, result_format=ROWS), 2) == [(0, 0.0, 0), (1, 1.5, None)]
+    with pytest.raises(ValueError, match="Unknown result format"):
+        Results.query(loaded_connection, query, result_format="pandas")
+
+    pytest.importorskip("pyarrow")
+    table = Results.query(loaded_connection, query, result_format=ARROW)
+    assert Results.num_rows(table) == 3 and Results.rows(table, 2) == [(0, 0.0, 0), (1, 1.5, None)]
+
+
+def test_enum_casts_keep_the_query_order(loaded_connection):
+    query = """
+        SELECT range AS id, CAST(IF(range % 2 = 0, 'pix_in', 'pix_out') AS ENUM('pix_in', 'pix_out')) AS kind
+        FROM range(200000)
+        ORDER BY hash(range), id
+    """
+    columns = Results.query(loaded_connection, query, result_format=NUMPY)
+    assert list(columns) == ["id", "kind"]
+    assert Results.rows(columns) == Results.query(loaded_connection, query, result_format=ROWS)
+
+
+def test_analysis_returns_columnar_results(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    manager = DataManager(loaded_connection)
+    manager.create_materialized_views(parallel=False)
+
+    columnar = manager.analyze_accounts(numpy.array([ACCOUNT_1, 42]))
+    as_rows = manager.analyze_accounts([str(ACCOUNT_1)], result_format=ROWS)
+    assert columnar["performance"]["account_id"].tolist() == [ACCOUNT_1]
+    assert columnar["performance"]["total_incoming"].tolist() == [100.5]
+    assert Results.rows(columnar["monthly_balances"]) == [
+        (account_id, month, float(balance)) for account_id, month, balance in as_rows["monthly_balances"]
+    ]
+
+    overview = manager.analyze_transactions([1000])["financial_overview"]
+    assert overview["location"].tolist() == ["Campinas, SP, Brasil"]
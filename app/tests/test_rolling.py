@@ -0,0 +1,95 @@
+import pytest
+from app.transform.transform import DataTransformer
+from app.views.daily_summary import DailySummary
+from app.views.materialization import Materializer
+from app.views.rolling import ACCOUNT_ROLLING_METRICS, DAILY_ROLLING_METRICS, RollingMetrics
+
+
+@pytest.fixture
+def rolling_connection(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    RollingMetrics.create_daily_rolling_metrics(loaded_connection)
+    RollingMetrics.create_account_rolling_metrics(loaded_connection)
+    return loaded_connection
+
+
+def test_windows_match_a_self_join_over_transactions(rolling_connection):
+    rolling_connection.execute("""
+        INSERT INTO transactions VALUES
+        (41, 5000000000000000001, 4.0, 'transfer_in', TIMESTAMP '2020-01-16 09:00:00', NULL, 'completed'),
+        (42, 5000000000000000001, 1.0, 'transfer_in', TIMESTAMP '2020-02-08 09:00:00', NULL, 'completed')
+    """)
+    RollingMetrics.create_account_rolling_metrics(rolling_connection)
+    rows = rolling_connection.execute(f"""
+        SELECT transaction_date, total_amount_7d, tx_count_7d, total_amount_30d, total_amount_90d
+        FROM {ACCOUNT_ROLLING_METRICS}
+        WHERE account_id = 5000000000000000001 AND transaction_type = 'transfer_in'
+        ORDER BY transaction_date
+    """).fetchall()
+    expected = rolling_connection.execute("""
+        SELECT
+            CAST(d.requested_at AS DATE) AS day,
+            SUM(t.amount) FILTER (WHERE CAST(t.requested_at AS DATE) > CAST(d.requested_at AS DATE) - 7),
+            COUNT(*) FILTER (WHERE CAST(t.requested_at AS DATE) > CAST(d.requested_at AS DATE) - 7),
+            SUM(t.amount) FILTER (WHERE CAST(t.requested_at AS DATE) > CAST(d.requested_at AS DATE) - 30),
+            SUM(t.amount)
+        FROM (SELECT DISTINCT requested_at FROM transactions
+              WHERE account_id = 5000000000000000001 AND transaction_type = 'transfer_in') d
+        JOIN transactions t
+            ON t.account_id = 5000000000000000001 AND t.transaction_type = 'transfer_in'
+            AND CAST(t.requested_at AS DATE) BETWEEN CAST(d.requested_at AS DATE) - 89 AND CAST(d.requested_at AS DATE)
+        GROUP BY day
+        ORDER BY day
+    """).fetchall()
+    assert rows == expected
+    assert [float(row[1]) for row in rows] == [100.5, 104.5, 1.0]
+    assert [float(row[3]) for row in rows] == [100.5, 104.5, 105.5]
+
+
+def test_new_days_extend_without_rebuilding(rolling_connection):
+    before = rolling_connection.execute(f"SELECT * FROM {DAILY_ROLLING_METRICS} ORDER BY ALL").fetchall()
+    rolling_connection.execute("""
+        INSERT INTO transactions VALUES
+        (41, 5000000000000000002, 15.0, 'pix_out', TIMESTAMP '2020-03-18 09:00:00', NULL, 'completed'),
+        (42, 5000000000000000001, 5.25, 'pix_out', TIMESTAMP '2020-04-02 09:00:00', NULL, 'completed')
+    """)
+    rolling_connection.execute("CREATE TEMP TABLE new_days AS SELECT * FROM transactions WHERE transaction_id > 40")
+    DailySummary.refresh_from_delta(rolling_connection, "new_days")
+    RollingMetrics.extend(rolling_connection)
+
+    for view_name in (DAILY_ROLLING_METRICS, ACCOUNT_ROLLING_METRICS):
+        assert not Materializer.is_stale(rolling_connection, view_name)
+    incremental = [rolling_connection.execute(f"SELECT * FROM {v} ORDER BY ALL").fetchall()
+                   for v in (DAILY_ROLLING_METRICS, ACCOUNT_ROLLING_METRICS)]
+    assert set(before) < set(incremental[0])
+    assert [float(row[8]) for row in incremental[0] if row[1] == 'pix_out'] == [5.0, 20.0, 25.25]
+
+    RollingMetrics.create_daily_rolling_metrics(rolling_connection)
+    RollingMetrics.create_account_rolling_metrics(rolling_connection)
+    assert incremental == [rolling_connection.execute(f"SELECT * FROM {v} ORDER BY ALL").fetchall()
+                           for v in (DAILY_ROLLING_METRICS, ACCOUNT_ROLLING_METRICS)]
+
+
+def test_late_days_recompute_the_windows_reaching_them(rolling_connection):
+    rolling_connection.execute("""
+        INSERT INTO transactions VALUES
+        (41, 5000000000000000001, 1000.0, 'transfer_in', TIMESTAMP '2020-01-20 09:00:00', NULL, 'completed'),
+        (42, 5000000000000000002, 15.0, 'transfer_in', TIMESTAMP '2020-04-02 09:00:00', NULL, 'completed')
+    """)
+    rolling_connection.execute("CREATE TEMP TABLE late_days AS SELECT * FROM transactions WHERE transaction_id > 40")
+    DailySummary.refresh_from_delta(rolling_connection, "late_days")
+    RollingMetrics.extend(rolling_connection)
+
+    for view_name in (DAILY_ROLLING_METRICS, ACCOUNT_ROLLING_METRICS):
+        assert not Materializer.is_stale(rolling_connection, view_name)
+    # The late January day reaches into the February window
+    assert [float(row[0]) for row in rolling_connection.execute(f"""
+        SELECT total_amount_90d FROM {DAILY_ROLLING_METRICS}
+        WHERE transaction_type = 'transfer_in' ORDER BY transaction_date
+    """).fetchall()] == [100.5, 1100.5, 1150.5, 1165.5]
+    incremental = [rolling_connection.execute(f"SELECT * FROM {v} ORDER BY ALL").fetchall()
+                   for v in (DAILY_ROLLING_METRICS, ACCOUNT_ROLLING_METRICS)]
+    RollingMetrics.create_daily_rolling_metrics(rolling_connection)
+    RollingMetrics.create_account_rolling_metrics(rolling_connection)
+    assert incremental == [rolling_connection.execute(f"SELECT * FROM {v} ORDER BY ALL").fetchall()
+                           for v in (DAILY_ROLLING_METRICS, ACCOUNT_ROLLING_METRICS)]
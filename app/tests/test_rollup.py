@@ -0,0 +1,47 @@
+import pytest
+from app.transform.transform import DataTransformer
+from app.views.rollup import RollupRouter, RollupViews
+
+
+@pytest.fixture
+def rollup_connection(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    RollupViews.create_transaction_rollup(loaded_connection)
+    return loaded_connection
+
+
+def test_rollup_totals_match_raw_transactions(rollup_connection):
+    raw = rollup_connection.execute("""
+        SELECT CAST(DATE_TRUNC('month', requested_at) AS DATE), transaction_type, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY ALL ORDER BY ALL
+    """).fetchall()
+    assert RollupRouter.aggregate(rollup_connection, "month") == raw
+
+
+@pytest.mark.parametrize("grain, start, end, expected", [
+    ("quarter", "2020-01-01", "2020-03-31", "month"),
+    ("quarter", "2020-01-05", "2020-03-31", "day"),
+    ("year", None, None, "year"),
+    ("year", "2020-01-01", "2020-06-30", "month"),
+    ("week", "2020-01-06", "2020-01-19", "week"),
+    ("week", "2020-01-01", "2020-01-31", "day"),
+])
+def test_router_picks_coarsest_aligned_grain(grain, start, end, expected):
+    assert RollupRouter.route(grain, start=start, end=end).grain == expected
+
+
+def test_routed_answers_agree_across_grains_and_geographies(rollup_connection):
+    by_month = RollupRouter.aggregate(rollup_connection, "quarter", by_type=False, start="2020-01-01", end="2020-03-31")
+    by_day = RollupRouter.aggregate(rollup_connection, "quarter", by_type=False, start="2020-01-01", end="2020-03-30")
+    assert [row[1:] for row in by_month] == [row[1:] for row in by_day]
+
+    states = RollupRouter.aggregate(rollup_connection, "year", geography="state", by_type=False)
+    assert [(geo, float(total), count) for _, geo, total, count in states] == [(10, 130.75, 2), (11, 75.0, 3)]
+    countries = RollupRouter.aggregate(
+        rollup_connection, "year", geography="country", transaction_types=["pix_in", "pix_out"]
+    )
+    assert [(geo, kind, count) for _, geo, kind, _, count in countries] == [(1, "pix_in", 1), (1, "pix_out", 1)]
+
+    with pytest.raises(ValueError):
+        RollupRouter.route("decade")
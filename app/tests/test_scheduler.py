@@ -0,0 +1,69 @@
+import threading
+import time
+import pytest
+from app.transform.transform import DataTransformer
+from app.views.materialization import Materializer
+from app.views.registry import VIEW_REGISTRY, ViewSpec
+from app.views.scheduler import ViewBuildTiming, ViewScheduler
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_registry_views_are_all_built(loaded_connection, parallel):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    timings = ViewScheduler.build_all(loaded_connection, parallel=parallel, max_workers=4)
+
+    assert set(timings) == {spec.name for spec in VIEW_REGISTRY}
+    assert Materializer.view_names(loaded_connection) == sorted(timings)
+    # Only the account daily summary scans transactions
+    assert [
+        name for name in timings if "transactions" in Materializer.metadata(loaded_connection, name)["sources"]
+    ] == ["account_daily_summary"]
+
+
+def test_dependent_views_wait_for_their_dependencies(loaded_connection):
+    concurrent = threading.Barrier(2, timeout=5)
+
+    def base(name):
+        def build(cursor):
+            concurrent.wait()  # Both independent views must be running at once
+            Materializer.materialize(cursor, name, "SELECT * FROM accounts", sources=["accounts"])
+        return build
+
+    def rollup(cursor):
+        time.sleep(0.01)
+        Materializer.materialize(cursor, "rollup", """
+            SELECT COUNT(*) AS n FROM view_a JOIN view_b USING (account_id)
+        """, sources=["view_a", "view_b"])
+
+    specs = [
+        ViewSpec("rollup", rollup, depends_on=["view_a", "view_b"]),
+        ViewSpec("view_a", base("view_a"), depends_on=["accounts"]),
+        ViewSpec("view_b", base("view_b"), depends_on=["accounts"]),
+    ]
+    timings = ViewScheduler.build_all(loaded_connection, specs, max_workers=2)
+
+    assert timings["rollup"].started >= max(timings["view_a"].finished, timings["view_b"].finished)
+    assert loaded_connection.execute("SELECT n FROM rollup").fetchone()[0] == 2
+    path = ViewScheduler.critical_path({s.name: s for s in specs}, timings)
+    assert path[-1] == "rollup" and len(path) == 2
+
+
+def test_critical_path_follows_the_slowest_chain():
+    specs = {s.name: s for s in [
+        ViewSpec("a", None), ViewSpec("b", None), ViewSpec("c", None, depends_on=["a", "b", "accounts"]),
+    ]}
+    timings = {
+        "a": ViewBuildTiming("a", 0.0, 1.0),
+        "b": ViewBuildTiming("b", 0.0, 3.0),
+        "c": ViewBuildTiming("c", 3.0, 3.5),
+    }
+    assert ViewScheduler.critical_path(specs, timings) == ["b", "c"]
+
+
+def test_missing_tables_and_cycles_are_rejected(loaded_connection):
+    with pytest.raises(ValueError, match="missing tables: nope"):
+        ViewScheduler.build_all(loaded_connection, [ViewSpec("v", None, depends_on=["nope"])])
+    with pytest.raises(ValueError, match="cycle"):
+        ViewScheduler.build_all(loaded_connection, [
+            ViewSpec("v", None, depends_on=["w"]), ViewSpec("w", None, depends_on=["v"]),
+        ])
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+from decimal import Decimal
+import numpy
+import pytest
+from app.database.queries import QueryBuilder
+from app.database.statements import PreparedStatementCache, sql_literal
+from app.database.update_dtos import CountryDTO
+
+
+def test_select_binds_values_and_takes_single_item_lists():
+    query = QueryBuilder.select(CountryDTO(), filters={"country_id": [1], "country": "Brasil"}, limit=5)
+    assert query.sql == (
+        "SELECT country_id, country FROM country "
+        "WHERE (country_id BETWEEN list_min($1) AND list_max($1) AND country_id IN (SELECT UNNEST($1))) "
+        "AND country = $2 LIMIT $3"
+    )
+    assert query.params == [[1], "Brasil", 5]
+
+
+def test_cache_reuses_one_statement_per_shape(loaded_connection):
+    cache = PreparedStatementCache(loaded_connection, max_statements=2)
+    for country_id in ([1], [1, 2], []):
+        query = QueryBuilder.select(CountryDTO(), filters={"country_id": country_id})
+        assert cache.execute(query).fetchall() == ([(1, "Brasil")] if country_id else [])
+    assert (len(cache), cache.hits, cache.misses) == (1, 2, 1)
+
+    # Values that would break out of a pasted string stay values
+    assert cache.execute(QueryBuilder.select(CountryDTO(), filters={"country": "x' OR '1'='1"})).fetchall() == []
+    cache.execute("SELECT $1::VARCHAR", ["a"])
+    assert len(cache) == 2 and cache.misses == 3  # Least recently used shape deallocated
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_numpy_arrays_filter_as_in_lists(loaded_connection):
+    query = QueryBuilder.select(CountryDTO(), filters={"country_id": numpy.array([1, 3], dtype=numpy.int64)})
+    assert query.sql == (
+        "SELECT country_id, country FROM country "
+        "WHERE (country_id BETWEEN list_min($1) AND list_max($1) AND country_id IN (SELECT UNNEST($1)))"
+    )
+    assert query.params == [[1, 3]]
+    assert loaded_connection.execute(query.sql, query.params).fetchall() == [(1, "Brasil")]
+    assert PreparedStatementCache(loaded_connection).execute(query).fetchall() == [(1, "Brasil")]
+
+
+@pytest.mark.parametrize("value, literal", [
+    (None, "NULL"),
+    (True, "TRUE"),
+    (5000000000000000001, "5000000000000000001"),
+    (Decimal("100.50"), "100.50"),
+    ("it's", "'it''s'"),
+    (date(2020, 1, 31), "DATE '2020-01-31'"),
+    (datetime(2020, 1, 31, 9, 30), "TIMESTAMP '2020-01-31 09:30:00'"),
+    ([1, "a"], "[1, 'a']"),
+    (numpy.int64(5000000000000000001), "5000000000000000001"),
+    (numpy.float64(2.5), "2.5"),
+    (numpy.bool_(False), "FALSE"),
+    (numpy.array([1, 2], dtype=numpy.int64), "[1, 2]"),
+])
+def test_sql_literal(value, literal):
+    assert sql_literal(value) == literal
@@ -0,0 +1,135 @@
+import pytest
+from decimal import Decimal
+from app.database.table_versions import TableVersions
+from app.transform.transform import DataTransformer
+from app.views.materialization import Materializer
+
+
+def test_transform_migrates_typed_legacy_rows(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection)
+
+    rows = loaded_connection.execute("""
+        SELECT account_id, amount, transaction_type, requested_at, completed_at
+        FROM transactions
+        ORDER BY requested_at, amount DESC
+    """).fetchall()
+    # transfer_out 22 has no completion time and is skipped
+    assert len(rows) == 5
+    assert rows[0][:3] == (5000000000000000001, 100.5, "transfer_in")
+    assert str(rows[0][3]) == "2020-01-10 10:00:00"
+    assert str(rows[0][4]) == "2020-01-10 10:05:00"
+    assert not loaded_connection.execute(
+        "SELECT 1 FROM duckdb_tables() WHERE table_name = 'transfer_ins'"
+    ).fetchall()
+
+
+def test_migration_resolves_pix_direction_and_unknown_time_ids(loaded_connection):
+    loaded_connection.execute("DELETE FROM d_time WHERE time_id = 5")
+    timings = DataTransformer.transform_transactions(loaded_connection)
+
+    assert {source: rows for source, (rows, _) in timings.items()} == {
+        "transfer_ins": 2, "transfer_outs": 1, "pix_movements": 2
+    }
+    pix = loaded_connection.execute("""
+        SELECT transaction_type, requested_at FROM transactions
+        WHERE transaction_type LIKE 'pix%' ORDER BY amount
+    """).fetchall()
+    # time_id 5 no longer exists: the row is kept with an unresolved timestamp
+    assert pix == [("pix_out", None), ("pix_in", pix[1][1])]
+    assert pix[1][1] is not None
+
+
+def test_single_pass_consolidation_matches_per_source_migration(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+
+    totals = loaded_connection.execute("""
+        SELECT transaction_type, COUNT(*), SUM(amount) FROM transactions
+        GROUP BY transaction_type ORDER BY transaction_type
+    """).fetchall()
+    assert totals == [
+        ("transfer_in", 2, Decimal("150.50")), ("transfer_out", 1, Decimal("30.25")),
+        ("pix_in", 1, Decimal("20.00")), ("pix_out", 1, Decimal("5.00")),
+    ]
+    # Nothing left to consolidate: a rerun keeps the table as it is
+    assert DataTransformer.transform_transactions(loaded_connection, single_pass=True) == {}
+    assert loaded_connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 5
+
+
+def test_failed_single_pass_consolidation_leaves_sources_untouched(loaded_connection):
+    loaded_connection.execute("DELETE FROM accounts WHERE account_id = 5000000000000000002")
+
+    with pytest.raises(ValueError, match="orphaned"):
+        DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+
+    assert loaded_connection.execute("SELECT COUNT(*) FROM pix_movements").fetchone()[0] == 2
+    assert not loaded_connection.execute(
+        "SELECT 1 FROM duckdb_tables() WHERE table_name IN ('transactions', 'transactions_staging')"
+    ).fetchall()
+
+
+def test_incremental_transform_is_idempotent_and_advances_watermarks(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    assert loaded_connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 5
+    assert loaded_connection.execute("SELECT COUNT(*) FROM pix_movements").fetchone()[0] == 2
+
+    # Rerun over the same data: nothing past the watermarks, nothing upserted
+    assert DataTransformer.transform_transactions(loaded_connection, incremental=True) == {}
+    assert loaded_connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 5
+
+    loaded_connection.execute("""
+        INSERT INTO d_time VALUES (6, TIMESTAMP '2020-04-01 08:00:00', 14, 4, 2020, 3);
+        INSERT INTO transfer_ins VALUES (13, 5000000000000000002, 70.0, 6, 6, 'completed');
+    """)
+    timings = DataTransformer.transform_transactions(loaded_connection, incremental=True)
+
+    # Only the new row is touched
+    assert timings["transfer_ins"][0] == 1
+    assert loaded_connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 6
+    assert loaded_connection.execute(
+        "SELECT high_water_id FROM transform_watermarks WHERE source = 'transfer_ins'"
+    ).fetchone()[0] == 13
+
+
+def test_unchanged_incremental_rerun_keeps_views_fresh(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    Materializer.materialize(
+        loaded_connection, "transaction_totals",
+        "SELECT transaction_type, SUM(amount) AS total FROM transactions GROUP BY ALL",
+        sources=["transactions"]
+    )
+    version = TableVersions.current(loaded_connection, "transactions")
+
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+
+    assert TableVersions.current(loaded_connection, "transactions") == version
+    assert not Materializer.is_stale(loaded_connection, "transaction_totals")
+
+
+def test_late_rows_below_the_latest_requested_time_are_migrated(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+
+    # A new movement requested on the first day, long before the latest rows
+    loaded_connection.execute(
+        "INSERT INTO transfer_ins VALUES (14, 5000000000000000001, 9.5, 1, 2, 'completed')"
+    )
+    timings = DataTransformer.transform_transactions(loaded_connection, incremental=True)
+
+    assert timings["transfer_ins"][0] == 1
+    assert loaded_connection.execute(
+        "SELECT CAST(requested_at AS DATE) FROM transactions WHERE transaction_id = 14"
+    ).fetchone()[0].isoformat() == "2020-01-10"
+
+
+@pytest.mark.parametrize("single_pass", [False, True])
+def test_transactions_are_clustered_and_indexed_by_account(loaded_connection, single_pass):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=single_pass)
+
+    physical = loaded_connection.execute(
+        "SELECT account_id, requested_at FROM transactions"
+    ).fetchall()
+    # Scans without ORDER BY follow insertion order, NULL timestamps sort last
+    assert physical == sorted(physical, key=lambda r: (r[0], r[1] is None, r[1]))
+    indexes = loaded_connection.execute(
+        "SELECT index_name FROM duckdb_indexes() WHERE table_name = 'transactions'"
+    ).fetchall()
+    assert ("idx_transactions_account_id",) in indexes
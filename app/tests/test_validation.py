@@ -0,0 +1,42 @@
+import pytest
+from app.transform.transform import DataTransformer
+from app.views.materialization import Materializer
+from app.views.scheduler import ViewScheduler
+from app.views.validation import CATALOG, FULL, SAMPLED, ViewValidator
+
+
+@pytest.fixture
+def built_connection(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    ViewScheduler.build_all(loaded_connection, validation_level=FULL)
+    return loaded_connection
+
+
+@pytest.mark.parametrize("level", [CATALOG, SAMPLED, FULL])
+def test_levels_pass_on_built_views(built_connection, level):
+    result = ViewValidator.validate(built_connection, "monthly_account_balances", level, ["account_id"])
+    assert result.ok and result.row_count == Materializer.metadata(
+        built_connection, "monthly_account_balances")["row_count"] == 5
+
+
+def test_catalog_level_uses_build_statistics_only(built_connection):
+    # Rows deleted behind the materializer's back: only a full validation recounts
+    built_connection.execute("DELETE FROM top_performing_accounts")
+    assert ViewValidator.validate(built_connection, "top_performing_accounts", CATALOG).ok
+    assert ViewValidator.validate(built_connection, "top_performing_accounts", SAMPLED).errors == [
+        "sample is empty but the build recorded 2 rows"
+    ]
+    with pytest.raises(RuntimeError, match="holds 0 rows but the build recorded 2"):
+        ViewValidator.check(built_connection, "top_performing_accounts", FULL)
+
+
+def test_missing_tables_null_keys_and_unknown_levels_fail(built_connection):
+    assert ViewValidator.validate(built_connection, "nope").errors == ["table does not exist"]
+    assert ViewValidator.validate(built_connection, "customer_financial_overview", CATALOG, ["x"]).errors == [
+        "missing key columns: x"
+    ]
+    built_connection.execute("UPDATE customer_financial_overview SET customer_id = NULL")
+    result = ViewValidator.validate(built_connection, "customer_financial_overview", FULL, ["customer_id"])
+    assert result.errors == ["2 rows have a NULL key"]
+    with pytest.raises(ValueError, match="Unknown validation level"):
+        ViewValidator.validate(built_connection, "customer_financial_overview", "deep")
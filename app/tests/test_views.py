@@ -0,0 +1,287 @@
+import duckdb
+import numpy
+import pytest
+from datetime import date
+from app.database.table_versions import TableVersions
+from app.transform.transform import DataTransformer
+from app.views.materialization import Materializer
+from app.views.materialized_views import MaterializedViews
+from app.views.transactions_views import TransactionsViews
+
+
+@pytest.fixture
+def transformed_connection(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, single_pass=True)
+    return loaded_connection
+
+
+def test_views_are_stored_as_tables_with_metadata(transformed_connection):
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    TransactionsViews.create_top_performing_accounts(transformed_connection)
+
+    tables = {row[0] for row in transformed_connection.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    assert {"monthly_account_balances", "top_performing_accounts"} <= tables
+    recorded = Materializer.metadata(transformed_connection, "top_performing_accounts")
+    assert recorded["row_count"] == 2
+    assert recorded["sources"] == ["accounts", "account_monthly_summary"]
+    assert '"account_monthly_summary": 5' in recorded["source_row_counts"]
+    assert recorded["refreshed_at"] is not None and recorded["refresh_seconds"] >= 0
+    assert Materializer.view_names(transformed_connection) == [
+        "account_daily_summary", "account_monthly_summary", "monthly_account_balances", "top_performing_accounts"
+    ]
+
+
+def test_stale_views_are_refreshed_on_demand(transformed_connection):
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    MaterializedViews.create_daily_transactions_report(transformed_connection)
+    assert not Materializer.is_stale(transformed_connection, "monthly_account_balances")
+    assert Materializer.refresh_all(transformed_connection, only_stale=True) == []
+
+    transformed_connection.execute("""
+        INSERT INTO transactions VALUES
+        (99, 5000000000000000001, 7.5, 'pix_in', TIMESTAMP '2020-03-20 10:00:00', NULL, 'completed')
+    """)
+    assert Materializer.is_stale(transformed_connection, "monthly_account_balances")
+
+    Materializer.ensure_fresh(transformed_connection, ["monthly_account_balances"])
+    assert not Materializer.is_stale(transformed_connection, "monthly_account_balances")
+    assert Materializer.refresh_all(transformed_connection, only_stale=True) == [
+        "daily_summary", "daily_transactions_report"
+    ]
+    balance = transformed_connection.execute("""
+        SELECT account_balance FROM monthly_account_balances
+        WHERE account_id = 5000000000000000001 AND month = DATE '2020-03-01'
+    """).fetchone()[0]
+    assert float(balance) == 100.5 - 30.25 + 7.5
+
+
+def test_ensure_fresh_builds_views_missing_from_an_older_build(transformed_connection):
+    from app.views.leaderboard import ACCOUNT_LEADERBOARD
+
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    # A database built before the leaderboard existed
+    Materializer.ensure_fresh(transformed_connection, ["monthly_account_balances", ACCOUNT_LEADERBOARD])
+    assert Materializer.metadata(transformed_connection, ACCOUNT_LEADERBOARD)["row_count"] == 2
+
+
+def test_materialize_replaces_plain_view_and_unknown_views_raise(transformed_connection):
+    transformed_connection.execute("CREATE VIEW daily_transactions_report AS SELECT 1 AS x")
+    MaterializedViews.create_daily_transactions_report(transformed_connection)
+    assert transformed_connection.execute(
+        "SELECT COUNT(*) FROM duckdb_views() WHERE view_name = 'daily_transactions_report'"
+    ).fetchone()[0] == 0
+
+    with pytest.raises(KeyError):
+        Materializer.is_stale(transformed_connection, "no_such_view")
+
+
+def test_incremental_monthly_balances_match_full_rebuild(loaded_connection):
+    from app.transform.transform import TRANSACTIONS_DELTA
+    from app.views.materialized_views import MONTHLY_BALANCES
+
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    MaterializedViews.create_monthly_account_balances(loaded_connection)
+    untouched = loaded_connection.execute(f"""
+        SELECT * FROM {MONTHLY_BALANCES} WHERE account_id = 5000000000000000002
+    """).fetchall()
+
+    # An earlier-month transfer for account 1, after the watermark by time id
+    loaded_connection.execute("INSERT INTO d_time VALUES (6, TIMESTAMP '2020-01-20 08:00:00', 3, 1, 2020, 1)")
+    loaded_connection.execute("INSERT INTO transfer_outs VALUES (23, 5000000000000000001, 40.0, 6, 6, 'completed')")
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    MaterializedViews.refresh_monthly_account_balances(loaded_connection, TRANSACTIONS_DELTA)
+
+    query = f"SELECT account_id, month, net_change, account_balance FROM {MONTHLY_BALANCES} ORDER BY ALL"
+    incremental = loaded_connection.execute(query).fetchall()
+    assert not Materializer.is_stale(loaded_connection, MONTHLY_BALANCES)
+    assert loaded_connection.execute(f"""
+        SELECT * FROM {MONTHLY_BALANCES} WHERE account_id = 5000000000000000002
+    """).fetchall() == untouched
+
+    MaterializedViews.create_monthly_account_balances(loaded_connection)
+    assert incremental == loaded_connection.execute(query).fetchall()
+    assert [float(row[3]) for row in incremental if row[0] == 5000000000000000001] == [60.5, 30.25]
+
+
+def test_month_partitions_are_registered_and_windows_read_them(transformed_connection):
+    from app.views.partitions import MonthPartitions
+
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    MaterializedViews.create_daily_transactions_report(transformed_connection)
+
+    assert [str(m) for m in MonthPartitions.built(transformed_connection, "monthly_account_balances")] == [
+        "2020-01-01", "2020-02-01", "2020-03-01"
+    ]
+    assert sum(MonthPartitions.built(transformed_connection, "daily_transactions_report").values()) == 3
+
+    february = MaterializedViews.account_balances(transformed_connection, "2020-02-10", "2020-02-10")
+    assert [(str(month), float(balance)) for _, month, balance in february] == [
+        ("2020-02-01", 70.25), ("2020-02-01", 70.0)
+    ]
+    quarter = MaterializedViews.daily_report(transformed_connection, "2020-01-01", "2020-03-31")
+    assert len(quarter) == 3
+    assert MaterializedViews.account_balances(
+        transformed_connection, "2020-03-01", None, account_ids=["5000000000000000002"]
+    ) == [(5000000000000000002, date(2020, 3, 1), pytest.approx(65))]
+    assert MaterializedViews.account_balances(
+        transformed_connection, "2020-03-01", None, account_ids=numpy.array([5000000000000000002])
+    ) == [(5000000000000000002, date(2020, 3, 1), pytest.approx(65))]
+    # Window dates are bound, never spliced into the SQL
+    with pytest.raises(duckdb.ConversionException):
+        MaterializedViews.daily_report(transformed_connection, "') OR TRUE --")
+
+
+def test_unchanged_transactions_leave_every_partition_alone(transformed_connection):
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    MaterializedViews.create_daily_transactions_report(transformed_connection)
+    before = transformed_connection.execute("SELECT * FROM view_partitions ORDER BY ALL").fetchall()
+
+    MaterializedViews.add_month_partitions(transformed_connection)
+
+    assert transformed_connection.execute("SELECT * FROM view_partitions ORDER BY ALL").fetchall() == before
+
+
+def test_delta_months_are_rebuilt_without_comparing_transactions(loaded_connection):
+    from app.transform.transform import TRANSACTIONS_DELTA
+
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    MaterializedViews.create_monthly_account_balances(loaded_connection)
+    loaded_connection.execute("INSERT INTO d_time VALUES (6, TIMESTAMP '2020-01-20 08:00:00', 3, 1, 2020, 1)")
+    loaded_connection.execute("INSERT INTO transfer_outs VALUES (23, 5000000000000000001, 40.0, 6, 6, 'completed')")
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+
+    MaterializedViews.add_month_partitions(loaded_connection, TRANSACTIONS_DELTA)
+
+    assert not Materializer.is_stale(loaded_connection, "monthly_account_balances")
+    assert MaterializedViews.account_balances(
+        loaded_connection, "2020-01-01", "2020-01-31", account_ids=[5000000000000000001]
+    ) == [(5000000000000000001, date(2020, 1, 1), pytest.approx(60.5))]
+
+
+def test_new_month_adds_partition_without_rebuilding_old_ones(transformed_connection):
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    MaterializedViews.create_daily_transactions_report(transformed_connection)
+    before = transformed_connection.execute(
+        "SELECT view_name, month, refreshed_at FROM view_partitions ORDER BY ALL"
+    ).fetchall()
+
+    transformed_connection.execute("""
+        INSERT INTO transactions VALUES
+        (41, 5000000000000000002, 15.0, 'transfer_in', TIMESTAMP '2020-04-02 09:00:00', NULL, 'completed'),
+        (42, 5000000000000000001, 5.25, 'pix_out', TIMESTAMP '2020-05-02 09:00:00', NULL, 'completed')
+    """)
+    MaterializedViews.add_month_partitions(transformed_connection)
+
+    after = transformed_connection.execute(
+        "SELECT view_name, month, refreshed_at FROM view_partitions ORDER BY ALL"
+    ).fetchall()
+    # April and May for the three summaries, the balances and the daily report
+    assert set(before) < set(after) and len(after) == len(before) + 10
+    assert not Materializer.is_stale(transformed_connection, "monthly_account_balances")
+    assert MaterializedViews.account_balances(transformed_connection, "2020-04-01", "2020-05-31") == [
+        (5000000000000000001, date(2020, 5, 1), pytest.approx(65)),
+        (5000000000000000002, date(2020, 4, 1), pytest.approx(80)),
+    ]
+
+    incremental = transformed_connection.execute("SELECT * FROM monthly_account_balances ORDER BY ALL").fetchall()
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    assert incremental == transformed_connection.execute("SELECT * FROM monthly_account_balances ORDER BY ALL").fetchall()
+
+
+def test_late_data_rebuilds_the_months_it_lands_in(transformed_connection):
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    MaterializedViews.create_daily_transactions_report(transformed_connection)
+    transformed_connection.execute("""
+        INSERT INTO transactions VALUES
+        (41, 5000000000000000001, 1000.0, 'transfer_in', TIMESTAMP '2020-01-20 09:00:00', NULL, 'completed'),
+        (42, 5000000000000000002, 15.0, 'transfer_in', TIMESTAMP '2020-04-02 09:00:00', NULL, 'completed')
+    """)
+    MaterializedViews.add_month_partitions(transformed_connection)
+
+    assert not Materializer.is_stale(transformed_connection, "monthly_account_balances")
+    assert MaterializedViews.account_balances(
+        transformed_connection, "2020-01-01", "2020-02-29", account_ids=[5000000000000000001]
+    ) == [
+        (5000000000000000001, date(2020, 1, 1), pytest.approx(1100.5)),
+        (5000000000000000001, date(2020, 2, 1), pytest.approx(1070.25)),
+    ]
+    incremental = [transformed_connection.execute(f"SELECT * FROM {view} ORDER BY ALL").fetchall()
+                   for view in ("monthly_account_balances", "daily_transactions_report")]
+    MaterializedViews.create_monthly_account_balances(transformed_connection)
+    MaterializedViews.create_daily_transactions_report(transformed_connection)
+    assert incremental == [transformed_connection.execute(f"SELECT * FROM {view} ORDER BY ALL").fetchall()
+                           for view in ("monthly_account_balances", "daily_transactions_report")]
+
+
+def test_views_derived_from_summaries_follow_in_place_changes(transformed_connection):
+    from app.views.scheduler import ViewScheduler
+
+    ViewScheduler.build_all(transformed_connection)
+    overview = transformed_connection.execute("""
+        SELECT customer_id, total_transfer_in, total_transfer_out, total_pix_in, total_pix_out
+        FROM customer_financial_overview ORDER BY customer_id
+    """).fetchall()
+    assert [tuple(float(v) for v in row) for row in overview] == [
+        (1000, 100.5, 30.25, 0, 0), (2000, 50.0, 0, 20.0, 5.0)
+    ]
+    # An in-place change to transactions, same row count, makes the summary and
+    # everything derived from it stale
+    transformed_connection.execute("UPDATE transactions SET amount = 1 WHERE transaction_id = 31")
+    TableVersions.bump(transformed_connection, "transactions")
+    assert Materializer.is_stale(transformed_connection, "top_performing_accounts")
+    Materializer.refresh(transformed_connection, "top_performing_accounts")
+    assert not Materializer.is_stale(transformed_connection, "account_monthly_summary")
+    assert Materializer.is_stale(transformed_connection, "customer_financial_overview")
+    incoming = dict(transformed_connection.execute(
+        "SELECT account_id, total_incoming FROM top_performing_accounts"
+    ).fetchall())
+    assert float(incoming[5000000000000000002]) == 50.0 + 1.0
+
+
+def test_incremental_upsert_makes_views_stale(loaded_connection):
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    TransactionsViews.create_top_performing_accounts(loaded_connection)
+    assert not Materializer.is_stale(loaded_connection, "top_performing_accounts")
+
+    # A source row re-delivered later with a corrected amount is upserted in
+    # place: transactions keeps its row count
+    loaded_connection.execute("""
+        INSERT INTO d_time VALUES (6, TIMESTAMP '2020-04-01 08:00:00', 14, 4, 2020, 3);
+        UPDATE transfer_ins SET amount = 75.0, transaction_requested_at = 6 WHERE id = 11;
+    """)
+    DataTransformer.transform_transactions(loaded_connection, incremental=True)
+    assert loaded_connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 5
+    assert Materializer.is_stale(loaded_connection, "top_performing_accounts")
+
+
+def test_geography_dimension_follows_in_place_dimension_changes(transformed_connection):
+    from app.views.geography import CUSTOMER_GEOGRAPHY
+
+    TransactionsViews.create_customer_financial_overview(transformed_connection)
+    assert transformed_connection.execute(
+        f"SELECT customer_id, city, state, country FROM {CUSTOMER_GEOGRAPHY} ORDER BY customer_id"
+    ).fetchall() == [(1000, "Campinas", "SP", "Brasil"), (2000, "Uberaba", "MG", "Brasil")]
+
+    # A re-exported city CSV: same row count, renamed city
+    transformed_connection.execute("UPDATE city SET city = 'Campinas Centro' WHERE city_id = 100")
+    assert Materializer.is_stale(transformed_connection, CUSTOMER_GEOGRAPHY)
+    assert Materializer.is_stale(transformed_connection, "customer_financial_overview")
+    Materializer.ensure_fresh(transformed_connection, ["customer_financial_overview"])
+    assert transformed_connection.execute(
+        "SELECT city FROM customer_financial_overview WHERE customer_id = 1000"
+    ).fetchone()[0] == "Campinas Centro"
+
+
+def test_customers_are_tracked_by_version_not_content(transformed_connection):
+    import json
+    from app.views.geography import CUSTOMER_GEOGRAPHY
+
+    TransactionsViews.create_customer_financial_overview(transformed_connection)
+    recorded = json.loads(Materializer.metadata(transformed_connection, CUSTOMER_GEOGRAPHY)["source_row_counts"])
+    # Row count and loader version only, no hash of the whole table
+    assert recorded["customers"] == "2:v1"
+
+    transformed_connection.execute("UPDATE customers SET customer_city = 101 WHERE customer_id = 1000")
+    TableVersions.bump(transformed_connection, "customers")
+    assert Materializer.is_stale(transformed_connection, CUSTOMER_GEOGRAPHY)
+    assert Materializer.is_stale(transformed_connection, "customer_financial_overview")
@@ -1,4 +1,6 @@
+import time
 from app.database.queries import QueryBuilder
+from app.database.table_versions import TableVersions
 from app.database.update_dtos import (
     TransactionDTO,
     TransferInDTO,
@@ -6,121 +8,381 @@ from app.database.update_dtos import (
     PixMovementDTO
 )
 
+# Legacy movement tables folded into transactions. "type" is a SQL expression:
+# PIX rows carry their direction in in_or_out ('pix_in'/'pix_out', or 'in'/'out').
+LEGACY_SOURCES = [
+    {
+        "source": TransferInDTO().table_name,
+        "type": "'transfer_in'",
+        "amount": "amount",
+        "timestamp": "transaction"
+    },
+    {
+        "source": TransferOutDTO().table_name,
+        "type": "'transfer_out'",
+        "amount": "amount",
+        "timestamp": "transaction"
+    },
+    {
+        "source": PixMovementDTO().table_name,
+        "type": """CASE
+            WHEN in_or_out IN ('pix_in', 'in') THEN 'pix_in'
+            WHEN in_or_out IN ('pix_out', 'out') THEN 'pix_out'
+        END""",
+        "amount": "pix_amount",
+        "timestamp": "pix"
+    }
+]
+
+TIME_LOOKUP = "time_lookup"
+TRANSACTIONS_STAGING = "transactions_staging"
+TRANSACTIONS_DELTA = "transactions_delta"
+WATERMARKS = "transform_watermarks"
+# (id, requested time id) marks of a source never transformed
+NO_MARK = (-1, -1)
+
+# Physical order of transactions, so per-account and date-range filters can skip
+# row groups on their min/max zone maps
+CLUSTER_KEY = ["account_id", "requested_at"]
+ACCOUNT_INDEX = "idx_transactions_account_id"
+
 class DataTransformer:
     @staticmethod
-    def transform_transactions(connection):
-        """Robust transformation handling real-world data issues"""
+    def transform_transactions(connection, single_pass: bool = False, incremental: bool = False):
+        """
+        Robust transformation handling real-world data issues. With single_pass, all
+        sources are consolidated in one atomic swap (see _consolidate_single_pass);
+        with incremental, only rows past each source's watermark are migrated and the
+        legacy tables are kept for the next run (see _transform_incremental).
+        """
         print("Starting schema transformation...")
-        
+        if incremental:
+            return DataTransformer._transform_incremental(connection)
+        if single_pass:
+            return DataTransformer._consolidate_single_pass(connection)
+
         try:
             # 1. Create transactions table with proper schema
             DataTransformer._create_transactions_table(connection)
             
-            # 2. Migrate data with explicit cleaning
-            DataTransformer._migrate_legacy_data(connection)
+            # 2. Migrate data with set-based time resolution
+            timings = DataTransformer._migrate_legacy_data(connection)
+            TableVersions.bump(connection, TransactionDTO().table_name)
             
             # 3. Validate essential relationships
             DataTransformer._validate_core_data(connection)
             
             # 4. Cleanup legacy tables
             DataTransformer._cleanup_legacy_tables(connection)
+
+            # 5. Cluster and index for account lookups
+            DataTransformer.finalize_transactions(connection)
             
             print("\n✓ Transformation completed successfully")
-            
+            return timings
+
         except Exception as e:
             print(f"\n!!! Transformation failed: {str(e)}")
             raise
 
+    @staticmethod
+    def _consolidate_single_pass(connection):
+        """
+        Reads every legacy source in one UNION ALL scan into a staging table, validates
+        it, swaps it in as transactions and drops the sources, all in one transaction.
+        A failure at any point rolls back to the untouched sources and old table, so
+        the run can simply be repeated.
+        """
+        sources = [m for m in LEGACY_SOURCES if DataTransformer._table_exists(connection, m['source'])]
+        if not sources:
+            print("ⓘ No legacy tables left to consolidate")
+            return {}
+        for migration in LEGACY_SOURCES:
+            if migration not in sources:
+                print(f"ⓘ {migration['source']} not found")
+
+        DataTransformer._prepare_time_lookup(connection)
+        started = time.perf_counter()
+        connection.execute("BEGIN TRANSACTION")
+        try:
+            print(f"Consolidating {', '.join(m['source'] for m in sources)} in one pass...")
+            connection.execute(TransactionDTO().ddl(TRANSACTIONS_STAGING, replace=True))
+            union = "\nUNION ALL\n".join(
+                f"({DataTransformer._normalized_source(m)})" for m in sources
+            )
+            rows = connection.execute(f"""
+                INSERT INTO {TRANSACTIONS_STAGING}
+                {DataTransformer._resolved_rows(union)}
+                ORDER BY {", ".join(CLUSTER_KEY)}
+            """).fetchone()[0]
+            print(f"✓ Staged {rows} rows")
+
+            DataTransformer._validate_core_data(connection, TRANSACTIONS_STAGING)
+
+            connection.execute(f"DROP TABLE IF EXISTS {TransactionDTO().table_name}")
+            connection.execute(
+                f"ALTER TABLE {TRANSACTIONS_STAGING} RENAME TO {TransactionDTO().table_name}"
+            )
+            DataTransformer._create_lookup_indexes(connection)
+            DataTransformer._cleanup_legacy_tables(connection)
+            TableVersions.bump(connection, TransactionDTO().table_name)
+            connection.execute("COMMIT")
+        except Exception as e:
+            connection.execute("ROLLBACK")
+            print(f"\n!!! Consolidation rolled back: {str(e)}")
+            raise
+        finally:
+            connection.execute(f"DROP TABLE IF EXISTS {TIME_LOOKUP}")
+
+        elapsed = time.perf_counter() - started
+        print(f"\n✓ Consolidated {rows} rows in {elapsed:.3f}s")
+        return {"+".join(m['source'] for m in sources): (rows, elapsed)}
+
+    @staticmethod
+    def _transform_incremental(connection):
+        """
+        Migrates the rows of each legacy source past either of its high-water marks:
+        a new source id picks up rows arriving late for an earlier day, a later
+        requested time id picks up corrected rows re-delivered under their old id.
+        Both comparisons are strict, so a rerun over the same data reads nothing.
+        Rows land in transactions_delta first, are validated there and then upserted
+        on their deterministic transaction_id, so rerunning over the same rows never
+        duplicates them. Rows identical to the stored ones are dropped from the
+        delta, and the version of transactions is only bumped when rows were
+        inserted or changed. The watermarks advance in the same transaction.
+        """
+        sources = [m for m in LEGACY_SOURCES if DataTransformer._table_exists(connection, m['source'])]
+        if not sources:
+            print("ⓘ No legacy tables to transform")
+            return {}
+
+        table_name = TransactionDTO().table_name
+        connection.execute(TransactionDTO().ddl())
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARKS} (
+                source VARCHAR PRIMARY KEY,
+                high_water_time_id BIGINT,
+                updated_at TIMESTAMP,
+                high_water_id BIGINT
+            )
+        """)
+        # Tables from before the id mark: a NULL mark re-reads the source once
+        connection.execute(f"ALTER TABLE {WATERMARKS} ADD COLUMN IF NOT EXISTS high_water_id BIGINT")
+        watermarks = {
+            source: (NO_MARK[0] if mark_id is None else mark_id, NO_MARK[1] if mark_time is None else mark_time)
+            for source, mark_id, mark_time in connection.execute(
+                f"SELECT source, high_water_id, high_water_time_id FROM {WATERMARKS}"
+            ).fetchall()
+        }
+
+        DataTransformer._prepare_time_lookup(connection)
+        started = time.perf_counter()
+        connection.execute("BEGIN TRANSACTION")
+        try:
+            union = "\nUNION ALL\n".join(
+                f"""(
+                    SELECT * FROM ({DataTransformer._normalized_source(m)})
+                    WHERE transaction_id > {watermarks.get(m['source'], NO_MARK)[0]}
+                        OR requested_time_id > {watermarks.get(m['source'], NO_MARK)[1]}
+                )"""
+                for m in sources
+            )
+            connection.execute(f"""
+                CREATE OR REPLACE TABLE {TRANSACTIONS_DELTA} AS
+                {DataTransformer._resolved_rows(union, ", src.source, src.requested_time_id")}
+                QUALIFY ROW_NUMBER() OVER (
+                    PARTITION BY {", ".join("src." + c for c in TransactionDTO().primary_key)}
+                ) = 1
+            """)
+            DataTransformer._validate_core_data(connection, TRANSACTIONS_DELTA)
+            connection.execute(f"""
+                INSERT OR REPLACE INTO {WATERMARKS} (source, high_water_id, high_water_time_id, updated_at)
+                SELECT
+                    d.source,
+                    GREATEST(MAX(d.transaction_id), ANY_VALUE(w.high_water_id)),
+                    GREATEST(MAX(d.requested_time_id), ANY_VALUE(w.high_water_time_id)),
+                    CAST(current_timestamp AS TIMESTAMP)
+                FROM {TRANSACTIONS_DELTA} d
+                LEFT JOIN {WATERMARKS} w ON w.source = d.source
+                GROUP BY d.source
+            """)
+
+            # Rows already stored as they are would only make the views look stale
+            connection.execute(f"""
+                DELETE FROM {TRANSACTIONS_DELTA} d
+                USING {table_name} t
+                WHERE {" AND ".join(
+                    f"t.{c} IS NOT DISTINCT FROM d.{c}" for c in TransactionDTO().columns
+                )}
+            """)
+            columns = ", ".join(TransactionDTO().columns)
+            connection.execute(f"""
+                INSERT OR REPLACE INTO {table_name} ({columns})
+                SELECT {columns} FROM {TRANSACTIONS_DELTA}
+                ORDER BY {", ".join(CLUSTER_KEY)}
+            """)
+            DataTransformer._create_lookup_indexes(connection)
+            counts = dict(connection.execute(
+                f"SELECT source, COUNT(*) FROM {TRANSACTIONS_DELTA} GROUP BY source"
+            ).fetchall())
+            if counts:
+                # Upserts can change rows in place, leaving the row count as it was
+                TableVersions.bump(connection, table_name)
+            connection.execute("COMMIT")
+        except Exception as e:
+            connection.execute("ROLLBACK")
+            print(f"\n!!! Incremental transform rolled back: {str(e)}")
+            raise
+        finally:
+            connection.execute(f"DROP TABLE IF EXISTS {TIME_LOOKUP}")
+
+        elapsed = time.perf_counter() - started
+        for migration in sources:
+            print(f"✓ {migration['source']}: {counts.get(migration['source'], 0)} new or changed rows "
+                  f"past (id, time id) {watermarks.get(migration['source'], ('-', '-'))}")
+        print(f"\n✓ Incremental transform completed in {elapsed:.3f}s")
+        return {source: (rows, elapsed) for source, rows in counts.items()}
+
+    @staticmethod
+    def finalize_transactions(connection):
+        """
+        Rewrites transactions in CLUSTER_KEY order, so every row group covers a narrow
+        range of accounts and its zone maps let filtered scans skip the others, then
+        builds the ART index used for account point lookups.
+        """
+        print("\nFinalizing transactions layout...")
+        table_name = TransactionDTO().table_name
+        started = time.perf_counter()
+        connection.execute("BEGIN TRANSACTION")
+        try:
+            connection.execute(TransactionDTO().ddl(TRANSACTIONS_STAGING, replace=True))
+            connection.execute(f"""
+                INSERT INTO {TRANSACTIONS_STAGING}
+                SELECT * FROM {table_name}
+                ORDER BY {", ".join(CLUSTER_KEY)}
+            """)
+            connection.execute(f"DROP TABLE {table_name}")
+            connection.execute(f"ALTER TABLE {TRANSACTIONS_STAGING} RENAME TO {table_name}")
+            DataTransformer._create_lookup_indexes(connection)
+            connection.execute("COMMIT")
+        except Exception as e:
+            connection.execute("ROLLBACK")
+            print(f"\n!!! Finalize rolled back: {str(e)}")
+            raise
+        print(f"✓ Clustered {table_name} by ({', '.join(CLUSTER_KEY)}) "
+              f"in {time.perf_counter() - started:.3f}s")
+
+    @staticmethod
+    def _create_lookup_indexes(connection):
+        """ART index on account_id; idempotent, so incremental runs just keep it"""
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {ACCOUNT_INDEX} ON {TransactionDTO().table_name} (account_id)"
+        )
+
     @staticmethod
     def _create_transactions_table(connection):
         """Create target table with proper data types"""
         print("Creating transactions table...")
-        connection.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id VARCHAR PRIMARY KEY,
-                account_id VARCHAR,
-                amount FLOAT,
-                transaction_type VARCHAR,
-                requested_at TIMESTAMP,
-                completed_at TIMESTAMP,
-                status VARCHAR
-            )
-        """)
+        connection.execute(TransactionDTO().ddl(replace=True))
         print("✓ Created transactions table")
 
     @staticmethod
     def _migrate_legacy_data(connection):
-        """Data migration with explicit type handling"""
+        """
+        Set-based migration: every source is projected once into normalized rows and
+        both d_time references are resolved with hash joins against a deduplicated
+        time lookup, instead of two correlated subqueries per row.
+        """
         print("\nMigrating legacy data:")
-        
-        migrations = [
-            {
-                "source": TransferInDTO().table_name,
-                "type": "transfer_in",
-                "amount": "amount",
-                "timestamp": "transaction"
-            },
-            {
-                "source": TransferOutDTO().table_name,
-                "type": "transfer_out",
-                "amount": "amount",
-                "timestamp": "transaction"
-            },
-            {
-                "source": PixMovementDTO().table_name,
-                "type": "pix",
-                "amount": "pix_amount",
-                "timestamp": "pix"
-            }
-        ]
-
-        for migration in migrations:
-            print(f"- Processing {migration['source']}...")
-            connection.execute(f"""
-                INSERT INTO transactions
-                SELECT
-                    uuid() AS transaction_id,
-                    account_id::VARCHAR,
-                    {migration['amount']}::FLOAT,
-                    '{migration['type']}' AS transaction_type,
-                    (
-                        SELECT action_timestamp 
-                        FROM d_time 
-                        WHERE time_id = TRY_CAST(
-                            NULLIF({migration['timestamp']}_requested_at::VARCHAR, 'None') AS INTEGER
-                        )
-                    ),
-                    (
-                        SELECT action_timestamp 
-                        FROM d_time 
-                        WHERE time_id = TRY_CAST(
-                            NULLIF({migration['timestamp']}_completed_at::VARCHAR, 'None') AS INTEGER
-                        )
-                    ),
-                    NULLIF(status::VARCHAR, 'None')
-                FROM {migration['source']}
-                WHERE 
-                    TRY_CAST(NULLIF({migration['timestamp']}_requested_at::VARCHAR, 'None') AS INTEGER) IS NOT NULL
-                    AND TRY_CAST(NULLIF({migration['timestamp']}_completed_at::VARCHAR, 'None') AS INTEGER) IS NOT NULL
-                    AND {migration['amount']}::FLOAT IS NOT NULL
-            """)
-            print(f"✓ Migrated {migration['source']}")
+        DataTransformer._prepare_time_lookup(connection)
+
+        timings = {}
+        try:
+            for migration in LEGACY_SOURCES:
+                print(f"- Processing {migration['source']}...")
+                started = time.perf_counter()
+                rows = connection.execute(f"""
+                    INSERT INTO transactions
+                    {DataTransformer._resolved_rows(DataTransformer._normalized_source(migration))}
+                """).fetchone()[0]
+                timings[migration['source']] = (rows, time.perf_counter() - started)
+                print(f"✓ Migrated {migration['source']}: {rows} rows in {timings[migration['source']][1]:.3f}s")
+        finally:
+            connection.execute(f"DROP TABLE IF EXISTS {TIME_LOOKUP}")
+        return timings
+
+    @staticmethod
+    def _prepare_time_lookup(connection):
+        """One row per time_id, so the joins can never fan out"""
+        connection.execute(f"""
+            CREATE OR REPLACE TEMP TABLE {TIME_LOOKUP} AS
+            SELECT time_id, MIN(action_timestamp) AS action_timestamp
+            FROM d_time
+            GROUP BY time_id
+        """)
+
+    @staticmethod
+    def _normalized_source(migration) -> str:
+        """
+        Projects a legacy table onto the transaction columns, time ids still unresolved.
+        transaction_id keeps the source id, so re-migrating a row always produces the
+        same (transaction_id, transaction_type) key.
+        """
+        return f"""
+            SELECT
+                id AS transaction_id,
+                '{migration['source']}' AS source,
+                account_id,
+                {migration['amount']} AS amount,
+                {migration['type']} AS transaction_type,
+                {migration['timestamp']}_requested_at AS requested_time_id,
+                {migration['timestamp']}_completed_at AS completed_time_id,
+                status
+            FROM {migration['source']}
+            WHERE {migration['timestamp']}_requested_at IS NOT NULL
+                AND {migration['timestamp']}_completed_at IS NOT NULL
+                AND {migration['amount']} IS NOT NULL
+        """
+
+    @staticmethod
+    def _resolved_rows(normalized_sql: str, extra_columns: str = "") -> str:
+        """SELECT producing transactions rows (plus extra_columns of src) from normalized rows"""
+        return f"""
+            SELECT
+                src.transaction_id,
+                src.account_id,
+                src.amount,
+                src.transaction_type,
+                requested.action_timestamp AS requested_at,
+                completed.action_timestamp AS completed_at,
+                src.status{extra_columns}
+            FROM ({normalized_sql}) src
+            {DataTransformer._resolve_times("src")}
+        """
+
+    @staticmethod
+    def _resolve_times(alias: str) -> str:
+        """Joins turning the normalized time ids of alias into timestamps"""
+        return f"""
+            LEFT JOIN {TIME_LOOKUP} requested ON requested.time_id = {alias}.requested_time_id
+            LEFT JOIN {TIME_LOOKUP} completed ON completed.time_id = {alias}.completed_time_id
+        """
 
     @staticmethod
-    def _validate_core_data(connection):
+    def _validate_core_data(connection, table_name: str = "transactions"):
         """Essential data quality checks"""
         print("\nValidating core data:")
         
         # Check for invalid timestamps
-        invalid_timestamps = connection.execute("""
-            SELECT COUNT(*) FROM transactions
+        invalid_timestamps = connection.execute(f"""
+            SELECT COUNT(*) FROM {table_name}
             WHERE requested_at IS NULL OR completed_at IS NULL
         """).fetchone()[0]
         print(f"Invalid timestamps: {invalid_timestamps} (allowed)")
         
         # Check account references
-        orphaned_transactions = connection.execute("""
-            SELECT COUNT(*) FROM transactions
+        orphaned_transactions = connection.execute(f"""
+            SELECT COUNT(*) FROM {table_name}
             WHERE account_id NOT IN (SELECT account_id FROM accounts)
         """).fetchone()[0]
         if orphaned_transactions > 0:
@@ -0,0 +1,135 @@
+from typing import Tuple
+from app.views.materialization import Materializer
+from app.views.partitions import MonthPartitions
+
+ACCOUNT_DAILY_SUMMARY = "account_daily_summary"
+ACCOUNT_DAILY_MONTH = "DATE_TRUNC('month', transaction_date)"
+
+
+class AccountDailySummary:
+    """
+    The one stage that aggregates transactions: amount and count per day, account
+    and transaction_type, stored month by month. The account monthly and the daily
+    summaries, the rollup and the per-account rolling metrics are all derived from
+    it, so a full build scans transactions once.
+    """
+
+    @staticmethod
+    def create_account_daily_summary(connection):
+        print("Creating account daily summary...")
+        Materializer.materialize(
+            connection, ACCOUNT_DAILY_SUMMARY, AccountDailySummary._summarize(),
+            sources=["transactions"], partition_by=ACCOUNT_DAILY_MONTH
+        )
+        print("✓ Created account daily summary")
+
+    @staticmethod
+    def ensure_current(connection):
+        """Builds the summary if missing, or rebuilds it if stale, before a view reads it"""
+        if not Materializer.metadata(connection, ACCOUNT_DAILY_SUMMARY):
+            AccountDailySummary.create_account_daily_summary(connection)
+        elif Materializer.is_stale(connection, ACCOUNT_DAILY_SUMMARY):
+            Materializer.refresh(connection, ACCOUNT_DAILY_SUMMARY)
+
+    @staticmethod
+    def refresh_from_delta(connection, delta_table: str):
+        """
+        Recomputes from transactions only the (account, day) cells touched by the
+        transactions upserted in delta_table. Does nothing when the summary is
+        already current, so each summary derived from it can call this first.
+        """
+        if not Materializer.metadata(connection, ACCOUNT_DAILY_SUMMARY):
+            AccountDailySummary.create_account_daily_summary(connection)
+            return
+        if not Materializer.is_stale(connection, ACCOUNT_DAILY_SUMMARY):
+            return
+
+        def maintain(conn):
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE touched_account_days AS
+                SELECT DISTINCT account_id, CAST(requested_at AS DATE) AS transaction_date
+                FROM {delta_table}
+            """)
+            conn.execute(f"""
+                DELETE FROM {ACCOUNT_DAILY_SUMMARY} s
+                USING touched_account_days d
+                WHERE s.account_id = d.account_id
+                    AND s.transaction_date IS NOT DISTINCT FROM d.transaction_date
+            """)
+            conn.execute(f"""
+                INSERT INTO {ACCOUNT_DAILY_SUMMARY}
+                SELECT
+                    d.transaction_date,
+                    t.account_id,
+                    t.transaction_type,
+                    SUM(t.amount) AS total_amount,
+                    COUNT(*) AS tx_count
+                FROM transactions t
+                JOIN touched_account_days d
+                    ON t.account_id = d.account_id
+                    AND CAST(t.requested_at AS DATE) IS NOT DISTINCT FROM d.transaction_date
+                GROUP BY d.transaction_date, t.account_id, t.transaction_type
+            """)
+            MonthPartitions.record(conn, ACCOUNT_DAILY_SUMMARY, ACCOUNT_DAILY_MONTH, [
+                row[0] for row in conn.execute(f"""
+                    SELECT DISTINCT CAST({ACCOUNT_DAILY_MONTH} AS DATE) FROM touched_account_days
+                    WHERE transaction_date IS NOT NULL
+                """).fetchall()
+            ])
+            conn.execute("DROP TABLE touched_account_days")
+
+        Materializer.apply_incremental(connection, ACCOUNT_DAILY_SUMMARY, maintain)
+
+    @staticmethod
+    def add_month(connection, month):
+        """Appends the summary rows of one month of transactions"""
+        window, params = MonthPartitions.window("requested_at", month, month)
+        connection.execute(f"INSERT INTO {ACCOUNT_DAILY_SUMMARY} {AccountDailySummary._summarize(window)}", params)
+
+    @staticmethod
+    def month_checks() -> Tuple[str, str]:
+        """
+        Count, amount and day-of-month and account id sums per month and
+        transaction_type, from transactions and from the summary, for
+        MonthPartitions.changed_months. The weighted sums catch rows moved between
+        days or accounts within a month.
+        """
+        expected = """
+            SELECT
+                CAST(DATE_TRUNC('month', requested_at) AS DATE) AS month,
+                transaction_type,
+                COUNT(*) AS tx_count,
+                SUM(amount) AS total_amount,
+                SUM(DAYOFMONTH(requested_at)) AS day_sum,
+                SUM(CAST(account_id AS HUGEINT)) AS account_sum
+            FROM transactions
+            GROUP BY ALL
+        """
+        stored = f"""
+            SELECT
+                CAST({ACCOUNT_DAILY_MONTH} AS DATE) AS month,
+                transaction_type,
+                SUM(tx_count) AS tx_count,
+                SUM(total_amount) AS total_amount,
+                SUM(DAYOFMONTH(transaction_date) * tx_count) AS day_sum,
+                SUM(CAST(account_id AS HUGEINT) * tx_count) AS account_sum
+            FROM {ACCOUNT_DAILY_SUMMARY}
+            GROUP BY ALL
+        """
+        return expected, stored
+
+    @staticmethod
+    def _summarize(condition: str = "TRUE") -> str:
+        """Summary rows of the transactions matching condition, in partition order"""
+        return f"""
+            SELECT
+                CAST(requested_at AS DATE) AS transaction_date,
+                account_id,
+                transaction_type,
+                SUM(amount) AS total_amount,
+                COUNT(*) AS tx_count
+            FROM transactions
+            WHERE {condition}
+            GROUP BY ALL
+            ORDER BY transaction_date, account_id
+        """
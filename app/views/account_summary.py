@@ -0,0 +1,100 @@
+from app.views.account_daily_summary import ACCOUNT_DAILY_SUMMARY, AccountDailySummary
+from app.views.materialization import Materializer
+from app.views.partitions import MonthPartitions
+
+ACCOUNT_MONTHLY_SUMMARY = "account_monthly_summary"
+SUMMARY_MONTH = "month"
+
+
+class AccountSummary:
+    """
+    Shared pre-aggregation stage of the account views: amount and count per
+    account, month and transaction_type, stored month by month and rolled up from
+    AccountDailySummary. Monthly balances, the customer overview, top performing
+    accounts and the leaderboard are derived from it.
+    """
+
+    @staticmethod
+    def create_account_monthly_summary(connection):
+        print("Creating account monthly summary...")
+        AccountDailySummary.ensure_current(connection)
+        Materializer.materialize(
+            connection, ACCOUNT_MONTHLY_SUMMARY, AccountSummary._summarize(),
+            sources=[ACCOUNT_DAILY_SUMMARY], partition_by=SUMMARY_MONTH
+        )
+        print("✓ Created account monthly summary")
+
+    @staticmethod
+    def ensure_current(connection):
+        """Builds the summary if missing, or rebuilds it if stale, before a view reads it"""
+        if not Materializer.metadata(connection, ACCOUNT_MONTHLY_SUMMARY):
+            AccountSummary.create_account_monthly_summary(connection)
+        elif Materializer.is_stale(connection, ACCOUNT_MONTHLY_SUMMARY):
+            Materializer.refresh(connection, ACCOUNT_MONTHLY_SUMMARY)
+
+    @staticmethod
+    def refresh_from_delta(connection, delta_table: str):
+        """
+        Recomputes only the (account, month) cells touched by the transactions
+        upserted in delta_table, from the account daily summary, patched first.
+        """
+        AccountDailySummary.refresh_from_delta(connection, delta_table)
+        if not Materializer.metadata(connection, ACCOUNT_MONTHLY_SUMMARY):
+            AccountSummary.create_account_monthly_summary(connection)
+            return
+
+        def maintain(conn):
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE touched_months AS
+                SELECT DISTINCT account_id, CAST(DATE_TRUNC('month', requested_at) AS DATE) AS month
+                FROM {delta_table}
+            """)
+            conn.execute(f"""
+                DELETE FROM {ACCOUNT_MONTHLY_SUMMARY} s
+                USING touched_months m
+                WHERE s.account_id = m.account_id AND s.month IS NOT DISTINCT FROM m.month
+            """)
+            conn.execute(f"""
+                INSERT INTO {ACCOUNT_MONTHLY_SUMMARY}
+                SELECT
+                    d.account_id,
+                    m.month,
+                    d.transaction_type,
+                    SUM(d.total_amount) AS total_amount,
+                    SUM(d.tx_count) AS tx_count
+                FROM {ACCOUNT_DAILY_SUMMARY} d
+                JOIN touched_months m
+                    ON d.account_id = m.account_id
+                    AND CAST(DATE_TRUNC('month', d.transaction_date) AS DATE) IS NOT DISTINCT FROM m.month
+                GROUP BY d.account_id, m.month, d.transaction_type
+            """)
+            MonthPartitions.record(conn, ACCOUNT_MONTHLY_SUMMARY, SUMMARY_MONTH, [
+                row[0] for row in conn.execute(
+                    "SELECT DISTINCT month FROM touched_months WHERE month IS NOT NULL"
+                ).fetchall()
+            ])
+            conn.execute("DROP TABLE touched_months")
+
+        Materializer.apply_incremental(connection, ACCOUNT_MONTHLY_SUMMARY, maintain)
+
+    @staticmethod
+    def add_month(connection, month):
+        """Appends the summary rows of one month of the account daily summary"""
+        window, params = MonthPartitions.window("transaction_date", month, month)
+        connection.execute(f"INSERT INTO {ACCOUNT_MONTHLY_SUMMARY} {AccountSummary._summarize(window)}", params)
+
+    @staticmethod
+    def _summarize(condition: str = "TRUE") -> str:
+        """Summary rows of the account daily summary rows matching condition, in partition order"""
+        return f"""
+            SELECT
+                account_id,
+                CAST(DATE_TRUNC('month', transaction_date) AS DATE) AS month,
+                transaction_type,
+                SUM(total_amount) AS total_amount,
+                SUM(tx_count) AS tx_count
+            FROM {ACCOUNT_DAILY_SUMMARY}
+            WHERE {condition}
+            GROUP BY ALL
+            ORDER BY month, account_id
+        """
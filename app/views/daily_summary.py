@@ -0,0 +1,97 @@
+from app.views.account_daily_summary import ACCOUNT_DAILY_MONTH, ACCOUNT_DAILY_SUMMARY, AccountDailySummary
+from app.views.materialization import Materializer
+from app.views.partitions import MonthPartitions
+
+DAILY_SUMMARY = "daily_summary"
+DAILY_SUMMARY_MONTH = "DATE_TRUNC('month', transaction_date)"
+
+
+class DailySummary:
+    """
+    Bank-wide amount and count per day and transaction_type, stored month by
+    month and rolled up from AccountDailySummary: a few rows per day whatever the
+    number of accounts. The daily report and the daily rolling metrics are
+    derived from it.
+    """
+
+    @staticmethod
+    def create_daily_summary(connection):
+        print("Creating daily summary...")
+        AccountDailySummary.ensure_current(connection)
+        Materializer.materialize(
+            connection, DAILY_SUMMARY, DailySummary._summarize(),
+            sources=[ACCOUNT_DAILY_SUMMARY], partition_by=DAILY_SUMMARY_MONTH
+        )
+        print("✓ Created daily summary")
+
+    @staticmethod
+    def ensure_current(connection):
+        """Builds the summary if missing, or rebuilds it if stale, before a view reads it"""
+        if not Materializer.metadata(connection, DAILY_SUMMARY):
+            DailySummary.create_daily_summary(connection)
+        elif Materializer.is_stale(connection, DAILY_SUMMARY):
+            Materializer.refresh(connection, DAILY_SUMMARY)
+
+    @staticmethod
+    def refresh_from_delta(connection, delta_table: str):
+        """
+        Recomputes only the days touched by the transactions upserted in
+        delta_table, from the account daily summary, patched first.
+        """
+        AccountDailySummary.refresh_from_delta(connection, delta_table)
+        if not Materializer.metadata(connection, DAILY_SUMMARY):
+            DailySummary.create_daily_summary(connection)
+            return
+
+        def maintain(conn):
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE touched_days AS
+                SELECT DISTINCT CAST(requested_at AS DATE) AS transaction_date
+                FROM {delta_table}
+            """)
+            conn.execute(f"""
+                DELETE FROM {DAILY_SUMMARY} s
+                USING touched_days d
+                WHERE s.transaction_date IS NOT DISTINCT FROM d.transaction_date
+            """)
+            conn.execute(f"""
+                INSERT INTO {DAILY_SUMMARY}
+                SELECT
+                    d.transaction_date,
+                    s.transaction_type,
+                    SUM(s.total_amount) AS total_amount,
+                    SUM(s.tx_count) AS tx_count
+                FROM {ACCOUNT_DAILY_SUMMARY} s
+                JOIN touched_days d ON s.transaction_date IS NOT DISTINCT FROM d.transaction_date
+                GROUP BY d.transaction_date, s.transaction_type
+            """)
+            MonthPartitions.record(conn, DAILY_SUMMARY, DAILY_SUMMARY_MONTH, [
+                row[0] for row in conn.execute(f"""
+                    SELECT DISTINCT CAST({DAILY_SUMMARY_MONTH} AS DATE) FROM touched_days
+                    WHERE transaction_date IS NOT NULL
+                """).fetchall()
+            ])
+            conn.execute("DROP TABLE touched_days")
+
+        Materializer.apply_incremental(connection, DAILY_SUMMARY, maintain)
+
+    @staticmethod
+    def add_month(connection, month):
+        """Appends the summary rows of one month of the account daily summary"""
+        window, params = MonthPartitions.window("transaction_date", month, month)
+        connection.execute(f"INSERT INTO {DAILY_SUMMARY} {DailySummary._summarize(window)}", params)
+
+    @staticmethod
+    def _summarize(condition: str = "TRUE") -> str:
+        """Summary rows of the account daily summary rows matching condition, in partition order"""
+        return f"""
+            SELECT
+                transaction_date,
+                transaction_type,
+                SUM(total_amount) AS total_amount,
+                SUM(tx_count) AS tx_count
+            FROM {ACCOUNT_DAILY_SUMMARY}
+            WHERE {condition}
+            GROUP BY ALL
+            ORDER BY transaction_date
+        """
@@ -0,0 +1,43 @@
+from app.views.materialization import Materializer
+
+CUSTOMER_GEOGRAPHY = "customer_geography"
+GEOGRAPHY_TABLES = ["customers", "city", "state", "country"]
+
+
+class CustomerGeography:
+    """
+    Denormalized geography dimension: one row per customer with its city, state
+    and country ids and names, so geographic breakdowns join it once instead of
+    chaining customers -> city -> state -> country. city, state and country are
+    content-tracked sources and customers is versioned by the loader (see
+    Materializer), so a reloaded dimension CSV makes this view, and everything
+    built on it, stale.
+    """
+
+    @staticmethod
+    def create_customer_geography(connection):
+        print("Creating customer geography dimension...")
+        Materializer.materialize(connection, CUSTOMER_GEOGRAPHY, """
+            SELECT
+                c.customer_id,
+                ci.city_id,
+                ci.city,
+                s.state_id,
+                s.state,
+                co.country_id,
+                co.country
+            FROM customers c
+            LEFT JOIN city ci ON c.customer_city = ci.city_id
+            LEFT JOIN state s ON ci.state_id = s.state_id
+            LEFT JOIN country co ON s.country_id = co.country_id
+            ORDER BY c.customer_id
+        """, sources=GEOGRAPHY_TABLES)
+        print("✓ Created customer geography dimension")
+
+    @staticmethod
+    def ensure_current(connection):
+        """Builds the dimension if missing, or rebuilds it if stale, before a view reads it"""
+        if not Materializer.metadata(connection, CUSTOMER_GEOGRAPHY):
+            CustomerGeography.create_customer_geography(connection)
+        elif Materializer.is_stale(connection, CUSTOMER_GEOGRAPHY):
+            Materializer.refresh(connection, CUSTOMER_GEOGRAPHY)
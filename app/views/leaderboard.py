@@ -0,0 +1,234 @@
+from app.database.id_sets import IdSet
+from app.database.results import ROWS, Results
+from app.views.account_summary import ACCOUNT_MONTHLY_SUMMARY, AccountSummary
+from app.views.materialization import Materializer
+
+ACCOUNT_LEADERBOARD = "account_leaderboard"
+LEADERBOARD_HISTOGRAM = "account_leaderboard_histogram"
+INCOMING_TYPES = "('transfer_in', 'pix_in')"
+
+# Histogram buckets are log-scaled: BUCKETS_PER_DOUBLING buckets each time the
+# total incoming doubles, so every bucket spans about the same relative width
+BUCKETS_PER_DOUBLING = 8
+
+
+def score_bucket(column: str) -> str:
+    """SQL expression giving the histogram bucket of a total incoming amount"""
+    return f"CAST(FLOOR(LOG2(1 + GREATEST({column}, 0)) * {BUCKETS_PER_DOUBLING}) AS INTEGER)"
+
+
+class Leaderboard:
+    """
+    Incoming totals of every account, kept current as transactions are appended,
+    answering "top N" and "rank of account X" without ranking every account:
+    top N is a LIMIT (a bounded heap, not a sort) and a rank counts the accounts
+    with a higher total. LEADERBOARD_HISTOGRAM counts accounts per score bucket,
+    from which ranks can be approximated by reading a few hundred rows at most.
+    """
+
+    @staticmethod
+    def create_account_leaderboard(connection):
+        print("Creating account leaderboard...")
+        AccountSummary.ensure_current(connection)
+        Materializer.materialize(connection, ACCOUNT_LEADERBOARD, f"""
+            SELECT
+                a.account_id,
+                COALESCE(SUM(s.total_amount) FILTER (WHERE s.transaction_type IN {INCOMING_TYPES}), 0)
+                    AS total_incoming
+            FROM accounts a
+            LEFT JOIN {ACCOUNT_MONTHLY_SUMMARY} s ON a.account_id = s.account_id
+            GROUP BY a.account_id
+        """, sources=["accounts", ACCOUNT_MONTHLY_SUMMARY])
+        print("✓ Created account leaderboard")
+
+    @staticmethod
+    def create_leaderboard_histogram(connection):
+        print("Creating account leaderboard histogram...")
+        Materializer.materialize(connection, LEADERBOARD_HISTOGRAM, f"""
+            SELECT {score_bucket("total_incoming")} AS bucket, COUNT(*) AS accounts
+            FROM {ACCOUNT_LEADERBOARD}
+            GROUP BY bucket
+            ORDER BY bucket
+        """, sources=[ACCOUNT_LEADERBOARD])
+        print("✓ Created account leaderboard histogram")
+
+    @staticmethod
+    def apply_delta(connection, delta_table: str):
+        """
+        Recomputes the totals of the accounts with transactions in delta_table and
+        moves them between histogram buckets. Reads account_monthly_summary, so the
+        summary must already hold the delta (refresh_monthly_account_balances
+        patches it).
+        """
+        if not Materializer.metadata(connection, ACCOUNT_LEADERBOARD):
+            Leaderboard.create_account_leaderboard(connection)
+            Leaderboard.create_leaderboard_histogram(connection)
+            return
+
+        def maintain_leaderboard(conn):
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE leaderboard_changes AS
+                SELECT
+                    d.account_id,
+                    l.total_incoming AS old_total,
+                    COALESCE(SUM(s.total_amount) FILTER (WHERE s.transaction_type IN {INCOMING_TYPES}), 0)
+                        AS new_total
+                FROM (SELECT DISTINCT account_id FROM {delta_table}) d
+                JOIN accounts a ON d.account_id = a.account_id
+                LEFT JOIN {ACCOUNT_LEADERBOARD} l ON d.account_id = l.account_id
+                LEFT JOIN {ACCOUNT_MONTHLY_SUMMARY} s ON d.account_id = s.account_id
+                GROUP BY d.account_id, l.total_incoming
+            """)
+            conn.execute(f"""
+                UPDATE {ACCOUNT_LEADERBOARD} l
+                SET total_incoming = c.new_total
+                FROM leaderboard_changes c
+                WHERE l.account_id = c.account_id AND c.old_total IS NOT NULL
+            """)
+            conn.execute(f"""
+                INSERT INTO {ACCOUNT_LEADERBOARD}
+                SELECT account_id, new_total FROM leaderboard_changes
+                WHERE old_total IS NULL
+            """)
+
+        def maintain_histogram(conn):
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE bucket_changes AS
+                SELECT bucket, SUM(change) AS change
+                FROM (
+                    SELECT {score_bucket("old_total")} AS bucket, -1 AS change
+                    FROM leaderboard_changes WHERE old_total IS NOT NULL
+                    UNION ALL
+                    SELECT {score_bucket("new_total")}, 1 FROM leaderboard_changes
+                )
+                GROUP BY bucket
+                HAVING SUM(change) <> 0
+            """)
+            conn.execute(f"""
+                UPDATE {LEADERBOARD_HISTOGRAM} h
+                SET accounts = h.accounts + c.change
+                FROM bucket_changes c
+                WHERE h.bucket = c.bucket
+            """)
+            conn.execute(f"""
+                INSERT INTO {LEADERBOARD_HISTOGRAM}
+                SELECT bucket, change FROM bucket_changes
+                WHERE bucket NOT IN (SELECT bucket FROM {LEADERBOARD_HISTOGRAM})
+            """)
+            conn.execute(f"DELETE FROM {LEADERBOARD_HISTOGRAM} WHERE accounts = 0")
+            conn.execute("DROP TABLE bucket_changes")
+            conn.execute("DROP TABLE leaderboard_changes")
+
+        Materializer.apply_incremental(connection, ACCOUNT_LEADERBOARD, maintain_leaderboard)
+        Materializer.apply_incremental(connection, LEADERBOARD_HISTOGRAM, maintain_histogram)
+
+    @staticmethod
+    def top(connection, n: int = 100, result_format: str = ROWS):
+        """(account_id, total_incoming, rank) of the n accounts with the highest incoming totals"""
+        # Every account ranked above one in the top n is in the top n too, so
+        # ranking just those rows gives their global RANK()
+        return Results.query(connection, f"""
+            SELECT account_id, total_incoming, RANK() OVER (ORDER BY total_incoming DESC) AS performance_rank
+            FROM (
+                SELECT account_id, total_incoming FROM {ACCOUNT_LEADERBOARD}
+                ORDER BY total_incoming DESC, account_id
+                LIMIT ?
+            )
+            ORDER BY performance_rank, account_id
+        """, [n], result_format)
+
+    @staticmethod
+    def ranks(connection, account_ids, approximate: bool = False, result_format: str = ROWS):
+        """
+        (account_id, total_incoming, rank) of the given accounts (a list, NumPy or
+        Arrow array), where rank is RANK() by total incoming; see rank_query.
+        """
+        with IdSet.registered(connection, account_ids) as id_set:
+            return Results.query(connection, f"""
+                SELECT * FROM ({Leaderboard.rank_query(id_set, approximate)})
+                ORDER BY performance_rank, account_id
+            """, result_format=result_format)
+
+    @staticmethod
+    def rank_query(id_set: str, approximate: bool = False) -> str:
+        """
+        SQL of (account_id, total_incoming, performance_rank) for the accounts of a
+        registered IdSet relation, for callers to join further. Both modes read
+        LEADERBOARD_HISTOGRAM, which must be as current as the leaderboard.
+        Exact ranks take the accounts in higher score buckets from the histogram
+        and count those above each account within its own bucket with one ASOF
+        join of the bucket's accounts against the given totals: each account is
+        counted once, at the highest given total below its own, and a running sum
+        from the top turns those counts into ranks. Only the buckets holding given
+        accounts are sorted, whatever their number. Approximate ranks read only the
+        histogram, interpolating within the account's bucket.
+        """
+        if approximate:
+            return f"""
+                WITH targets AS (
+                    SELECT
+                        account_id,
+                        total_incoming,
+                        {score_bucket("total_incoming")} AS bucket,
+                        LOG2(1 + GREATEST(total_incoming, 0)) * {BUCKETS_PER_DOUBLING} AS position
+                    FROM {ACCOUNT_LEADERBOARD}
+                    JOIN {id_set} s ON account_id = s.id
+                )
+                SELECT
+                    t.account_id,
+                    t.total_incoming,
+                    CAST(ROUND(
+                        1 + COALESCE(SUM(h.accounts) FILTER (WHERE h.bucket > t.bucket), 0)
+                        -- The other accounts of its own bucket, assumed spread evenly over it
+                        + (COALESCE(SUM(h.accounts) FILTER (WHERE h.bucket = t.bucket), 0) - 1)
+                            * (1 - (t.position - t.bucket))
+                    ) AS BIGINT) AS performance_rank
+                FROM targets t
+                LEFT JOIN {LEADERBOARD_HISTOGRAM} h ON h.bucket >= t.bucket
+                GROUP BY t.account_id, t.total_incoming, t.bucket, t.position
+            """
+
+        return f"""
+            WITH targets AS (
+                SELECT account_id, total_incoming, {score_bucket("total_incoming")} AS bucket
+                FROM {ACCOUNT_LEADERBOARD}
+                JOIN {id_set} s ON account_id = s.id
+            ),
+            scores AS (
+                SELECT DISTINCT bucket, total_incoming AS score FROM targets
+            ),
+            above_bucket AS (
+                SELECT b.bucket, COALESCE(SUM(h.accounts), 0) AS accounts
+                FROM (SELECT DISTINCT bucket FROM scores) b
+                LEFT JOIN {LEADERBOARD_HISTOGRAM} h ON h.bucket > b.bucket
+                GROUP BY b.bucket
+            ),
+            within_bucket AS (
+                SELECT s.bucket, s.score, COUNT(*) AS accounts
+                FROM (
+                    -- Only the buckets of the given accounts are sorted
+                    SELECT * FROM (
+                        SELECT total_incoming, {score_bucket("total_incoming")} AS bucket
+                        FROM {ACCOUNT_LEADERBOARD}
+                    )
+                    WHERE bucket IN (SELECT bucket FROM above_bucket)
+                ) l
+                ASOF JOIN scores s ON l.bucket = s.bucket AND l.total_incoming > s.score
+                GROUP BY s.bucket, s.score
+            ),
+            ranked AS (
+                SELECT
+                    s.score,
+                    1 + a.accounts + SUM(COALESCE(w.accounts, 0)) OVER (
+                        PARTITION BY s.bucket
+                        ORDER BY s.score DESC
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                    ) AS performance_rank
+                FROM scores s
+                JOIN above_bucket a ON s.bucket = a.bucket
+                LEFT JOIN within_bucket w ON s.bucket = w.bucket AND s.score = w.score
+            )
+            SELECT t.account_id, t.total_incoming, CAST(r.performance_rank AS BIGINT) AS performance_rank
+            FROM targets t
+            JOIN ranked r ON t.total_incoming = r.score
+        """
@@ -0,0 +1,255 @@
+import json
+import time
+from typing import Callable, Dict, List, Optional
+from app.database.table_versions import TableVersions
+from app.views.partitions import MonthPartitions
+
+
+class Materializer:
+    """
+    Stores each reporting view as a table and records how it was built in
+    METADATA_TABLE: its SQL definition and sources, when it was last refreshed,
+    how long that took, its row count and a signature of each source at the time:
+    its row count, plus its TableVersions version (bumped by every pipeline write,
+    so in-place upserts count as changes) and, for CONTENT_TRACKED_SOURCES, a hash
+    of its rows.
+    A view is stale once any source signature differs from the recorded one, or
+    once a source that is itself a materialized view is stale or was refreshed
+    after it.
+    Views materialized with partition_by also keep their month partitions
+    registered in MonthPartitions.
+    """
+    METADATA_TABLE = "materialized_view_metadata"
+    # Small dimension tables that can change in place (a re-exported CSV with the
+    # same row count); a hash of their rows is part of their recorded signature.
+    # customers is too large to hash on every staleness check: a reload bumps its
+    # TableVersions version instead
+    CONTENT_TRACKED_SOURCES = {"city", "state", "country"}
+
+    @staticmethod
+    def ensure_metadata(connection):
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {Materializer.METADATA_TABLE} (
+                view_name VARCHAR PRIMARY KEY,
+                definition VARCHAR,
+                sources VARCHAR[],
+                source_row_counts VARCHAR,  -- JSON object: source -> signature at refresh
+                row_count BIGINT,
+                refreshed_at TIMESTAMP,
+                refresh_seconds DOUBLE
+            )
+        """)
+        connection.execute(f"""
+            ALTER TABLE {Materializer.METADATA_TABLE}
+            ADD COLUMN IF NOT EXISTS partition_by VARCHAR  -- Expression giving a row's month
+        """)
+        MonthPartitions.ensure_table(connection)
+
+    @staticmethod
+    def materialize(
+        connection,
+        view_name: str,
+        definition: str,
+        sources: List[str],
+        partition_by: Optional[str] = None
+    ) -> int:
+        """
+        (Re)builds view_name as a table from the definition SELECT and records its
+        metadata, atomically. Returns the number of materialized rows. With
+        partition_by, the definition should order rows by month.
+        """
+        Materializer.ensure_metadata(connection)
+        started = time.perf_counter()
+        connection.execute("BEGIN TRANSACTION")
+        try:
+            # Databases built before views were materialized hold a plain view here
+            if connection.execute(
+                "SELECT 1 FROM duckdb_views() WHERE view_name = ?", [view_name]
+            ).fetchone():
+                connection.execute(f"DROP VIEW {view_name}")
+            # The build reports its own row count, recorded without recounting the table
+            row_count = connection.execute(
+                f"CREATE OR REPLACE TABLE {view_name} AS {definition}"
+            ).fetchone()[0]
+            if partition_by:
+                MonthPartitions.record(connection, view_name, partition_by)
+            Materializer._record(
+                connection, view_name, definition, sources, started, partition_by, row_count
+            )
+            connection.execute("COMMIT")
+        except Exception as e:
+            connection.execute("ROLLBACK")
+            print(f"!!! Materialization of {view_name} rolled back: {str(e)}")
+            raise
+        return row_count
+
+    @staticmethod
+    def apply_incremental(connection, view_name: str, maintain: Callable) -> int:
+        """
+        Runs maintain(connection), which patches only the rows of the stored view
+        affected by a change, and records the refresh, in one transaction.
+        Returns the row count of the view afterwards.
+        """
+        recorded = Materializer._require(connection, view_name)
+        started = time.perf_counter()
+        connection.execute("BEGIN TRANSACTION")
+        try:
+            maintain(connection)
+            row_count = Materializer._record(
+                connection, view_name, recorded["definition"], recorded["sources"], started,
+                recorded["partition_by"]
+            )
+            connection.execute("COMMIT")
+        except Exception as e:
+            connection.execute("ROLLBACK")
+            print(f"!!! Incremental refresh of {view_name} rolled back: {str(e)}")
+            raise
+        print(f"✓ Incrementally refreshed {view_name} in {time.perf_counter() - started:.3f}s")
+        return row_count
+
+    @staticmethod
+    def refresh(connection, view_name: str) -> int:
+        """Rebuilds a materialized view from its recorded definition, stale upstream views first"""
+        recorded = Materializer._require(connection, view_name)
+        for source in Materializer._view_sources(connection, recorded):
+            if Materializer.is_stale(connection, source):
+                Materializer.refresh(connection, source)
+        row_count = Materializer.materialize(
+            connection, view_name, recorded["definition"], recorded["sources"], recorded["partition_by"]
+        )
+        print(f"✓ Refreshed {view_name}: {row_count} rows")
+        return row_count
+
+    @staticmethod
+    def refresh_all(connection, only_stale: bool = False) -> List[str]:
+        """Full refresh of every recorded view, or just the stale ones; returns the refreshed names"""
+        refreshed = []
+        for view_name in Materializer.view_names(connection):
+            if only_stale and not Materializer.is_stale(connection, view_name):
+                continue
+            Materializer.refresh(connection, view_name)
+            refreshed.append(view_name)
+        if not refreshed:
+            print("ⓘ All materialized views are up to date")
+        return refreshed
+
+    @staticmethod
+    def ensure_fresh(connection, view_names: List[str]):
+        """
+        On-demand refresh: builds the listed views that are missing (e.g. from a
+        database written by an older build) and rebuilds the others only if stale
+        """
+        # Imported here: the registry imports every view module, which import this one
+        from app.views.registry import VIEW_REGISTRY
+
+        builders = {spec.name: spec.build for spec in VIEW_REGISTRY}
+        for view_name in view_names:
+            if Materializer.metadata(connection, view_name) is None:
+                builders[view_name](connection)
+            elif Materializer.is_stale(connection, view_name):
+                Materializer.refresh(connection, view_name)
+
+    @staticmethod
+    def is_stale(connection, view_name: str) -> bool:
+        recorded = Materializer._require(connection, view_name)
+        current = Materializer._source_signatures(connection, recorded["sources"])
+        if current != json.loads(recorded["source_row_counts"]):
+            return True
+        for source in Materializer._view_sources(connection, recorded):
+            upstream = Materializer.metadata(connection, source)
+            if upstream["refreshed_at"] > recorded["refreshed_at"] or Materializer.is_stale(connection, source):
+                return True
+        return False
+
+    @staticmethod
+    def metadata(connection, view_name: str) -> Dict:
+        """The recorded metadata row of view_name as a dict, or None"""
+        Materializer.ensure_metadata(connection)
+        cursor = connection.execute(
+            f"SELECT * FROM {Materializer.METADATA_TABLE} WHERE view_name = ?", [view_name]
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    @staticmethod
+    def view_names(connection) -> List[str]:
+        Materializer.ensure_metadata(connection)
+        return [row[0] for row in connection.execute(
+            f"SELECT view_name FROM {Materializer.METADATA_TABLE} ORDER BY view_name"
+        ).fetchall()]
+
+    @staticmethod
+    def _require(connection, view_name: str) -> Dict:
+        recorded = Materializer.metadata(connection, view_name)
+        if recorded is None:
+            raise KeyError(f"{view_name} is not a materialized view")
+        return recorded
+
+    @staticmethod
+    def _record(
+        connection,
+        view_name: str,
+        definition: str,
+        sources: List[str],
+        started: float,
+        partition_by: Optional[str] = None,
+        row_count: Optional[int] = None
+    ) -> int:
+        """Upserts the metadata row of a view just (re)built; returns its row count"""
+        if row_count is None:
+            row_count = connection.execute(f"SELECT COUNT(*) FROM {view_name}").fetchone()[0]
+        source_signatures = Materializer._source_signatures(connection, sources)
+        connection.execute(f"""
+            INSERT OR REPLACE INTO {Materializer.METADATA_TABLE} (
+                view_name, definition, sources, source_row_counts, row_count,
+                refreshed_at, refresh_seconds, partition_by
+            )
+            VALUES (?, ?, ?, ?, ?, CAST(current_timestamp AS TIMESTAMP), ?, ?)
+        """, [
+            view_name,
+            definition,
+            sources,
+            json.dumps(source_signatures, sort_keys=True),
+            row_count,
+            time.perf_counter() - started,
+            partition_by,
+        ])
+        return row_count
+
+    @staticmethod
+    def _view_sources(connection, recorded: Dict) -> List[str]:
+        """Sources of a recorded view that are materialized views themselves"""
+        views = set(Materializer.view_names(connection))
+        return [source for source in recorded["sources"] if source in views]
+
+    @staticmethod
+    def _source_signatures(connection, sources: List[str]) -> Dict[str, object]:
+        """
+        Current signature per source: its row count, as "rows:vN" once a pipeline
+        step has recorded version N of it, with ":hash" appended for content-tracked
+        sources; a missing source is -1
+        """
+        signatures = {}
+        for source in sources:
+            exists = connection.execute(
+                "SELECT 1 FROM duckdb_tables() WHERE table_name = ?", [source]
+            ).fetchone()
+            if not exists:
+                signatures[source] = -1
+                continue
+            if source in Materializer.CONTENT_TRACKED_SOURCES:
+                rows, content = connection.execute(
+                    f"SELECT COUNT(*), bit_xor(hash(t)) FROM {source} t"
+                ).fetchone()
+            else:
+                rows, content = connection.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0], None
+            version = TableVersions.current(connection, source)
+            if version is None and content is None:
+                signatures[source] = rows
+            else:
+                signatures[source] = ":".join(
+                    str(part) for part in [rows, version and f"v{version}", content] if part is not None
+                )
+        return signatures
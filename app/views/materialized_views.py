@@ -1,79 +1,291 @@
+from app.database.id_sets import ID_SET_COLUMN, IdSet
 from app.database.queries import QueryBuilder
+from app.database.results import ROWS, Results
 from app.database.update_dtos import TransactionDTO, AccountDTO, CustomerDTO
+from app.views.account_daily_summary import ACCOUNT_DAILY_SUMMARY, AccountDailySummary
+from app.views.account_summary import ACCOUNT_MONTHLY_SUMMARY, AccountSummary
+from app.views.daily_summary import DAILY_SUMMARY, DailySummary
+from app.views.materialization import Materializer
+from app.views.partitions import MonthPartitions
+from app.views.rolling import RollingMetrics
+
+MONTHLY_BALANCES = "monthly_account_balances"
+DAILY_REPORT = "daily_transactions_report"
+# Over rows of the account monthly or the daily summary
+SIGNED_TOTAL = """CASE
+    WHEN transaction_type IN ('transfer_in', 'pix_in') THEN total_amount
+    ELSE -total_amount
+END"""
+DAILY_TOTALS = """
+    COALESCE(SUM(CASE WHEN transaction_type = 'transfer_in' THEN total_amount END), 0) AS total_transfer_in,
+    COALESCE(SUM(CASE WHEN transaction_type = 'transfer_out' THEN total_amount END), 0) AS total_transfer_out,
+    COALESCE(SUM(CASE WHEN transaction_type = 'pix_in' THEN total_amount END), 0) AS total_pix_in,
+    COALESCE(SUM(CASE WHEN transaction_type = 'pix_out' THEN total_amount END), 0) AS total_pix_out
+"""
 
 class MaterializedViews:
     @staticmethod
     def create_monthly_account_balances(connection):
-        """Calculates rolling monthly balances with carryover"""
+        """
+        Calculates rolling monthly balances with carryover over the full history,
+        stored month by month (see MonthPartitions); read a window with
+        account_balances.
+        """
         print("Creating monthly account balances view...")
+        AccountSummary.ensure_current(connection)
         
-        connection.execute("""
-            CREATE OR REPLACE VIEW monthly_account_balances AS
+        Materializer.materialize(connection, MONTHLY_BALANCES, f"""
             WITH monthly_net AS (
                 SELECT
                     account_id,
-                    DATE_TRUNC('month', requested_at) AS month,
-                    SUM(CASE
-                        WHEN transaction_type IN ('transfer_in', 'pix_in') THEN amount
-                        ELSE -amount
-                    END) AS net_change
-                FROM transactions
-                WHERE requested_at BETWEEN '2020-01-01' AND '2020-12-31'
-                GROUP BY account_id, DATE_TRUNC('month', requested_at)
+                    month,
+                    SUM({SIGNED_TOTAL}) AS net_change
+                FROM {ACCOUNT_MONTHLY_SUMMARY}
+                WHERE month IS NOT NULL
+                GROUP BY account_id, month
             )
             SELECT
                 account_id,
                 month,
+                net_change,
                 SUM(net_change) OVER (
                     PARTITION BY account_id 
                     ORDER BY month 
                     ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
                 ) AS account_balance
             FROM monthly_net
-            ORDER BY account_id, month;
-        """)
-        
-        MaterializedViews._validate_view_creation(connection, "monthly_account_balances")
+            ORDER BY month, account_id
+        """, sources=[ACCOUNT_MONTHLY_SUMMARY], partition_by="month")
+
         print("✓ Created monthly account balances view")
 
+    @staticmethod
+    def account_balances(connection, start: str = None, end: str = None, account_ids=None, result_format: str = ROWS):
+        """
+        (account_id, month, account_balance) rows for the months from start through
+        end (ISO dates, open-ended when None), in result_format (see Results).
+        Only those month partitions are read; account_ids (a list, NumPy array or
+        Arrow array) are joined as a registered IdSet.
+        """
+        window, params = MonthPartitions.window("b.month", start, end)
+        sql = f"""
+            SELECT b.account_id, b.month, b.account_balance
+            FROM {MONTHLY_BALANCES} b
+            {{accounts}}
+            WHERE {window}
+            ORDER BY b.account_id, b.month
+        """
+        if account_ids is None or len(account_ids) == 0:
+            return Results.query(connection, sql.format(accounts=""), params, result_format)
+        with IdSet.registered(connection, account_ids) as id_set:
+            return Results.query(
+                connection, sql.format(accounts=f"JOIN {id_set} ids ON b.account_id = ids.{ID_SET_COLUMN}"),
+                params, result_format
+            )
+
+    @staticmethod
+    def daily_report(connection, start: str = None, end: str = None, result_format: str = ROWS):
+        """Daily totals for the months from start through end, reading only those partitions"""
+        window, params = MonthPartitions.window("transaction_date", start, end)
+        return Results.query(connection, f"""
+            SELECT * FROM {DAILY_REPORT}
+            WHERE {window}
+            ORDER BY transaction_date
+        """, params, result_format)
+
+    @staticmethod
+    def add_month_partitions(connection, delta_table: str = None):
+        """
+        Brings the month partitions of the summaries and the views derived from them
+        up to date, then extends the rolling metrics; every other partition is left
+        as it is. Only the account daily summary reads transactions. When transactions
+        are unchanged since it was built (see TableVersions) nothing is read; else its
+        months to rebuild are those of delta_table, the transactions upserted since,
+        or, without one, the months whose transactions no longer match it (see
+        MonthPartitions.changed_months, a full scan). Each derived view then rebuilds
+        the months its source refreshed after it (MonthPartitions.stale_months, from
+        the partition registry alone). Balances carry forward, so a changed month
+        also rebuilds the later months of the balances.
+        """
+        if not Materializer.metadata(connection, ACCOUNT_DAILY_SUMMARY):
+            AccountDailySummary.create_account_daily_summary(connection)
+            months = []
+        elif not Materializer.is_stale(connection, ACCOUNT_DAILY_SUMMARY):
+            months = []
+        elif delta_table:
+            months = [row[0] for row in connection.execute(f"""
+                SELECT DISTINCT CAST(DATE_TRUNC('month', requested_at) AS DATE) AS month
+                FROM {delta_table}
+                WHERE requested_at IS NOT NULL
+                ORDER BY month
+            """).fetchall()]
+        else:
+            months = MonthPartitions.changed_months(connection, *AccountDailySummary.month_checks())
+        MaterializedViews._rebuild_months(connection, ACCOUNT_DAILY_SUMMARY, AccountDailySummary.add_month, months)
+
+        for view_name, source_name, add_month in [
+            (ACCOUNT_MONTHLY_SUMMARY, ACCOUNT_DAILY_SUMMARY, AccountSummary.add_month),
+            (DAILY_SUMMARY, ACCOUNT_DAILY_SUMMARY, DailySummary.add_month),
+            (MONTHLY_BALANCES, ACCOUNT_MONTHLY_SUMMARY, MaterializedViews._add_balance_month),
+            (DAILY_REPORT, DAILY_SUMMARY, MaterializedViews._add_daily_report_month),
+        ]:
+            months = MonthPartitions.stale_months(connection, view_name, source_name)
+            if months and view_name == MONTHLY_BALANCES:
+                built = MonthPartitions.built(connection, view_name)
+                months = sorted(set(months) | {month for month in built if month > months[0]})
+            MaterializedViews._rebuild_months(connection, view_name, add_month, months)
+
+        RollingMetrics.extend(connection)
+
+    @staticmethod
+    def _rebuild_months(connection, view_name: str, add_month, months):
+        """Deletes and re-adds the given month partitions of view_name, in one transaction"""
+        if not Materializer.metadata(connection, view_name):
+            print(f"ⓘ {view_name} is not built yet")
+            return
+        if not months:
+            print(f"ⓘ {view_name} partitions are up to date")
+            return
+        built = MonthPartitions.built(connection, view_name)
+        partition_by = Materializer.metadata(connection, view_name)["partition_by"]
+
+        def maintain(conn):
+            for month in months:
+                conn.execute(f"DELETE FROM {view_name} WHERE CAST({partition_by} AS DATE) = ?", [month])
+                add_month(conn, month)
+            MonthPartitions.record(conn, view_name, partition_by, months)
+
+        Materializer.apply_incremental(connection, view_name, maintain)
+        new_months = [month for month in months if month not in built]
+        print(f"✓ Added {len(new_months)} and rebuilt {len(months) - len(new_months)} "
+              f"month partition(s) of {view_name}")
+
+    @staticmethod
+    def _add_balance_month(connection, month):
+        connection.execute(f"""
+            INSERT INTO {MONTHLY_BALANCES}
+            WITH net AS (
+                SELECT account_id, SUM({SIGNED_TOTAL}) AS net_change
+                FROM {ACCOUNT_MONTHLY_SUMMARY}
+                WHERE month = ?
+                GROUP BY account_id
+            ),
+            opening AS (
+                SELECT b.account_id, arg_max(b.account_balance, b.month) AS balance
+                FROM {MONTHLY_BALANCES} b
+                JOIN net n ON b.account_id = n.account_id
+                WHERE b.month < ?
+                GROUP BY b.account_id
+            )
+            SELECT
+                n.account_id,
+                CAST(? AS DATE) AS month,
+                n.net_change,
+                COALESCE(o.balance, 0) + n.net_change AS account_balance
+            FROM net n
+            LEFT JOIN opening o ON n.account_id = o.account_id
+            ORDER BY n.account_id
+        """, [month, month, month])
+
+    @staticmethod
+    def _add_daily_report_month(connection, month):
+        window, params = MonthPartitions.window("transaction_date", month, month)
+        connection.execute(f"""
+            INSERT INTO {DAILY_REPORT}
+            SELECT
+                transaction_date,
+                {DAILY_TOTALS}
+            FROM {DAILY_SUMMARY}
+            WHERE {window}
+            GROUP BY transaction_date
+            ORDER BY transaction_date
+        """, params)
+
+    @staticmethod
+    def refresh_monthly_account_balances(connection, delta_table: str):
+        """
+        Incremental maintenance for the transactions upserted in delta_table (see
+        DataTransformer._transform_incremental). The account summary is patched
+        first, then only the (account, month) cells the delta touches get their
+        net_change recomputed from it. The balances of those accounts are then
+        re-accumulated from their earliest touched month, starting from the last
+        untouched balance. Every other row is left alone. Assumes upserted rows keep
+        their account and month.
+        """
+        AccountSummary.refresh_from_delta(connection, delta_table)
+        if not Materializer.metadata(connection, MONTHLY_BALANCES):
+            MaterializedViews.create_monthly_account_balances(connection)
+            return
+
+        def maintain(conn):
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE touched_cells AS
+                SELECT DISTINCT account_id, CAST(DATE_TRUNC('month', requested_at) AS DATE) AS month
+                FROM {delta_table}
+                WHERE requested_at IS NOT NULL
+            """)
+            conn.execute(f"""
+                DELETE FROM {MONTHLY_BALANCES} m
+                USING touched_cells c
+                WHERE m.account_id = c.account_id AND m.month = c.month
+            """)
+            conn.execute(f"""
+                INSERT INTO {MONTHLY_BALANCES} (account_id, month, net_change)
+                SELECT s.account_id, c.month, SUM({SIGNED_TOTAL})
+                FROM {ACCOUNT_MONTHLY_SUMMARY} s
+                JOIN touched_cells c ON s.account_id = c.account_id AND s.month = c.month
+                GROUP BY s.account_id, c.month
+            """)
+            # Carry the running balance forward from each account's earliest touched month
+            conn.execute(f"""
+                UPDATE {MONTHLY_BALANCES} m
+                SET account_balance = carried.account_balance
+                FROM (
+                    WITH restart AS (
+                        SELECT account_id, MIN(month) AS from_month
+                        FROM touched_cells
+                        GROUP BY account_id
+                    ),
+                    opening AS (
+                        SELECT b.account_id, arg_max(b.account_balance, b.month) AS balance
+                        FROM {MONTHLY_BALANCES} b
+                        JOIN restart r ON b.account_id = r.account_id AND b.month < r.from_month
+                        GROUP BY b.account_id
+                    )
+                    SELECT
+                        b.account_id,
+                        b.month,
+                        COALESCE(o.balance, 0) + SUM(b.net_change) OVER (
+                            PARTITION BY b.account_id
+                            ORDER BY b.month
+                            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                        ) AS account_balance
+                    FROM {MONTHLY_BALANCES} b
+                    JOIN restart r ON b.account_id = r.account_id AND b.month >= r.from_month
+                    LEFT JOIN opening o ON b.account_id = o.account_id
+                ) carried
+                WHERE m.account_id = carried.account_id AND m.month = carried.month
+            """)
+            MonthPartitions.record(conn, MONTHLY_BALANCES, "month", [
+                row[0] for row in conn.execute("SELECT DISTINCT month FROM touched_cells").fetchall()
+            ])
+            conn.execute("DROP TABLE touched_cells")
+
+        Materializer.apply_incremental(connection, MONTHLY_BALANCES, maintain)
+
     @staticmethod
     def create_daily_transactions_report(connection):
         """Fixed date handling for DuckDB"""
         print("Creating daily transactions report view...")
+        DailySummary.ensure_current(connection)
         
-        connection.execute("""
-            CREATE OR REPLACE VIEW daily_transactions_report AS
+        Materializer.materialize(connection, DAILY_REPORT, f"""
             SELECT
-                CAST(requested_at AS DATE) AS transaction_date,
-                COALESCE(SUM(CASE WHEN transaction_type = 'transfer_in' THEN amount END), 0) AS total_transfer_in,
-                COALESCE(SUM(CASE WHEN transaction_type = 'transfer_out' THEN amount END), 0) AS total_transfer_out,
-                COALESCE(SUM(CASE WHEN transaction_type = 'pix_in' THEN amount END), 0) AS total_pix_in,
-                COALESCE(SUM(CASE WHEN transaction_type = 'pix_out' THEN amount END), 0) AS total_pix_out
-            FROM transactions
-            GROUP BY CAST(requested_at AS DATE)
-        """)
-        
-        MaterializedViews._validate_view_creation(connection, "daily_transactions_report")
-        print("✓ Created daily transactions report view")
+                transaction_date,
+                {DAILY_TOTALS}
+            FROM {DAILY_SUMMARY}
+            GROUP BY transaction_date
+            ORDER BY transaction_date
+        """, sources=[DAILY_SUMMARY], partition_by="DATE_TRUNC('month', transaction_date)")
 
-    @staticmethod
-    def _validate_view_creation(connection, view_name):
-        """Enhanced view validation with error details"""
-        try:
-            # Check view existence
-            exists = connection.execute(f"""
-                SELECT COUNT(*) 
-                FROM duckdb_views() 
-                WHERE view_name = '{view_name}'
-            """).fetchone()[0] > 0
-            
-            # Check basic queryability
-            test_query = connection.execute(f"""
-                SELECT * FROM {view_name} LIMIT 1
-            """)
-            
-            if not exists or test_query.fetchone() is None:
-                raise ValueError(f"View {view_name} creation failed validation")
-                
-        except Exception as e:
-            raise RuntimeError(f"View validation failed for {view_name}: {str(e)}")
\ No newline at end of file
+        print("✓ Created daily transactions report view")
@@ -0,0 +1,126 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class MonthPartitions:
+    """
+    Month partitions of materialized views. A partitioned view keeps its rows in
+    month order, so each month occupies its own run of row groups and a filter on
+    the month column lets DuckDB's zone maps skip every other month. TABLE_NAME
+    records which months each view holds, their row counts and refresh times.
+    """
+    TABLE_NAME = "view_partitions"
+
+    @staticmethod
+    def ensure_table(connection):
+        connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {MonthPartitions.TABLE_NAME} (
+                view_name VARCHAR,
+                month DATE,
+                row_count BIGINT,
+                refreshed_at TIMESTAMP,
+                PRIMARY KEY (view_name, month)
+            )
+        """)
+
+    @staticmethod
+    def built(connection, view_name: str) -> Dict[date, int]:
+        """Row count per recorded month of view_name"""
+        MonthPartitions.ensure_table(connection)
+        return dict(connection.execute(f"""
+            SELECT month, row_count FROM {MonthPartitions.TABLE_NAME}
+            WHERE view_name = ?
+            ORDER BY month
+        """, [view_name]).fetchall())
+
+    @staticmethod
+    def source_months(connection, after: Optional[date] = None) -> List[date]:
+        """Months with transactions, optionally only those after a given month"""
+        condition = "AND requested_at >= CAST(? AS DATE) + INTERVAL 1 MONTH" if after else ""
+        return [row[0] for row in connection.execute(f"""
+            SELECT DISTINCT CAST(DATE_TRUNC('month', requested_at) AS DATE) AS month
+            FROM transactions
+            WHERE requested_at IS NOT NULL {condition}
+            ORDER BY month
+        """, [after] if after else None).fetchall()]
+
+    @staticmethod
+    def changed_months(connection, expected_sql: str, stored_sql: str) -> List[date]:
+        """
+        Months whose rows differ between expected_sql, what a view's partitions
+        should hold computed from its source, and stored_sql, the same computed from
+        the view. Both return a month column first and the same other columns, one
+        or more rows per month; new months, late or changed rows and emptied months
+        all show up.
+        """
+        return [row[0] for row in connection.execute(f"""
+            SELECT DISTINCT month FROM (
+                (({expected_sql}) EXCEPT ({stored_sql}))
+                UNION ALL
+                (({stored_sql}) EXCEPT ({expected_sql}))
+            )
+            WHERE month IS NOT NULL
+            ORDER BY month
+        """).fetchall()]
+
+    @staticmethod
+    def stale_months(connection, view_name: str, source_name: str) -> List[date]:
+        """
+        Months of view_name to rebuild from source_name, another partitioned view,
+        read from the registry alone: months refreshed in the source after the view,
+        and months held by only one of the two.
+        """
+        MonthPartitions.ensure_table(connection)
+        return [row[0] for row in connection.execute(f"""
+            SELECT COALESCE(s.month, v.month) AS month
+            FROM (SELECT month, refreshed_at FROM {MonthPartitions.TABLE_NAME} WHERE view_name = ?) s
+            FULL JOIN (SELECT month, refreshed_at FROM {MonthPartitions.TABLE_NAME} WHERE view_name = ?) v
+                ON s.month = v.month
+            WHERE s.month IS NULL OR v.month IS NULL OR s.refreshed_at > v.refreshed_at
+            ORDER BY month
+        """, [source_name, view_name]).fetchall()]
+
+    @staticmethod
+    def record(connection, view_name: str, month_expression: str, months: Optional[List[date]] = None):
+        """
+        Re-derives the registry rows of view_name from its table, for the given
+        months or all of them. month_expression maps a view row to its month.
+        """
+        MonthPartitions.ensure_table(connection)
+        scope = ""
+        if months is not None:
+            if not months:
+                return
+            scope = f"AND month IN ({MonthPartitions._month_list(months)})"
+        connection.execute(f"""
+            DELETE FROM {MonthPartitions.TABLE_NAME}
+            WHERE view_name = ? {scope}
+        """, [view_name])
+        connection.execute(f"""
+            INSERT INTO {MonthPartitions.TABLE_NAME}
+            SELECT ?, month, COUNT(*), CAST(current_timestamp AS TIMESTAMP)
+            FROM (SELECT CAST({month_expression} AS DATE) AS month FROM {view_name})
+            WHERE month IS NOT NULL {scope}
+            GROUP BY month
+        """, [view_name])
+
+    @staticmethod
+    def window(column: str, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[str, List[Any]]:
+        """
+        Predicate selecting the whole months from start's month through end's month
+        (ISO dates or dates, either side open when None), aligned to partition
+        boundaries, and the parameters it binds. DuckDB folds the bound dates into
+        the scan filter, so the zone maps still skip the other months.
+        """
+        conditions, params = ["TRUE"], []
+        if start:
+            conditions.append(f"{column} >= DATE_TRUNC('month', CAST(? AS DATE))")
+            params.append(str(start))
+        if end:
+            conditions.append(f"{column} < DATE_TRUNC('month', CAST(? AS DATE)) + INTERVAL 1 MONTH")
+            params.append(str(end))
+        return " AND ".join(conditions), params
+
+    @staticmethod
+    def _month_list(months: List[date]) -> str:
+        return ", ".join(f"DATE '{month}'" for month in months)
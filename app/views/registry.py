@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from typing import Callable, List
+from app.views.account_daily_summary import ACCOUNT_DAILY_SUMMARY, AccountDailySummary
+from app.views.account_summary import ACCOUNT_MONTHLY_SUMMARY, AccountSummary
+from app.views.daily_summary import DAILY_SUMMARY, DailySummary
+from app.views.geography import CUSTOMER_GEOGRAPHY, GEOGRAPHY_TABLES, CustomerGeography
+from app.views.leaderboard import ACCOUNT_LEADERBOARD, LEADERBOARD_HISTOGRAM, Leaderboard
+from app.views.materialized_views import MaterializedViews
+from app.views.rolling import ACCOUNT_ROLLING_METRICS, DAILY_ROLLING_METRICS, RollingMetrics
+from app.views.rollup import RollupViews
+from app.views.transactions_views import TransactionsViews
+
+
+@dataclass
+class ViewSpec:
+    """A materialized view, the function building it and what it reads"""
+    name: str
+    build: Callable  # build(connection)
+    depends_on: List[str] = field(default_factory=list)  # Base tables or other registered views
+    key_columns: List[str] = field(default_factory=list)  # Never NULL; checked by sampled/full validation
+
+
+# Every view DataManager builds; ViewScheduler orders them by depends_on
+VIEW_REGISTRY: List[ViewSpec] = [
+    ViewSpec(
+        name=ACCOUNT_DAILY_SUMMARY,
+        build=AccountDailySummary.create_account_daily_summary,
+        depends_on=["transactions"],
+        key_columns=["account_id", "transaction_type"],
+    ),
+    ViewSpec(
+        name=ACCOUNT_MONTHLY_SUMMARY,
+        build=AccountSummary.create_account_monthly_summary,
+        depends_on=[ACCOUNT_DAILY_SUMMARY],
+        key_columns=["account_id"],
+    ),
+    ViewSpec(
+        name=DAILY_SUMMARY,
+        build=DailySummary.create_daily_summary,
+        depends_on=[ACCOUNT_DAILY_SUMMARY],
+        key_columns=["transaction_type"],
+    ),
+    ViewSpec(
+        name=CUSTOMER_GEOGRAPHY,
+        build=CustomerGeography.create_customer_geography,
+        depends_on=GEOGRAPHY_TABLES,
+        key_columns=["customer_id"],
+    ),
+    ViewSpec(
+        name="monthly_account_balances",
+        build=MaterializedViews.create_monthly_account_balances,
+        depends_on=[ACCOUNT_MONTHLY_SUMMARY],
+        key_columns=["account_id"],
+    ),
+    ViewSpec(
+        name="daily_transactions_report",
+        build=MaterializedViews.create_daily_transactions_report,
+        depends_on=[DAILY_SUMMARY],
+    ),
+    ViewSpec(
+        name="customer_financial_overview",
+        build=TransactionsViews.create_customer_financial_overview,
+        depends_on=["customers", "accounts", ACCOUNT_MONTHLY_SUMMARY, CUSTOMER_GEOGRAPHY],
+        key_columns=["customer_id"],
+    ),
+    ViewSpec(
+        name="top_performing_accounts",
+        build=TransactionsViews.create_top_performing_accounts,
+        depends_on=["accounts", ACCOUNT_MONTHLY_SUMMARY],
+        key_columns=["account_id"],
+    ),
+    ViewSpec(
+        name="transaction_rollup",
+        build=RollupViews.create_transaction_rollup,
+        depends_on=[ACCOUNT_DAILY_SUMMARY, "accounts", CUSTOMER_GEOGRAPHY],
+        key_columns=["geo_level", "grain"],
+    ),
+    ViewSpec(
+        name=ACCOUNT_LEADERBOARD,
+        build=Leaderboard.create_account_leaderboard,
+        depends_on=["accounts", ACCOUNT_MONTHLY_SUMMARY],
+        key_columns=["account_id"],
+    ),
+    ViewSpec(
+        name=LEADERBOARD_HISTOGRAM,
+        build=Leaderboard.create_leaderboard_histogram,
+        depends_on=[ACCOUNT_LEADERBOARD],
+        key_columns=["bucket"],
+    ),
+    ViewSpec(
+        name=DAILY_ROLLING_METRICS,
+        build=RollingMetrics.create_daily_rolling_metrics,
+        depends_on=[DAILY_SUMMARY],
+        key_columns=["transaction_date", "transaction_type"],
+    ),
+    ViewSpec(
+        name=ACCOUNT_ROLLING_METRICS,
+        build=RollingMetrics.create_account_rolling_metrics,
+        depends_on=[ACCOUNT_DAILY_SUMMARY],
+        key_columns=["account_id", "transaction_date", "transaction_type"],
+    ),
+]
@@ -0,0 +1,162 @@
+from datetime import date, timedelta
+from typing import List, Tuple
+from app.views.account_daily_summary import ACCOUNT_DAILY_SUMMARY, AccountDailySummary
+from app.views.daily_summary import DAILY_SUMMARY, DailySummary
+from app.views.materialization import Materializer
+from app.views.partitions import MonthPartitions
+
+DAILY_ROLLING_METRICS = "daily_rolling_metrics"
+ACCOUNT_ROLLING_METRICS = "account_rolling_metrics"
+ROLLING_MONTH = "DATE_TRUNC('month', transaction_date)"
+# Moving window lengths in days, each ending on (and including) the row's day
+ROLLING_WINDOWS = [7, 30, 90]
+# Days before a row that its longest window reaches back to
+ROLLING_SPAN = max(ROLLING_WINDOWS) - 1
+# Columns each rolling view is partitioned by, besides transaction_type
+ROLLING_KEYS = {DAILY_ROLLING_METRICS: [], ACCOUNT_ROLLING_METRICS: ["account_id"]}
+# Day-grain totals each rolling view is computed over: (transaction_date, keys,
+# transaction_type, total_amount, tx_count) rows
+ROLLING_DAYS = {DAILY_ROLLING_METRICS: DAILY_SUMMARY, ACCOUNT_ROLLING_METRICS: ACCOUNT_DAILY_SUMMARY}
+ROLLING_SOURCES = {view_name: [days] for view_name, days in ROLLING_DAYS.items()}
+
+
+class RollingMetrics:
+    """
+    Moving totals and counts over the last 7, 30 and 90 days per transaction_type,
+    for the whole bank (DAILY_ROLLING_METRICS) and per account
+    (ACCOUNT_ROLLING_METRICS), one row per day with activity. The bank-wide view
+    is derived from the daily summary, the per-account one from the account daily
+    summary (see ROLLING_DAYS). Every window shares one
+    PARTITION BY / ORDER BY, so all of them come out of a single sort, and RANGE
+    frames count calendar days whatever the gaps between active days.
+    """
+
+    @staticmethod
+    def create_daily_rolling_metrics(connection):
+        print("Creating daily rolling metrics...")
+        DailySummary.ensure_current(connection)
+        Materializer.materialize(
+            connection, DAILY_ROLLING_METRICS, RollingMetrics._rolling(DAILY_ROLLING_METRICS),
+            sources=ROLLING_SOURCES[DAILY_ROLLING_METRICS], partition_by=ROLLING_MONTH
+        )
+        print("✓ Created daily rolling metrics")
+
+    @staticmethod
+    def create_account_rolling_metrics(connection):
+        print("Creating account rolling metrics...")
+        AccountDailySummary.ensure_current(connection)
+        Materializer.materialize(
+            connection, ACCOUNT_ROLLING_METRICS, RollingMetrics._rolling(ACCOUNT_ROLLING_METRICS),
+            sources=ROLLING_SOURCES[ACCOUNT_ROLLING_METRICS], partition_by=ROLLING_MONTH
+        )
+        print("✓ Created account rolling metrics")
+
+    @staticmethod
+    def extend(connection, view_names: List[str] = None):
+        """
+        Brings each rolling view up to date with ROLLING_DAYS without recomputing
+        all of it. Months of ROLLING_DAYS refreshed after the view, or not in it yet
+        (new days, late or changed rows; see MonthPartitions.stale_months), are
+        dirty: their rows and those of the ROLLING_SPAN days after them, whose
+        windows reach back into them, are recomputed, re-reading ROLLING_SPAN days
+        before them as lookback. Per-account views only recompute the accounts with
+        rows in dirty months.
+        """
+        for view_name in view_names or list(ROLLING_KEYS):
+            if not Materializer.metadata(connection, view_name):
+                print(f"ⓘ {view_name} is not built yet")
+                continue
+            dirty = MonthPartitions.stale_months(connection, view_name, ROLLING_DAYS[view_name])
+            if not dirty:
+                print(f"ⓘ {view_name} is up to date")
+                continue
+            runs = RollingMetrics._runs(dirty)
+            recomputed = " OR ".join(
+                f"(transaction_date >= DATE '{first}' "
+                f"AND transaction_date < DATE '{after}' + INTERVAL {ROLLING_SPAN} DAYS)"
+                for first, after in runs
+            )
+            lookback = " OR ".join(
+                f"(transaction_date >= DATE '{first}' - INTERVAL {ROLLING_SPAN} DAYS "
+                f"AND transaction_date < DATE '{after}' + INTERVAL {ROLLING_SPAN} DAYS)"
+                for first, after in runs
+            )
+            dirty_months = ", ".join(f"DATE '{month}'" for month in dirty)
+            in_dirty = f"CAST({ROLLING_MONTH} AS DATE) IN ({dirty_months})"
+
+            def maintain(conn):
+                scope, source_scope = f"({recomputed})", f"({lookback})"
+                for key in ROLLING_KEYS[view_name]:
+                    conn.execute(f"""
+                        CREATE OR REPLACE TEMP TABLE dirty_{key}s AS
+                        SELECT {key} FROM {ROLLING_DAYS[view_name]} WHERE {in_dirty}
+                        UNION
+                        SELECT {key} FROM {view_name} WHERE {in_dirty}
+                    """)
+                    scope += f" AND {key} IN (SELECT {key} FROM dirty_{key}s)"
+                    source_scope += f" AND {key} IN (SELECT {key} FROM dirty_{key}s)"
+                conn.execute(f"DELETE FROM {view_name} WHERE {scope}")
+                conn.execute(f"""
+                    INSERT INTO {view_name}
+                    SELECT * FROM ({RollingMetrics._rolling(view_name, source_scope)})
+                    WHERE {scope}
+                """)
+                for key in ROLLING_KEYS[view_name]:
+                    conn.execute(f"DROP TABLE dirty_{key}s")
+                MonthPartitions.record(conn, view_name, ROLLING_MONTH, [
+                    month for first, after in runs
+                    for month in RollingMetrics._months(first, after + timedelta(days=ROLLING_SPAN))
+                ])
+
+            Materializer.apply_incremental(connection, view_name, maintain)
+
+    @staticmethod
+    def _runs(months: List[date]) -> List[Tuple[date, date]]:
+        """Consecutive sorted months merged into (first day, first day after) ranges"""
+        runs = []
+        for month in months:
+            if runs and runs[-1][1] == month:
+                runs[-1] = (runs[-1][0], RollingMetrics._next_month(month))
+            else:
+                runs.append((month, RollingMetrics._next_month(month)))
+        return runs
+
+    @staticmethod
+    def _months(first: date, after: date) -> List[date]:
+        """Months overlapping the days from first up to (not including) after"""
+        months, month = [], first.replace(day=1)
+        while month < after:
+            months.append(month)
+            month = RollingMetrics._next_month(month)
+        return months
+
+    @staticmethod
+    def _next_month(month: date) -> date:
+        return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    @staticmethod
+    def _rolling(view_name: str, condition: str = "TRUE") -> str:
+        """Rolling metrics over the ROLLING_DAYS rows matching condition, in partition order"""
+        keys = ROLLING_KEYS[view_name] + ["transaction_type"]
+        key_list = ", ".join(keys)
+        daily = f"""
+            SELECT transaction_date, {key_list}, total_amount, tx_count
+            FROM {ROLLING_DAYS[view_name]}
+            WHERE transaction_date IS NOT NULL AND {condition}
+        """
+        metrics = ", ".join(
+            f"SUM(total_amount) OVER w{days} AS total_amount_{days}d, SUM(tx_count) OVER w{days} AS tx_count_{days}d"
+            for days in ROLLING_WINDOWS
+        )
+        frames = ", ".join(
+            f"w{days} AS (PARTITION BY {key_list} ORDER BY transaction_date "
+            f"RANGE BETWEEN INTERVAL {days - 1} DAYS PRECEDING AND CURRENT ROW)"
+            for days in ROLLING_WINDOWS
+        )
+        return f"""
+            WITH daily AS ({daily})
+            SELECT transaction_date, {key_list}, total_amount, tx_count, {metrics}
+            FROM daily
+            WINDOW {frames}
+            ORDER BY transaction_date, {key_list}
+        """
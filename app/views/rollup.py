@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List, Optional
+from app.database.results import ROWS, Results
+from app.views.account_daily_summary import ACCOUNT_DAILY_SUMMARY, AccountDailySummary
+from app.views.geography import CUSTOMER_GEOGRAPHY, CustomerGeography
+from app.views.materialization import Materializer
+
+TRANSACTION_ROLLUP = "transaction_rollup"
+
+# Time grains stored in the rollup, finest first
+STORED_GRAINS = ["day", "week", "month", "year"]
+# Geography levels stored in the rollup; 'all' is the total over every location
+STORED_GEO_LEVELS = ["all", "country", "state", "city"]
+
+# Stored grains each requested grain can be rolled up from, coarsest first
+GRAIN_SOURCES = {
+    "day": ["day"],
+    "week": ["week", "day"],
+    "month": ["month", "day"],
+    "quarter": ["month", "day"],
+    "year": ["year", "month", "day"],
+}
+# Stored geography level each requested one is read from
+GEO_SOURCES = {None: "all", "country": "country", "state": "state", "city": "city"}
+
+
+@dataclass
+class RoutedQuery:
+    """The rollup segment chosen for an aggregate request and the SQL reading it"""
+    grain: str
+    geo_level: str
+    sql: str
+
+
+class RollupViews:
+    @staticmethod
+    def create_transaction_rollup(connection):
+        """
+        Pre-aggregated totals for every stored time grain x geography level x
+        transaction_type, rolled up from a day x city x transaction_type base
+        aggregated from the account daily summary in the same query. Rows are ordered by segment
+        (geo_level, grain), so a routed query only reads the row groups of its segment.
+        """
+        print("Creating transaction rollup...")
+        AccountDailySummary.ensure_current(connection)
+        CustomerGeography.ensure_current(connection)
+        grain_period = "CASE g.grain " + " ".join(
+            f"WHEN '{grain}' THEN CAST(DATE_TRUNC('{grain}', b.day) AS DATE)" for grain in STORED_GRAINS
+        ) + " END"
+        Materializer.materialize(connection, TRANSACTION_ROLLUP, f"""
+            WITH base AS (
+                SELECT
+                    s.transaction_date AS day,
+                    g.country_id,
+                    g.state_id,
+                    g.city_id,
+                    s.transaction_type,
+                    SUM(s.total_amount) AS total_amount,
+                    SUM(s.tx_count) AS tx_count
+                FROM {ACCOUNT_DAILY_SUMMARY} s
+                JOIN accounts a ON s.account_id = a.account_id
+                LEFT JOIN {CUSTOMER_GEOGRAPHY} g ON a.customer_id = g.customer_id
+                WHERE s.transaction_date IS NOT NULL
+                GROUP BY ALL
+            )
+            SELECT
+                l.geo_level,
+                g.grain,
+                {grain_period} AS period_start,
+                CASE l.geo_level
+                    WHEN 'country' THEN b.country_id WHEN 'state' THEN b.state_id WHEN 'city' THEN b.city_id
+                END AS geo_id,
+                b.transaction_type,
+                SUM(b.total_amount) AS total_amount,
+                SUM(b.tx_count) AS tx_count
+            FROM base b
+            CROSS JOIN (VALUES {", ".join(f"('{grain}')" for grain in STORED_GRAINS)}) g(grain)
+            CROSS JOIN (VALUES {", ".join(f"('{level}')" for level in STORED_GEO_LEVELS)}) l(geo_level)
+            GROUP BY ALL
+            ORDER BY geo_level, grain, period_start
+        """, sources=[ACCOUNT_DAILY_SUMMARY, "accounts", CUSTOMER_GEOGRAPHY])
+        print("✓ Created transaction rollup")
+
+
+class RollupRouter:
+    @staticmethod
+    def route(
+        grain: str,
+        geography: Optional[str] = None,
+        by_type: bool = True,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        transaction_types: Optional[List[str]] = None
+    ) -> RoutedQuery:
+        """
+        Picks the coarsest stored grain that can answer the request: one the
+        requested grain rolls up from, whose periods align with the start and end
+        of the window (ISO dates, end inclusive), and renders the SQL re-aggregating it.
+        """
+        if grain not in GRAIN_SOURCES:
+            raise ValueError(f"Unknown grain {grain}; expected one of {', '.join(GRAIN_SOURCES)}")
+        if geography not in GEO_SOURCES:
+            raise ValueError(f"Unknown geography {geography}")
+
+        first = date.fromisoformat(start) if start else None
+        last = date.fromisoformat(end) if end else None
+        source_grain = next(
+            source for source in GRAIN_SOURCES[grain]
+            if RollupRouter._aligned(first, last, source)
+        )
+        geo_level = GEO_SOURCES[geography]
+
+        dimensions = [f"CAST(DATE_TRUNC('{grain}', r.period_start) AS DATE) AS period_start"]
+        if geography:
+            dimensions.append("r.geo_id")
+        if by_type:
+            dimensions.append("r.transaction_type")
+
+        conditions = [f"r.geo_level = '{geo_level}'", f"r.grain = '{source_grain}'"]
+        if first:
+            conditions.append(f"r.period_start >= DATE '{first}'")
+        if last:
+            conditions.append(f"r.period_start <= DATE '{last}'")
+        if transaction_types:
+            quoted = ", ".join("'" + str(t).replace("'", "''") + "'" for t in transaction_types)
+            conditions.append(f"r.transaction_type IN ({quoted})")
+
+        sql = f"""
+            SELECT
+                {", ".join(dimensions)},
+                SUM(r.total_amount) AS total_amount,
+                SUM(r.tx_count) AS tx_count
+            FROM {TRANSACTION_ROLLUP} r
+            WHERE {" AND ".join(conditions)}
+            GROUP BY ALL
+            ORDER BY ALL
+        """
+        return RoutedQuery(source_grain, geo_level, sql)
+
+    @staticmethod
+    def aggregate(connection, grain: str, result_format: str = ROWS, **request):
+        """Runs an aggregate request (see route) against the rollup and returns its result in result_format"""
+        routed = RollupRouter.route(grain, **request)
+        print(f"ⓘ {grain} totals read from the {routed.grain} x {routed.geo_level} rollup segment")
+        return Results.query(connection, routed.sql, result_format=result_format)
+
+    @staticmethod
+    def _aligned(first: Optional[date], last: Optional[date], grain: str) -> bool:
+        """True if the window starts and ends on period boundaries of grain"""
+        starts_on_boundary = first is None or RollupRouter._period_start(first, grain) == first
+        after = last + timedelta(days=1) if last else None
+        ends_on_boundary = after is None or RollupRouter._period_start(after, grain) == after
+        return starts_on_boundary and ends_on_boundary
+
+    @staticmethod
+    def _period_start(day: date, grain: str) -> date:
+        if grain == "week":
+            return day - timedelta(days=day.weekday())  # ISO weeks start on Monday
+        if grain == "month":
+            return day.replace(day=1)
+        if grain == "year":
+            return day.replace(month=1, day=1)
+        return day
@@ -0,0 +1,127 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from app.views.materialization import Materializer
+from app.views.registry import VIEW_REGISTRY, ViewSpec
+from app.views.validation import CATALOG, ViewValidator
+
+
+@dataclass
+class ViewBuildTiming:
+    """When a view build started and finished, in seconds since the schedule began"""
+    name: str
+    started: float
+    finished: float
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+
+class ViewScheduler:
+    @staticmethod
+    def build_all(
+        connection,
+        specs: Optional[List[ViewSpec]] = None,
+        parallel: bool = True,
+        max_workers: Optional[int] = None,
+        validation_level: str = CATALOG
+    ) -> Dict[str, ViewBuildTiming]:
+        """
+        Builds every view once all the registered views it depends on are built.
+        Views whose dependencies are met are built concurrently, each on its own
+        cursor. Every view is then validated at validation_level (see
+        app.views.validation). Prints the schedule and its critical path.
+        """
+        specs = {spec.name: spec for spec in (specs or VIEW_REGISTRY)}
+        ViewScheduler._check(connection, specs)
+        # Created up front: concurrent CREATE TABLE IF NOT EXISTS would conflict
+        Materializer.ensure_metadata(connection)
+
+        workers = (max_workers or min(len(specs), os.cpu_count() or 1)) if parallel else 1
+        pending = dict(specs)
+        running = {}
+        timings: Dict[str, ViewBuildTiming] = {}
+        origin = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                ready = [
+                    name for name, spec in pending.items()
+                    if all(dep in timings for dep in spec.depends_on if dep in specs)
+                ]
+                for name in ready:
+                    future = pool.submit(ViewScheduler._build, connection.cursor(), pending.pop(name), origin)
+                    running[future] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    timings[running.pop(future)] = future.result()
+
+        for spec in specs.values():
+            ViewValidator.check(connection, spec.name, validation_level, spec.key_columns)
+        ViewScheduler._report(specs, timings, time.perf_counter() - origin)
+        return timings
+
+    @staticmethod
+    def critical_path(specs: Dict[str, ViewSpec], timings: Dict[str, ViewBuildTiming]) -> List[str]:
+        """Chain of dependent views with the largest summed build time, first to last"""
+        best: Dict[str, tuple] = {}  # view -> (path seconds, path)
+
+        def longest(name):
+            if name not in best:
+                upstream = [longest(dep) for dep in specs[name].depends_on if dep in specs]
+                seconds, path = max(upstream, default=(0.0, []))
+                best[name] = (seconds + timings[name].seconds, path + [name])
+            return best[name]
+
+        return max((longest(name) for name in specs), default=(0.0, []))[1]
+
+    @staticmethod
+    def _build(cursor, spec: ViewSpec, origin: float) -> ViewBuildTiming:
+        started = time.perf_counter() - origin
+        try:
+            spec.build(cursor)
+        finally:
+            cursor.close()
+        return ViewBuildTiming(spec.name, started, time.perf_counter() - origin)
+
+    @staticmethod
+    def _check(connection, specs: Dict[str, ViewSpec]):
+        """Fails fast on missing base tables and dependency cycles"""
+        tables = {row[0] for row in connection.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+        for spec in specs.values():
+            missing = [dep for dep in spec.depends_on if dep not in specs and dep not in tables]
+            if missing:
+                raise ValueError(f"View {spec.name} depends on missing tables: {', '.join(missing)}")
+
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through view {name}")
+            visiting.add(name)
+            for dep in specs[name].depends_on:
+                if dep in specs:
+                    visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in specs:
+            visit(name)
+
+    @staticmethod
+    def _report(specs: Dict[str, ViewSpec], timings: Dict[str, ViewBuildTiming], wall_seconds: float):
+        """Prints each build's window in the schedule, then the critical path"""
+        print("\nView build report:")
+        for timing in sorted(timings.values(), key=lambda t: t.started):
+            print(
+                f"  {timing.name:<30} {timing.started:>8.3f}s -> {timing.finished:>8.3f}s "
+                f"{timing.seconds:>8.3f}s"
+            )
+        path = ViewScheduler.critical_path(specs, timings)
+        path_seconds = sum(timings[name].seconds for name in path)
+        print(f"  {'WALL':<30} {wall_seconds:>8.3f}s")
+        print(f"  Critical path ({path_seconds:.3f}s): {' -> '.join(path)}")
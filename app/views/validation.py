@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+from app.views.materialization import Materializer
+
+# Validation levels, cheapest first
+CATALOG = "catalog"  # Catalog and build metadata only; reads no view rows
+SAMPLED = "sampled"  # Also checks a reservoir sample of SAMPLE_ROWS rows
+FULL = "full"        # Also recounts every row and null key against the build statistics
+VALIDATION_LEVELS = [CATALOG, SAMPLED, FULL]
+SAMPLE_ROWS = 1000
+
+
+@dataclass
+class ViewValidation:
+    """Outcome of validating one view: errors fail the build, warnings are printed"""
+    view_name: str
+    level: str
+    row_count: Optional[int] = None
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class ViewValidator:
+    """
+    Checks materialized views at a chosen level. The row count comes from the
+    build itself (recorded by Materializer when the table was created), so the
+    catalog level re-executes nothing; sampled and full read the stored table,
+    never the view's defining query.
+    """
+
+    @staticmethod
+    def validate(
+        connection,
+        view_name: str,
+        level: str = CATALOG,
+        key_columns: Optional[List[str]] = None
+    ) -> ViewValidation:
+        if level not in VALIDATION_LEVELS:
+            raise ValueError(f"Unknown validation level {level}; expected one of {', '.join(VALIDATION_LEVELS)}")
+        result = ViewValidation(view_name, level)
+        key_columns = key_columns or []
+
+        columns = {row[0] for row in connection.execute(
+            "SELECT column_name FROM duckdb_columns() WHERE table_name = ?", [view_name]
+        ).fetchall()}
+        recorded = Materializer.metadata(connection, view_name)
+        if not columns:
+            result.errors.append("table does not exist")
+            return result
+        if recorded is None:
+            result.errors.append("no build metadata recorded")
+            return result
+        missing = [column for column in key_columns if column not in columns]
+        if missing:
+            result.errors.append(f"missing key columns: {', '.join(missing)}")
+            return result
+
+        result.row_count = recorded["row_count"]
+        if result.row_count == 0:
+            result.warnings.append("contains no data")
+        if level == CATALOG:
+            return result
+
+        null_keys = " OR ".join(f"{column} IS NULL" for column in key_columns) or "FALSE"
+        if level == SAMPLED:
+            sampled, sampled_null_keys = connection.execute(f"""
+                SELECT COUNT(*), COUNT(*) FILTER (WHERE {null_keys})
+                FROM (SELECT * FROM {view_name} USING SAMPLE reservoir({SAMPLE_ROWS} ROWS))
+            """).fetchone()
+            if result.row_count and not sampled:
+                result.errors.append(f"sample is empty but the build recorded {result.row_count} rows")
+            if sampled_null_keys:
+                result.errors.append(f"{sampled_null_keys} of {sampled} sampled rows have a NULL key")
+            return result
+
+        rows, null_key_rows = connection.execute(f"""
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE {null_keys}) FROM {view_name}
+        """).fetchone()
+        if rows != result.row_count:
+            result.errors.append(f"holds {rows} rows but the build recorded {result.row_count}")
+        if null_key_rows:
+            result.errors.append(f"{null_key_rows} rows have a NULL key")
+        return result
+
+    @staticmethod
+    def check(
+        connection,
+        view_name: str,
+        level: str = CATALOG,
+        key_columns: Optional[List[str]] = None
+    ) -> ViewValidation:
+        """Validates a view, printing warnings; raises RuntimeError listing any errors"""
+        result = ViewValidator.validate(connection, view_name, level, key_columns)
+        for warning in result.warnings:
+            print(f"⚠️ Warning: {view_name} {warning}")
+        if not result.ok:
+            raise RuntimeError(f"View validation ({level}) failed for {view_name}: {'; '.join(result.errors)}")
+        return result